@@ -111,6 +111,32 @@ def analyze_tone(text):
     else:
         return 'neutral'
 
+def categorize_record(intervention):
+    """Categorized record for one intervention, None if its text is unusable."""
+    text = intervention['intervention_text']
+    timestamp = intervention['timestamp']
+    session_id = intervention['session_id']
+    
+    # Skip if it's formatted weirdly
+    if text.startswith("[{'"):
+        # Try to extract actual text
+        match = re.search(r"'text': ['\"]([^'\"]+)['\"]", text)
+        if match:
+            text = match.group(1)
+        else:
+            return None
+    
+    return {
+        'timestamp': timestamp,
+        'session_id': session_id,
+        'text': text,
+        'categories': categorize_intervention(text),
+        'tone': analyze_tone(text),
+        'length': len(text),
+        'has_code': '`' in text,
+        'is_question': '?' in text
+    }
+
 def main():
     input_file = Path('critic/analysis/outputs/2025-01-27_admin_interventions.json')
     output_file = Path('critic/analysis/outputs/2025-01-27_categorized_interventions.json')
@@ -118,41 +144,16 @@ def main():
     with open(input_file, 'r') as f:
         interventions = json.load(f)
     
-    categorized = []
+    # Cheap per intervention - not worth a process pool
+    records = (categorize_record(intervention) for intervention in interventions)
+    categorized = [record for record in records if record is not None]
+    
     category_counts = defaultdict(int)
     tone_counts = defaultdict(int)
-    
-    for intervention in interventions:
-        text = intervention['intervention_text']
-        timestamp = intervention['timestamp']
-        session_id = intervention['session_id']
-        
-        # Skip if it's formatted weirdly
-        if text.startswith("[{'"):
-            # Try to extract actual text
-            match = re.search(r"'text': ['\"]([^'\"]+)['\"]", text)
-            if match:
-                text = match.group(1)
-            else:
-                continue
-        
-        categories = categorize_intervention(text)
-        tone = analyze_tone(text)
-        
-        for cat in categories:
+    for record in categorized:
+        for cat in record['categories']:
             category_counts[cat] += 1
-        tone_counts[tone] += 1
-        
-        categorized.append({
-            'timestamp': timestamp,
-            'session_id': session_id,
-            'text': text,
-            'categories': categories,
-            'tone': tone,
-            'length': len(text),
-            'has_code': '`' in text,
-            'is_question': '?' in text
-        })
+        tone_counts[record['tone']] += 1
     
     # Sort by timestamp
     categorized.sort(key=lambda x: x['timestamp'])
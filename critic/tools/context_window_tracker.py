@@ -1,180 +1,237 @@
 #!/usr/bin/env python3
 """
 Track context window usage across clear/restore cycles in session logs
+
+Works on whole columns from the shared session cache rather than line by
+line: assistant turns with usage are picked out in one pass, clear commands
+split them into cycles (bisect over row numbers), and each cycle's
+max/final/baseline/cost are reductions over array slices. Trajectories are
+min/max bucketed to a fixed number of rows, so a 100k-turn session still
+fits on a screen and keeps its spikes.
+
+Any number of session files (or directories of them) are reported in one
+run, tracked in parallel with --jobs.
 """
 
-import json
+import argparse
+import operator
 import sys
-from datetime import datetime
-from typing import Dict, List, Tuple
+from array import array
+from bisect import bisect_left
+from functools import partial
+from itertools import compress
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from parallel_runner import add_jobs_argument, run_map
+from session_cache import DEFAULT_CACHE_DIR, SessionColumns, load_session
+
+# First operation above this after a clear is the restored baseline
+BASELINE_THRESHOLD = 10000
+
+# Trajectory rows per cycle
+DEFAULT_POINTS = 20
+
+BAR_WIDTH = 50
+
+CLEAR_COMMAND = '<command-name>clear</command-name>'
+
+def operation_rows(columns: SessionColumns) -> List[int]:
+    """Rows that are operations: assistant turns with usage (even all zeros)"""
+    is_op = map(operator.and_, map('assistant'.__eq__, columns.type), columns.has_usage)
+    return list(compress(range(len(columns)), is_op))
+
+def is_clear_event(columns: SessionColumns, row: int) -> bool:
+    """Check if a row is a clear command"""
+    if columns.type[row] != 'user':
+        return False
+    if not columns.content_list[row]:
+        return 'clear' in columns.text[row].lower()
+    # List content only counts in the command form of /clear. Tool results
+    # are user rows too, but never typed by a person
+    return not columns.tool_result[row] and CLEAR_COMMAND in columns.text[row]
 
 class ContextWindowTracker:
-    def __init__(self):
-        self.sessions = []  # List of context "eras" between clears
-        self.current_session = {
-            'start_time': None,
-            'end_time': None,
-            'start_line': 0,
-            'end_line': 0,
-            'max_context': 0,
-            'final_context': 0,
-            'baseline_after_restore': 0,
-            'total_cost': 0,
-            'operations': []
-        }
-        self.line_number = 0
+    """Clear cycles ("sessions") of one session file"""
+    
+    def __init__(self, session_file: Path, points: int = DEFAULT_POINTS,
+                 cache_dir: Optional[Path] = DEFAULT_CACHE_DIR):
+        self.session_file = Path(session_file)
+        self.points = points
+        self.sessions: List[Dict] = []  # List of context "eras" between clears
+        self.operations = 0
+        self._track(load_session(self.session_file, cache_dir))
+    
+    def _track(self, columns: SessionColumns):
+        """Segment operations into clear cycles and summarize each"""
+        rows = range(len(columns))
         
-    def process_line(self, line: str):
-        """Process one JSONL line"""
-        self.line_number += 1
+        op_rows = operation_rows(columns)
         
-        try:
-            data = json.loads(line.strip())
-        except:
-            return
-            
-        # Check for clear command
-        if self._is_clear_event(data):
-            self._handle_clear(data)
-            return
-            
-        # Extract metrics
-        timestamp = data.get('timestamp', '')
-        msg_type = data.get('type', '')
+        # Total context size = cache reads + cache writes
+        context = array('q', map(operator.add,
+                                 map(columns.cache_read_tokens.__getitem__, op_rows),
+                                 map(columns.cache_creation_tokens.__getitem__, op_rows)))
+        cost = array('d', map(columns.cost_usd.__getitem__, op_rows))
+        lines = array('q', map(columns.line.__getitem__, op_rows))
+        times = [ts or '' for ts in map(columns.timestamp.__getitem__, op_rows)]
+        self.operations = len(op_rows)
+        
+        # Each clear closes the current cycle; ops after it start the next
+        clear_rows = [i for i in compress(rows, map('user'.__eq__, columns.type))
+                      if is_clear_event(columns, i)]
+        bounds = [0] + [bisect_left(op_rows, row) for row in clear_rows] + [len(op_rows)]
         
-        if msg_type == 'assistant':
-            message = data.get('message', {})
-            usage = message.get('usage', {})
+        for k in range(len(bounds) - 1):
+            start, end = bounds[k], bounds[k + 1]
+            if start == end:
+                # Nothing happened in this cycle
+                continue
             
-            if usage:
-                # Calculate total context size
-                input_tokens = usage.get('input_tokens', 0)
-                cache_create = usage.get('cache_creation_input_tokens', 0)
-                cache_read = usage.get('cache_read_input_tokens', 0)
-                output_tokens = usage.get('output_tokens', 0)
-                
-                total_context = cache_read + cache_create
-                cost = data.get('costUSD', 0)
-                
-                # Update current session
-                if not self.current_session['start_time']:
-                    self.current_session['start_time'] = timestamp
-                    self.current_session['start_line'] = self.line_number
-                    
-                self.current_session['end_time'] = timestamp
-                self.current_session['end_line'] = self.line_number
-                self.current_session['max_context'] = max(
-                    self.current_session['max_context'], 
-                    total_context
-                )
-                self.current_session['final_context'] = total_context
-                self.current_session['total_cost'] += cost
-                
-                # Track operation
-                self.current_session['operations'].append({
-                    'line': self.line_number,
-                    'time': timestamp,
-                    'context_size': total_context,
-                    'cost': cost,
-                    'cache_create': cache_create,
-                    'cache_read': cache_read
-                })
-                
+            # A cycle starts at its clear command, the first one at its first operation
+            start_time, start_line = times[start], lines[start]
+            if k > 0 and columns.timestamp[clear_rows[k - 1]]:
+                start_time = columns.timestamp[clear_rows[k - 1]]
+                start_line = columns.line[clear_rows[k - 1]]
+            
+            cycle = context[start:end]
+            baseline = 0
+            if self.sessions:
                 # Detect baseline after restore (first substantial operation after clear)
-                if (len(self.sessions) > 0 and 
-                    self.current_session['baseline_after_restore'] == 0 and
-                    total_context > 10000):  # Threshold for "restored"
-                    self.current_session['baseline_after_restore'] = total_context
+                baseline = next((size for size in cycle if size > BASELINE_THRESHOLD), 0)
+            
+            self.sessions.append({
+                'start_time': start_time,
+                'end_time': times[end - 1],
+                'start_line': start_line,
+                'end_line': lines[end - 1],
+                'operations': end - start,
+                'first_context': cycle[0],
+                'max_context': max(0, max(cycle)),
+                'final_context': cycle[-1],
+                'baseline_after_restore': baseline,
+                'total_cost': sum(cost[start:end]),
+                'trajectory': self._trajectory(cycle, times[start:end])
+            })
     
-    def _is_clear_event(self, data: Dict) -> bool:
-        """Check if this is a clear command"""
-        if data.get('type') == 'user':
-            message = data.get('message', {})
-            if isinstance(message, dict):
-                content = message.get('content', '')
-                if isinstance(content, str) and 'clear' in content.lower():
-                    return True
-                # Check for command format
-                if '<command-name>clear</command-name>' in str(content):
-                    return True
-        return False
+    def _trajectory(self, cycle: array, times: List[str]) -> List[Tuple[str, int, int]]:
+        """
+        Min/max bucketed context sizes
+        
+        Returns:
+            (time of the bucket's first operation, min, max) per bucket
+        """
+        if self.points <= 0:
+            return []
+        count = len(cycle)
+        buckets = min(self.points, count)
+        edges = [count * i // buckets for i in range(buckets + 1)]
+        
+        trajectory = []
+        for lo, hi in zip(edges, edges[1:]):
+            bucket = cycle[lo:hi]
+            trajectory.append((times[lo], min(bucket), max(bucket)))
+        return trajectory
     
-    def _handle_clear(self, data: Dict):
-        """Handle a clear event"""
-        # Save current session if it has data
-        if self.current_session['operations']:
-            self.sessions.append(self.current_session.copy())
-            
-        # Start new session
-        self.current_session = {
-            'start_time': data.get('timestamp', ''),
-            'end_time': None,
-            'start_line': self.line_number,
-            'end_line': 0,
-            'max_context': 0,
-            'final_context': 0,
-            'baseline_after_restore': 0,
-            'total_cost': 0,
-            'operations': []
-        }
+    @property
+    def total_cost(self) -> float:
+        return sum(s['total_cost'] for s in self.sessions)
     
-    def finalize(self):
-        """Save final session if exists"""
-        if self.current_session['operations']:
-            self.sessions.append(self.current_session)
+    @property
+    def max_context(self) -> int:
+        return max((s['max_context'] for s in self.sessions), default=0)
     
-    def generate_report(self) -> str:
-        """Generate analysis report"""
-        report = ["# Context Window Usage Report\n"]
+    def generate_report(self, heading: str = '#') -> str:
+        """Generate analysis report (heading = markdown level of the title)"""
+        report = [f"{heading} Context Window Usage: {self.session_file.name}\n"]
         
-        total_cost = sum(s['total_cost'] for s in self.sessions)
         report.append(f"Total sessions (clear cycles): {len(self.sessions)}")
-        report.append(f"Total cost across all sessions: ${total_cost:.4f}\n")
+        report.append(f"Total cost across all sessions: ${self.total_cost:.4f}\n")
         
         for i, session in enumerate(self.sessions):
-            report.append(f"\n## Session {i+1}")
+            report.append(f"\n{heading}# Session {i+1}")
             report.append(f"Time: {session['start_time']} to {session['end_time']}")
             report.append(f"Lines: {session['start_line']} to {session['end_line']}")
-            report.append(f"Operations: {len(session['operations'])}")
+            report.append(f"Operations: {session['operations']}")
             report.append(f"Max context: {session['max_context']:,} tokens")
             report.append(f"Final context: {session['final_context']:,} tokens")
             
             if session['baseline_after_restore'] > 0:
                 report.append(f"Post-restore baseline: {session['baseline_after_restore']:,} tokens")
-                
+            
             report.append(f"Session cost: ${session['total_cost']:.4f}")
             
             # Show context growth
-            if len(session['operations']) > 1:
-                growth = session['final_context'] - session['operations'][0]['context_size']
+            if session['operations'] > 1:
+                growth = session['final_context'] - session['first_context']
                 report.append(f"Context growth: {growth:,} tokens")
-                
-            # Context trajectory graph (simple ASCII)
-            if session['operations']:
+            
+            # Context trajectory graph (simple ASCII): solid up to the bucket's
+            # minimum, shaded up to its maximum
+            max_ctx = session['max_context']
+            if session['trajectory'] and max_ctx > 0:
                 report.append("\nContext trajectory:")
-                max_ctx = session['max_context']
-                if max_ctx > 0:
-                    for j, op in enumerate(session['operations']):
-                        if j % 5 == 0 or j == len(session['operations']) - 1:  # Sample every 5th
-                            bar_len = int(50 * op['context_size'] / max_ctx)
-                            bar = '█' * bar_len
-                            report.append(f"  {op['time'][11:19]} |{bar}")
+                for time, low, high in session['trajectory']:
+                    low_len = int(BAR_WIDTH * max(low, 0) / max_ctx)
+                    high_len = int(BAR_WIDTH * max(high, 0) / max_ctx)
+                    bar = '█' * low_len + '░' * (high_len - low_len)
+                    report.append(f"  {time[11:19]} |{bar}")
         
         return '\n'.join(report)
 
+def summary_report(trackers: List[ContextWindowTracker]) -> str:
+    """One-line-per-file overview plus totals across all files"""
+    total_cost = sum(t.total_cost for t in trackers)
+    report = ["# Context Window Usage Report\n"]
+    report.append(f"Session files: {len(trackers)}")
+    report.append(f"Total sessions (clear cycles): {sum(len(t.sessions) for t in trackers)}")
+    report.append(f"Total operations: {sum(t.operations for t in trackers):,}")
+    report.append(f"Peak context: {max((t.max_context for t in trackers), default=0):,} tokens")
+    report.append(f"Total cost across all sessions: ${total_cost:.4f}\n")
+    
+    report.append(f"{'File':<44} {'Cycles':>6} {'Ops':>8} {'Max context':>12} {'Cost':>10}")
+    for t in trackers:
+        report.append(f"{t.session_file.name[:44]:<44} {len(t.sessions):>6} {t.operations:>8,} "
+                      f"{t.max_context:>12,} {f'${t.total_cost:.4f}':>10}")
+    return '\n'.join(report)
+
+def session_files(paths: List[Path]) -> List[Path]:
+    """Expand directories to the .jsonl files inside them"""
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.glob('*.jsonl')))
+        else:
+            files.append(path)
+    return files
+
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: context_window_tracker.py <session.jsonl>")
+    parser = argparse.ArgumentParser(description='Track context window usage across clear/restore cycles')
+    parser.add_argument('paths', nargs='+', type=Path, help='Session .jsonl files or directories of them')
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS,
+                        help=f'Trajectory rows per cycle (default: {DEFAULT_POINTS}, 0 = none)')
+    parser.add_argument('--summary', action='store_true', help='Only the per-file overview')
+    parser.add_argument('--no-cache', action='store_true', help='Parse files without the session cache')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
+    files = session_files(args.paths)
+    if not files:
+        print("No session files found")
         sys.exit(1)
-        
-    tracker = ContextWindowTracker()
     
-    with open(sys.argv[1], 'r') as f:
-        for line in f:
-            tracker.process_line(line)
+    track = partial(ContextWindowTracker, points=0 if args.summary else args.points,
+                    cache_dir=None if args.no_cache else DEFAULT_CACHE_DIR)
+    trackers = run_map(track, files, args.jobs)
+    
+    if len(trackers) == 1 and not args.summary:
+        print(trackers[0].generate_report())
+        return
     
-    tracker.finalize()
-    print(tracker.generate_report())
+    print(summary_report(trackers))
+    if not args.summary:
+        for tracker in trackers:
+            print('\n' + tracker.generate_report(heading='##'))
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
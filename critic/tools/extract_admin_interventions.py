@@ -1,23 +1,26 @@
 #!/usr/bin/env python3
 """Extract @ADMIN interventions from session files with context."""
 
+import argparse
 import json
 import os
 import re
 from datetime import datetime
 from pathlib import Path
 
-def extract_user_type(entry):
+from parallel_runner import add_jobs_argument, extend, run_map_reduce
+from session_cache import load_session
+
+def extract_user_type(entry_type, user_type, text):
     """Determine if message is from human or agent."""
-    if entry.get('type') == 'user':
+    if entry_type == 'user':
         # Check userType field first
-        if entry.get('userType') == 'external':
+        if user_type == 'external':
             return 'human'
-        elif entry.get('userType') == 'agent':
+        elif user_type == 'agent':
             return 'agent'
             
         # Fallback to content analysis
-        text = extract_message_text(entry)
         # Agent messages contain → or start with @
         if '→' in text or re.match(r'^@[A-Z]+', text):
             return 'agent'
@@ -25,80 +28,68 @@ def extract_user_type(entry):
             return 'human'
     return 'assistant'
 
-def extract_message_text(entry):
-    """Extract actual message text from various formats."""
-    # Check for message.content structure
-    message = entry.get('message', {})
-    if message and 'content' in message:
-        return str(message['content'])
+def extract_file_interventions(filepath):
+    """Find @ADMIN interventions (with context) in one session file."""
+    filename = filepath.name
+    interventions = []
+    
+    # Parsed columns from the shared session cache
+    session = load_session(filepath)
+    user_types = [extract_user_type(entry_type, user_type, text)
+                  for entry_type, user_type, text in zip(session.type, session.user_type, session.text)]
+    
+    # Find @ADMIN messages
+    for i, user_type in enumerate(user_types):
+        if user_type == 'human':
+            text = session.text[i]
+            
+            # Check if it's actually an @ADMIN intervention
+            # Skip tool results and system messages
+            if session.tool_result[i]:
+                continue
+            if '[Request interrupted' in text:
+                continue
+            if 'Caveat: The messages below' in text:
+                continue
+                
+            if '@ADMIN' in text or ('admin' in text.lower() and not '→' in text):
+                # Get context (3 before, 3 after)
+                context_start = max(0, i - 3)
+                context_end = min(len(session), i + 4)
+                
+                context = []
+                for j in range(context_start, context_end):
+                    context.append({
+                        'index': j,
+                        'timestamp': session.timestamp[j] or '',
+                        'type': session.type[j] or '',
+                        'user_type': user_types[j],
+                        'text': session.text[j],
+                        'is_intervention': j == i
+                    })
+                
+                interventions.append({
+                    'session_id': filename.replace('.jsonl', ''),
+                    'timestamp': session.timestamp[i] or '',
+                    'intervention_text': text,
+                    'context': context
+                })
     
-    # Fallback to direct content
-    content = entry.get('content', {})
-    if isinstance(content, dict):
-        return content.get('text', str(content))
-    return str(content)
+    return interventions
 
 def main():
+    parser = argparse.ArgumentParser(description='Extract @ADMIN interventions from session files')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
     sessions_dir = Path('nexus/sessions')
     output_file = Path('critic/analysis/outputs/2025-01-27_admin_interventions.json')
     
-    # Get all session files
-    target_files = [f.name for f in sessions_dir.glob('*.jsonl')]
-    
-    interventions = []
+    # Get all session files (sorted so ties in the timestamp sort are stable)
+    session_files = sorted(sessions_dir.glob('*.jsonl'))
     
-    for filename in target_files:
-        filepath = sessions_dir / filename
-        if not filepath.exists():
-            continue
-            
-        with open(filepath, 'r') as f:
-            entries = []
-            for line in f:
-                try:
-                    entry = json.loads(line.strip())
-                    entries.append(entry)
-                except:
-                    continue
-            
-            # Find @ADMIN messages
-            for i, entry in enumerate(entries):
-                user_type = extract_user_type(entry)
-                if user_type == 'human':
-                    text = extract_message_text(entry)
-                    
-                    # Check if it's actually an @ADMIN intervention
-                    # Skip tool results and system messages
-                    if 'tool_use_id' in text or 'tool_result' in text:
-                        continue
-                    if '[Request interrupted' in text:
-                        continue
-                    if 'Caveat: The messages below' in text:
-                        continue
-                        
-                    if '@ADMIN' in text or ('admin' in text.lower() and not '→' in text):
-                        # Get context (3 before, 3 after)
-                        context_start = max(0, i - 3)
-                        context_end = min(len(entries), i + 4)
-                        
-                        context = []
-                        for j in range(context_start, context_end):
-                            context_entry = entries[j]
-                            context.append({
-                                'index': j,
-                                'timestamp': context_entry.get('timestamp', ''),
-                                'type': context_entry.get('type', ''),
-                                'user_type': extract_user_type(context_entry),
-                                'text': extract_message_text(context_entry),
-                                'is_intervention': j == i
-                            })
-                        
-                        interventions.append({
-                            'session_id': filename.replace('.jsonl', ''),
-                            'timestamp': entry.get('timestamp', ''),
-                            'intervention_text': text,
-                            'context': context
-                        })
+    # One map task per session file, concatenated in file order
+    interventions = run_map_reduce(extract_file_interventions, extend, [], session_files, args.jobs)
     
     # Sort by timestamp
     interventions.sort(key=lambda x: x['timestamp'])
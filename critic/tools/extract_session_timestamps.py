@@ -1,43 +1,28 @@
 #!/usr/bin/env python3
 """Extract first and last timestamps from each session file."""
 
-import json
+import argparse
 from pathlib import Path
 import csv
 
+from parallel_runner import add_jobs_argument, run_map
+from session_cache import load_session
+
 def get_first_last_timestamps(session_file: Path):
     """Get first and last timestamps from a session file."""
-    first_ts = None
-    last_ts = None
+    # Parsed columns from the shared session cache
+    timestamps = load_session(session_file).timestamp
     
-    with open(session_file, 'r') as f:
-        # Get first timestamp
-        for line in f:
-            try:
-                entry = json.loads(line.strip())
-                if 'timestamp' in entry and entry['timestamp']:
-                    first_ts = entry['timestamp']
-                    break
-            except json.JSONDecodeError:
-                continue
-        
-        # Get last timestamp by reading file again from end
-        # More efficient than loading entire file
-        f.seek(0)
-        lines = f.readlines()
-        
-        for line in reversed(lines):
-            try:
-                entry = json.loads(line.strip())
-                if 'timestamp' in entry and entry['timestamp']:
-                    last_ts = entry['timestamp']
-                    break
-            except json.JSONDecodeError:
-                continue
+    first_ts = next((ts for ts in timestamps if ts), None)
+    last_ts = next((ts for ts in reversed(timestamps) if ts), None)
     
     return first_ts, last_ts
 
 def main():
+    parser = argparse.ArgumentParser(description='Add first/last timestamps to sessions_index.csv')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
     session_dir = Path("/home/daniel/prj/rtfw/nexus/sessions")
     
     # Read existing CSV
@@ -47,12 +32,17 @@ def main():
         for row in reader:
             existing_data[row['sessionId']] = row
     
+    # Read timestamps for every existing session file in parallel
+    session_files = [session_dir / f"{session_id}.jsonl" for session_id in existing_data]
+    present = [session_file for session_file in session_files if session_file.exists()]
+    timestamps = dict(zip(present, run_map(get_first_last_timestamps, present, args.jobs)))
+    
     # Update with last timestamps
     results = []
     for session_id, data in existing_data.items():
         session_file = session_dir / f"{session_id}.jsonl"
-        if session_file.exists():
-            first_ts, last_ts = get_first_last_timestamps(session_file)
+        if session_file in timestamps:
+            first_ts, last_ts = timestamps[session_file]
             data['last_ts'] = last_ts if last_ts else 'UNKNOWN'
             # Verify first_ts matches
             if first_ts and data['start_ts'] == 'UNKNOWN':
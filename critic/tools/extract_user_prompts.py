@@ -1,67 +1,52 @@
 #!/usr/bin/env python3
 """Extract first 5 user prompts from each session file for agent identification."""
 
+import argparse
 import json
 from pathlib import Path
 from typing import List, Dict, Any
 
+from parallel_runner import add_jobs_argument, run_map
+from session_cache import load_session
+
 def extract_user_prompts(session_file: Path, limit: int = 5) -> List[Dict[str, Any]]:
     """Extract first N user prompts from a session file."""
     prompts = []
     
-    with open(session_file, 'r') as f:
-        for line in f:
-            try:
-                entry = json.loads(line.strip())
-                
-                # Only want user messages (not tool results)
-                if entry.get('type') != 'user' or entry.get('userType') != 'external':
-                    continue
-                
-                # Extract content
-                message = entry.get('message', {})
-                if not isinstance(message, dict):
-                    continue
-                    
-                content = message.get('content', '')
-                
-                # Skip tool results (they have specific structure)
-                if isinstance(content, list):
-                    # Check if it's a tool result
-                    is_tool_result = any(
-                        isinstance(item, dict) and 'tool_use_id' in item 
-                        for item in content
-                    )
-                    if is_tool_result:
-                        continue
-                    # Otherwise join text parts
-                    text_parts = []
-                    for item in content:
-                        if isinstance(item, dict) and item.get('type') == 'text':
-                            text_parts.append(item.get('text', ''))
-                    content = ' '.join(text_parts)
-                
-                if content and isinstance(content, str):
-                    prompts.append({
-                        'timestamp': entry.get('timestamp', 'unknown')[:19],
-                        'content': content[:200] + '...' if len(content) > 200 else content
-                    })
-                    
-                    if len(prompts) >= limit:
-                        break
-                        
-            except json.JSONDecodeError:
-                continue
+    # Parsed columns from the shared session cache
+    session = load_session(session_file)
+    
+    for i in range(len(session)):
+        # Only want user messages (not tool results)
+        if session.type[i] != 'user' or session.user_type[i] != 'external':
+            continue
+        if session.tool_result[i]:
+            continue
+        
+        content = session.text[i]
+        if content:
+            prompts.append({
+                'timestamp': (session.timestamp[i] or 'unknown')[:19],
+                'content': content[:200] + '...' if len(content) > 200 else content
+            })
+            
+            if len(prompts) >= limit:
+                break
     
     return prompts
 
 def main():
+    parser = argparse.ArgumentParser(description='Extract first user prompts from each session file')
+    add_jobs_argument(parser)
+    args = parser.parse_args()
+    
     session_dir = Path("/home/daniel/prj/rtfw/nexus/sessions")
     all_sessions = []
     
-    for session_file in sorted(session_dir.glob("*.jsonl")):
-        prompts = extract_user_prompts(session_file)
-        
+    session_files = sorted(session_dir.glob("*.jsonl"))
+    session_prompts = run_map(extract_user_prompts, session_files, args.jobs)
+    
+    for session_file, prompts in zip(session_files, session_prompts):
         if prompts:
             all_sessions.append({
                 'file': session_file.name,
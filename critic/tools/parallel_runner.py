@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Shared map/reduce runner for the CRITIC session tools.
+
+Tools hand over a list of work items (session files), a map
+function run once per item, and optionally a reduce step. Items are
+spread over a process pool (largest files first so one big session
+doesn't finish last), but results always come back - and are reduced -
+in the original item order, so output is identical for any --jobs.
+
+Map functions must be top-level functions so they can be pickled. Work
+on data already in memory is cheaper to do in-process than to ship to
+workers, so tools like categorize_interventions don't use this.
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterable, List, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+A = TypeVar('A')
+
+
+def default_jobs() -> int:
+    return os.cpu_count() or 1
+
+
+def add_jobs_argument(parser: argparse.ArgumentParser):
+    """Add the standard --jobs option to a tool's argument parser."""
+    parser.add_argument('--jobs', '-j', type=int, default=default_jobs(),
+                        help='Worker processes (default: CPU count, 1 = no pool)')
+
+
+def _item_size(item: Any) -> int:
+    """Rough cost of an item, used only to schedule big items first."""
+    if isinstance(item, Path):
+        try:
+            return item.stat().st_size
+        except OSError:
+            return 0
+    return 0
+
+
+def run_map(map_fn: Callable[[T], R], items: Iterable[T], jobs: Optional[int] = None) -> List[R]:
+    """
+    Apply map_fn to every item, in parallel when jobs > 1.
+    
+    Returns:
+        Results in the same order as items
+    """
+    items = list(items)
+    jobs = default_jobs() if jobs is None else jobs
+    
+    if jobs <= 1 or len(items) <= 1:
+        return [map_fn(item) for item in items]
+    
+    # Largest first for better packing; slots keep the original order
+    schedule = sorted(range(len(items)), key=lambda i: _item_size(items[i]), reverse=True)
+    results: List[Any] = [None] * len(items)
+    
+    with ProcessPoolExecutor(max_workers=min(jobs, len(items))) as pool:
+        futures = {i: pool.submit(map_fn, items[i]) for i in schedule}
+        for i in range(len(items)):
+            results[i] = futures[i].result()
+    
+    return results
+
+
+def run_map_reduce(map_fn: Callable[[T], R],
+                   reduce_fn: Callable[[A, R], A],
+                   initial: A,
+                   items: Iterable[T],
+                   jobs: Optional[int] = None) -> A:
+    """
+    Map every item, then fold the partial results in item order.
+    
+    The reduce step runs in the calling process, so it may mutate and
+    return `initial`.
+    """
+    accumulator = initial
+    for partial in run_map(map_fn, items, jobs):
+        accumulator = reduce_fn(accumulator, partial)
+    return accumulator
+
+
+def extend(accumulator: List[T], partial: List[T]) -> List[T]:
+    """Reduce step that concatenates list results."""
+    accumulator.extend(partial)
+    return accumulator
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Shared parsed-session cache for the CRITIC tools.
+
+Each session JSONL file is parsed once into columns (one list or array
+per field) and stored next to the tools in .session_cache/. Later loads
+read the columns back instead of decoding JSON again:
+
+    line, timestamp, type, user_type, role, text, content_list, tool_names,
+    tool_result, has_usage, input_tokens, cache_creation_tokens,
+    cache_read_tokens, output_tokens, cost_usd
+
+Text is flattened the same way for every tool: string content as-is,
+list content as its text parts joined with newlines (tool calls are listed
+in tool_names instead), with content_list telling the two apart. has_usage
+marks entries that carried a usage dict, even if every count in it is 0.
+Numeric columns are compact array.array buffers;
+`line` is the entry's 1-based line number in the file.
+
+A cache file records the source's inode, size and mtime. A source that
+only grew is parsed from where the last parse stopped. Anything else
+rebuilds the cache. Stored with marshal (stdlib, fast, can't execute code).
+"""
+
+import hashlib
+import json
+import marshal
+import os
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_CACHE_DIR = Path(__file__).parent / '.session_cache'
+
+CACHE_VERSION = 3
+
+TEXT_COLUMNS = ('timestamp', 'type', 'user_type', 'role', 'text', 'content_list',
+                'tool_names', 'tool_result', 'has_usage')
+INT_COLUMNS = ('line', 'input_tokens', 'cache_creation_tokens', 'cache_read_tokens', 'output_tokens')
+FLOAT_COLUMNS = ('cost_usd',)
+
+
+def flatten_content(content: Any) -> Tuple[str, Tuple[str, ...], bool]:
+    """
+    Flatten message content.
+    
+    Returns:
+        (text, tool_names, is_tool_result)
+    """
+    if isinstance(content, str):
+        return content, (), False
+    if not isinstance(content, list):
+        return ('' if content is None else str(content)), (), False
+    
+    texts = []
+    tools = []
+    tool_result = False
+    for item in content:
+        if not isinstance(item, dict):
+            texts.append(str(item))
+            continue
+        item_type = item.get('type')
+        if item_type == 'text':
+            texts.append(item.get('text', ''))
+        elif item_type == 'tool_use':
+            tools.append(item.get('name', 'unknown'))
+        if item_type == 'tool_result' or 'tool_use_id' in item:
+            tool_result = True
+    return '\n'.join(texts), tuple(tools), tool_result
+
+
+def _number(value: Any, kind: type) -> Any:
+    try:
+        return kind(value or 0)
+    except (TypeError, ValueError):
+        return kind(0)
+
+
+class SessionColumns:
+    """Columns for one session file; row i is the i-th parsed entry."""
+    
+    def __init__(self, source: Path):
+        self.source = source
+        self.timestamp: List[Optional[str]] = []
+        self.type: List[Optional[str]] = []
+        self.user_type: List[Optional[str]] = []
+        self.role: List[Optional[str]] = []
+        self.text: List[str] = []
+        self.content_list: List[bool] = []
+        self.tool_names: List[Tuple[str, ...]] = []
+        self.tool_result: List[bool] = []
+        self.has_usage: List[bool] = []
+        self.line = array('q')
+        self.input_tokens = array('q')
+        self.cache_creation_tokens = array('q')
+        self.cache_read_tokens = array('q')
+        self.output_tokens = array('q')
+        self.cost_usd = array('d')
+    
+    def __len__(self) -> int:
+        return len(self.type)
+    
+    def append_entry(self, entry: Dict[str, Any], line: int = 0):
+        """Add one decoded JSONL entry (found on `line`) as a row."""
+        message = entry.get('message', {})
+        if not isinstance(message, dict):
+            message = {'content': message}
+        usage = message.get('usage', {})
+        if not isinstance(usage, dict):
+            usage = {}
+        
+        content_list = isinstance(message.get('content'), list)
+        if 'content' in message:
+            text, tools, tool_result = flatten_content(message.get('content'))
+        else:
+            text, tools, tool_result = entry.get('summary', '') or '', (), False
+        
+        timestamp = entry.get('timestamp')
+        self.timestamp.append(timestamp if isinstance(timestamp, str) else None)
+        self.type.append(entry.get('type'))
+        self.user_type.append(entry.get('userType'))
+        self.role.append(message.get('role'))
+        self.text.append(text)
+        self.content_list.append(content_list)
+        self.tool_names.append(tools)
+        self.tool_result.append(tool_result)
+        self.has_usage.append(bool(usage))
+        self.line.append(line)
+        self.input_tokens.append(_number(usage.get('input_tokens'), int))
+        self.cache_creation_tokens.append(_number(usage.get('cache_creation_input_tokens'), int))
+        self.cache_read_tokens.append(_number(usage.get('cache_read_input_tokens'), int))
+        self.output_tokens.append(_number(usage.get('output_tokens'), int))
+        self.cost_usd.append(_number(entry.get('costUSD'), float))
+    
+    def rows(self, start: int = 0) -> List[Dict[str, Any]]:
+        """Rows as dicts (convenience for small slices)."""
+        names = TEXT_COLUMNS + INT_COLUMNS + FLOAT_COLUMNS
+        columns = [getattr(self, name) for name in names]
+        return [dict(zip(names, values)) for values in zip(*(column[start:] for column in columns))]
+    
+    # Serialization
+    
+    def _dump(self) -> Dict[str, Any]:
+        data = {name: getattr(self, name) for name in TEXT_COLUMNS}
+        for name in INT_COLUMNS + FLOAT_COLUMNS:
+            data[name] = getattr(self, name).tobytes()
+        return data
+    
+    def _load(self, data: Dict[str, Any]):
+        for name in TEXT_COLUMNS:
+            setattr(self, name, list(data[name]))
+        for name in INT_COLUMNS:
+            column = array('q')
+            column.frombytes(data[name])
+            setattr(self, name, column)
+        for name in FLOAT_COLUMNS:
+            column = array('d')
+            column.frombytes(data[name])
+            setattr(self, name, column)
+
+
+def cache_path_for(source: Path, cache_dir: Path = DEFAULT_CACHE_DIR) -> Path:
+    """Cache file for a session file (keyed by its absolute path)."""
+    digest = hashlib.sha1(str(source.resolve()).encode()).hexdigest()[:16]
+    return cache_dir / f"{source.stem[:40]}.{digest}.cols"
+
+
+def load_session(source: Path, cache_dir: Optional[Path] = DEFAULT_CACHE_DIR) -> SessionColumns:
+    """
+    Columns for a session file, from cache when it's still valid.
+    
+    Args:
+        source: Session JSONL file
+        cache_dir: Where cache files live (None = parse without caching)
+    """
+    source = Path(source)
+    st = os.stat(source)
+    columns = SessionColumns(source)
+    offset = 0
+    lines = 0
+    
+    cache_file = cache_path_for(source, cache_dir) if cache_dir else None
+    if cache_file:
+        header, data = _read_cache(cache_file)
+        if header and header['inode'] == st.st_ino:
+            if (header['size'], header['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+                columns._load(data)
+                return columns
+            if header['size'] < st.st_size:
+                # Grew since last parse - only read the new lines
+                columns._load(data)
+                offset, lines = header['offset'], header['lines']
+    
+    offset, lines = _parse_from(source, offset, lines, columns)
+    
+    if cache_file:
+        header = {'version': CACHE_VERSION, 'inode': st.st_ino, 'size': st.st_size,
+                  'mtime_ns': st.st_mtime_ns, 'offset': offset, 'lines': lines}
+        _write_cache(cache_file, header, columns._dump())
+    return columns
+
+
+def _parse_from(source: Path, offset: int, lines: int, columns: SessionColumns) -> Tuple[int, int]:
+    """Append entries from complete lines after offset; returns the new (offset, lines)."""
+    with open(source, 'rb') as f:
+        f.seek(offset)
+        for raw in f:
+            try:
+                entry = json.loads(raw)
+            except ValueError:
+                if not raw.endswith(b'\n'):
+                    # Partial line still being written - retry next time
+                    break
+                entry = None
+            offset += len(raw)
+            lines += 1
+            if isinstance(entry, dict):
+                columns.append_entry(entry, lines)
+    return offset, lines
+
+
+def _read_cache(cache_file: Path) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    try:
+        with open(cache_file, 'rb') as f:
+            header, data = marshal.loads(f.read())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None, None
+    if not isinstance(header, dict) or header.get('version') != CACHE_VERSION:
+        return None, None
+    return header, data
+
+
+def _write_cache(cache_file: Path, header: Dict[str, Any], data: Dict[str, Any]):
+    """Atomic best-effort write; a failed write just means parsing again next time."""
+    try:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        with open(tmp_file, 'wb') as f:
+            f.write(marshal.dumps((header, data)))
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+On-disk search index over session JSONL files for session_query_v2.
+
+One SQLite database holds a row per entry (file, line offset, type,
+userType, timestamp, detected agent, intervention flag) plus an FTS5
+table over the extracted content. Files are indexed incrementally from
+the byte offset reached last time, so refreshing before a query only
+reads what was appended since.
+
+Queries are answered from the index; full entries (and context windows)
+are fetched by seeking to the stored offsets.
+"""
+
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / '.session_index.db'
+
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    inode INTEGER NOT NULL,
+    indexed_bytes INTEGER NOT NULL,
+    next_seq INTEGER NOT NULL,
+    last_entry TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    file_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    type TEXT,
+    user_type TEXT,
+    timestamp TEXT,
+    agent TEXT,
+    intervention INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_file_seq ON entries(file_id, seq);
+CREATE INDEX IF NOT EXISTS entries_filters ON entries(type, user_type);
+CREATE INDEX IF NOT EXISTS entries_detected ON entries(file_id, seq) WHERE agent IS NOT NULL;
+"""
+
+# Regex metacharacters that end a literal run
+_META = set('.^$*+?{}[]()|\\')
+
+
+def fts5_available() -> bool:
+    """Check whether this SQLite build has FTS5 with the trigram tokenizer."""
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(content, tokenize='trigram')")
+        conn.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+def required_literal(pattern: str) -> Optional[str]:
+    """
+    Longest literal substring every match of pattern must contain, if any.
+    
+    Conservative: patterns with groups or alternation get no literal, and a
+    character followed by an optional quantifier is not counted. The literal
+    only narrows candidates via FTS; the regex is still applied to them.
+    """
+    if '(' in pattern or '|' in pattern or '[' in pattern:
+        return None
+    
+    runs = []
+    current = ''
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            nxt = pattern[i + 1:i + 2]
+            # Escaped punctuation is literal; \b, \d, \s... are not
+            if nxt and not nxt.isalnum():
+                char, i = nxt, i + 1
+            else:
+                runs.append(current)
+                current = ''
+                i += 2
+                continue
+        elif char in _META:
+            if char in '*?{' and current:
+                # Previous character is optional/repeated
+                current = current[:-1]
+            runs.append(current)
+            current = ''
+            if char == '{':
+                # Skip the repeat count itself
+                close = pattern.find('}', i)
+                i = close + 1 if close != -1 else len(pattern)
+            else:
+                i += 1
+            continue
+        current += char
+        i += 1
+    runs.append(current)
+    
+    best = max(runs, key=len)
+    # Trigram FTS needs at least 3 characters
+    return best if len(best) >= 3 else None
+
+
+class SessionIndex:
+    """
+    Incrementally maintained SQLite/FTS5 index of session entries.
+    
+    `query` supplies extract_content/match_agent/is_intervention so indexed
+    values are exactly what a full scan would compute.
+    
+    Each entry stores its own (uncached) agent match. A scan caches the first
+    match among the entries passing the type filters, so the agent reported
+    for a result is resolved per query under those same filters.
+    """
+    
+    def __init__(self, db_path: Path, session_dir: Path, query):
+        self.db_path = Path(db_path)
+        self.session_dir = Path(session_dir)
+        self.query = query
+        
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.create_function('regexp', 2, self._regexp, deterministic=True)
+        self._patterns: Dict[str, re.Pattern] = {}
+        self._ensure_schema()
+        
+        self._open_name: Optional[str] = None
+        self._open_file = None
+    
+    def _ensure_schema(self):
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS files;
+                DROP TABLE IF EXISTS entries;
+                DROP TABLE IF EXISTS entries_fts;
+            """)
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(content, tokenize='trigram')"
+        )
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.commit()
+    
+    def _regexp(self, pattern: str, value: Optional[str]) -> bool:
+        compiled = self._patterns.get(pattern)
+        if compiled is None:
+            compiled = self._patterns[pattern] = re.compile(pattern, re.IGNORECASE)
+        return value is not None and compiled.search(value) is not None
+    
+    def close(self):
+        if self._open_file:
+            self._open_file.close()
+            self._open_file = self._open_name = None
+        self.conn.close()
+    
+    # Building
+    
+    def refresh(self) -> int:
+        """
+        Bring the index up to date with the session directory.
+        
+        Unchanged files cost one stat; appended files are read from the last
+        indexed offset; replaced or truncated files are re-indexed.
+        
+        Returns:
+            Number of entries added
+        """
+        known = {name: (file_id, inode, indexed_bytes)
+                 for file_id, name, inode, indexed_bytes
+                 in self.conn.execute('SELECT id, name, inode, indexed_bytes FROM files')}
+        added = 0
+        seen = set()
+        
+        for entry in self._session_files():
+            seen.add(entry.name)
+            st = entry.stat()
+            
+            file_id, inode, indexed_bytes = known.get(entry.name, (None, None, 0))
+            if file_id is not None and (inode != st.st_ino or st.st_size < indexed_bytes):
+                # Replaced or rewritten - start over
+                self._drop_file(file_id)
+                file_id, indexed_bytes = None, 0
+            
+            if st.st_size > indexed_bytes:
+                added += self._index_file(Path(entry.path), entry.name, file_id, st.st_ino)
+        
+        for name in set(known) - seen:
+            self._drop_file(known[name][0])
+        
+        self.conn.commit()
+        return added
+    
+    def _session_files(self) -> List[os.DirEntry]:
+        """The *.jsonl files glob would find; none if the directory is missing."""
+        try:
+            with os.scandir(self.session_dir) as entries:
+                return [entry for entry in entries
+                        if entry.name.endswith('.jsonl') and not entry.name.startswith('.')
+                        and entry.is_file()]
+        except FileNotFoundError:
+            return []
+    
+    def _drop_file(self, file_id: int):
+        self.conn.execute(
+            'DELETE FROM entries_fts WHERE rowid IN (SELECT id FROM entries WHERE file_id = ?)', (file_id,)
+        )
+        self.conn.execute('DELETE FROM entries WHERE file_id = ?', (file_id,))
+        self.conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+    
+    def _index_file(self, path: Path, name: str, file_id: Optional[int], inode: int) -> int:
+        """Index complete lines appended since the last run."""
+        if file_id is None:
+            cursor = self.conn.execute(
+                'INSERT INTO files (name, inode, indexed_bytes, next_seq) VALUES (?, ?, 0, 0)',
+                (name, inode)
+            )
+            file_id = cursor.lastrowid
+        
+        offset, seq, last_entry = self.conn.execute(
+            'SELECT indexed_bytes, next_seq, last_entry FROM files WHERE id = ?', (file_id,)
+        ).fetchone()
+        prev_entry = json.loads(last_entry) if last_entry else None
+        
+        rows = []
+        fts_rows = []
+        next_id = self.conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM entries').fetchone()[0]
+        
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    # Partial line still being written - pick it up next time
+                    break
+                line_offset = offset
+                offset += len(raw)
+                
+                try:
+                    entry = json.loads(raw.decode('utf-8').strip())
+                except (UnicodeDecodeError, json.JSONDecodeError):
+                    continue
+                if not isinstance(entry, dict):
+                    continue
+                
+                content = self.query.extract_content(entry)
+                agent = self.query.match_agent(content)
+                intervention = self.query.is_intervention(entry, prev_entry)
+                
+                rows.append((next_id, file_id, seq, line_offset, len(raw),
+                             entry.get('type'), entry.get('userType'), entry.get('timestamp'),
+                             agent, int(intervention)))
+                fts_rows.append((next_id, content))
+                next_id += 1
+                seq += 1
+                prev_entry = entry
+        
+        self.conn.executemany('INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        self.conn.executemany('INSERT INTO entries_fts (rowid, content) VALUES (?, ?)', fts_rows)
+        self.conn.execute(
+            'UPDATE files SET indexed_bytes = ?, next_seq = ?, last_entry = ? WHERE id = ?',
+            (offset, seq, json.dumps(prev_entry) if prev_entry is not None else None, file_id)
+        )
+        return len(rows)
+    
+    # Querying
+    
+    def search(self,
+               pattern: Optional[str] = None,
+               entry_type: Optional[str] = None,
+               user_type: Optional[str] = None,
+               agent: Optional[str] = None,
+               interventions_only: bool = False) -> Iterator[Tuple[int, str, int, int, int, Optional[str], str]]:
+        """
+        Matching entries in file/line order.
+        
+        Yields:
+            (file_id, filename, seq, offset, length, agent, content)
+        """
+        # A scan caches the first agent matched among entries passing the type
+        # filters, so a result's agent is the earliest such match at or before it
+        detected = ['SELECT d.agent FROM entries d',
+                    'WHERE d.file_id = e.file_id AND d.seq <= e.seq AND d.agent IS NOT NULL']
+        filters = ['WHERE 1']
+        params: List[Any] = []
+        filter_params: List[Any] = []
+        
+        if entry_type:
+            detected.append('AND d.type = ?')
+            filters.append('AND e.type = ?')
+            params.append(entry_type)
+            filter_params.append(entry_type)
+        if user_type:
+            detected.append('AND d.user_type = ?')
+            filters.append('AND e.user_type = ?')
+            params.append(user_type)
+            filter_params.append(user_type)
+        detected.append('ORDER BY d.seq LIMIT 1')
+        
+        if interventions_only:
+            filters.append('AND e.intervention = 1')
+        if pattern:
+            literal = required_literal(pattern)
+            if literal:
+                # Narrow with the trigram index, then apply the real regex
+                filters.append('AND x.rowid IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)')
+                filter_params.append('"' + literal.replace('"', '""') + '"')
+            filters.append('AND x.content REGEXP ?')
+            filter_params.append(pattern)
+        
+        sql = ['SELECT * FROM (',
+               f'SELECT e.file_id, f.name, e.seq, e.offset, e.length, ({" ".join(detected)}) AS agent, x.content',
+               'FROM entries e JOIN files f ON f.id = e.file_id',
+               'JOIN entries_fts x ON x.rowid = e.id',
+               *filters, ')']
+        params.extend(filter_params)
+        if agent:
+            sql.append('WHERE agent = ?')
+            params.append(agent.upper())
+        
+        sql.append('ORDER BY name, seq')
+        yield from self.conn.execute(' '.join(sql), params)
+    
+    def window(self, file_id: int, start: int, end: int) -> List[Tuple[int, int, int, str]]:
+        """(seq, offset, length, content) for entries start..end of a file."""
+        return self.conn.execute(
+            'SELECT e.seq, e.offset, e.length, x.content FROM entries e '
+            'JOIN entries_fts x ON x.rowid = e.id '
+            'WHERE e.file_id = ? AND e.seq BETWEEN ? AND ? ORDER BY e.seq',
+            (file_id, start, end)
+        ).fetchall()
+    
+    def read_entry(self, filename: str, offset: int, length: int) -> Dict[str, Any]:
+        """Load one entry by seeking to its stored offset."""
+        # Results arrive grouped by file, so keep the last file open
+        if self._open_name != filename:
+            if self._open_file:
+                self._open_file.close()
+            self._open_file = open(self.session_dir / filename, 'rb')
+            self._open_name = filename
+        self._open_file.seek(offset)
+        return json.loads(self._open_file.read(length).decode('utf-8').strip())
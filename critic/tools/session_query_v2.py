@@ -2,9 +2,10 @@
 """
 Enhanced session query tool - v2 improvements based on usage experience.
 - No index dependency (works with any JSONL)
-- Context windows (before/after messages)
+- Context windows (before/after messages), streamed in constant memory
 - Better format handling
 - Specialized filters (interventions, questions, etc.)
+- Optional SQLite/FTS5 index (session_index.py) for fast repeated queries
 """
 
 import json
@@ -14,43 +15,50 @@ from pathlib import Path
 from datetime import datetime
 from typing import Iterator, Dict, Any, Optional, List, Tuple
 import re
+from collections import deque
+
+from session_index import SessionIndex, DEFAULT_INDEX_PATH, fts5_available
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(PROJECT_ROOT / 'era-1' / 'game'))
+from engine.agent_detector import IDENTITY, detector_for
+from engine.agent_registry import AgentRegistry
+
+# Agents without a workspace any more, still found in archived sessions
+HISTORICAL_AGENTS = ['admin', 'build', 'code']
 
 class SessionQueryV2:
-    def __init__(self, session_dir: str = "/home/daniel/prj/rtfw/nexus/sessions"):
+    def __init__(self, session_dir: str = "/home/daniel/prj/rtfw/nexus/sessions",
+                 index_path: Optional[str] = None):
         self.session_dir = Path(session_dir)
         self._agent_cache = {}
         
+        # Registered agents plus ones that only appear in older sessions
+        registry = AgentRegistry(PROJECT_ROOT, PROJECT_ROOT / '_sessions')
+        self.detector = detector_for(registry.all_agents() + HISTORICAL_AGENTS)
+        
+        # Index is optional - without it (or without FTS5) every query scans the files
+        self.index = None
+        if index_path and fts5_available():
+            self.index = SessionIndex(Path(index_path), self.session_dir, self)
+        
     def detect_agent(self, content: str, filename: str) -> Optional[str]:
         """Detect agent from content patterns or filename."""
         # Cache by filename to avoid repeated detection
         if filename in self._agent_cache:
             return self._agent_cache[filename]
-            
-        # More specific pattern detection - check for agent identity markers
-        agent_patterns = {
-            'NEXUS': [r'@NEXUS:', r'Read NEXUS\.md', r'NEXUS context', r'nexus/context\.md'],
-            'GOV': [r'@GOV:', r'Read GOV\.md', r'GOV context', r'gov/context\.md'],
-            'CRITIC': [r'@CRITIC:', r'Read CRITIC\.md', r'CRITIC context', r'critic/context\.md'],
-            'ERA-1': [r'@ERA-1:', r'Read ERA-1\.md', r'ERA-1 context', r'era-1/context\.md'],
-            'ADMIN': [r'@ADMIN:', r'admin/context\.md'],
-            'BUILD': [r'@BUILD:', r'Read BUILD\.md'],
-            'CODE': [r'@CODE:', r'Read CODE\.md']
-        }
         
-        # Count matches for each agent
-        agent_scores = {}
-        for agent, patterns in agent_patterns.items():
-            score = sum(1 for pattern in patterns if re.search(pattern, content))
-            if score > 0:
-                agent_scores[agent] = score
-        
-        # Return agent with highest score
-        if agent_scores:
-            best_agent = max(agent_scores.items(), key=lambda x: x[1])[0]
+        best_agent = self.match_agent(content)
+        if best_agent:
             self._agent_cache[filename] = best_agent
-            return best_agent
-                
-        return None
+        return best_agent
+    
+    def match_agent(self, content: str) -> Optional[str]:
+        """Best-scoring agent for a single piece of content (uncached)."""
+        # Needs an identity marker - @AGENT or AGENT.md mentions (any number of
+        # them) usually mean someone else is talking to or about the agent
+        match = self.detector.detect(content, min_weight=IDENTITY)
+        return match.agent.upper() if match else None
     
     def extract_content(self, entry: Dict[str, Any]) -> str:
         """Enhanced content extraction handling all formats."""
@@ -141,6 +149,11 @@ class SessionQueryV2:
                                    context_after: int = 0) -> Iterator[Tuple[List[Dict], int]]:
         """Stream entries with optional context window."""
         
+        if self.index:
+            yield from self._stream_from_index(pattern, entry_type, user_type, agent,
+                                               interventions_only, context_before, context_after)
+            return
+        
         pattern_re = re.compile(pattern, re.IGNORECASE) if pattern else None
         
         files = sorted(self.session_dir.glob("*.jsonl"))
@@ -148,57 +161,131 @@ class SessionQueryV2:
         for jsonl_file in files:
             filename = jsonl_file.name
             
-            # Load all entries from file for context access
-            entries = []
-            with open(jsonl_file, 'r') as f:
-                for line in f:
-                    try:
-                        entry = json.loads(line.strip())
-                        entries.append(entry)
-                    except json.JSONDecodeError:
-                        continue
+            # Streamed with bounded context: the last N entries for "before",
+            # and matches waiting for their "after" entries. Memory stays
+            # O(before + after) however large the file is.
+            recent = deque(maxlen=context_before)  # [entry, content or None]
+            waiting = deque()  # [context, highlight_idx, agent, entries still needed]
+            prev = None
             
-            # Process entries with context
-            for i, entry in enumerate(entries):
-                # Basic filters
-                if entry_type and entry.get('type') != entry_type:
-                    continue
-                if user_type and entry.get('userType') != user_type:
-                    continue
+            for i, entry in enumerate(self._iter_entries(jsonl_file)):
+                slot = [entry, None]
                 
-                # Content and agent detection
-                content = self.extract_content(entry)
-                detected_agent = self.detect_agent(content, filename)
-                
-                if agent and detected_agent != agent.upper():
-                    continue
-                
-                # Pattern filter
-                if pattern_re and not pattern_re.search(content):
-                    continue
+                # Feed trailing context to earlier matches (they complete in order)
+                for pending in waiting:
+                    pending[0].append(slot)
+                    pending[3] -= 1
+                while waiting and waiting[0][3] == 0:
+                    yield self._annotate(filename, *waiting.popleft()[:3])
                 
-                # Intervention filter
-                if interventions_only:
-                    prev = entries[i-1] if i > 0 else None
-                    if not self.is_intervention(entry, prev):
-                        continue
+                match = self._match_entry(entry, prev, filename, pattern_re, entry_type,
+                                          user_type, agent, interventions_only)
+                prev = entry
                 
-                # Add metadata
-                entry['_file'] = filename
-                entry['_agent'] = detected_agent
-                entry['_content'] = content
-                entry['_index'] = i
+                if match:
+                    content, detected_agent = match
+                    slot[1] = content
+                    context = list(recent) + [slot]
+                    match_entry = dict(entry, _index=i)
+                    context[-1] = [match_entry, content]
+                    highlight_idx = len(context) - 1
+                    
+                    if context_after > 0:
+                        waiting.append([context, highlight_idx, detected_agent, context_after])
+                    else:
+                        yield self._annotate(filename, context, highlight_idx, detected_agent)
                 
-                # Get context window if requested
-                if context_before > 0 or context_after > 0:
-                    context = self.get_context_window(entries, i, context_before, context_after)
-                    for ctx_entry in context:
-                        ctx_entry['_file'] = filename
-                        ctx_entry['_agent'] = detected_agent
-                        ctx_entry['_content'] = self.extract_content(ctx_entry)
-                    yield (context, i - max(0, i - context_before))
-                else:
-                    yield ([entry], 0)
+                if context_before > 0:
+                    recent.append(slot)
+            
+            # End of file: remaining matches get whatever trailing context exists
+            while waiting:
+                yield self._annotate(filename, *waiting.popleft()[:3])
+    
+    def _iter_entries(self, jsonl_file: Path) -> Iterator[Dict[str, Any]]:
+        """Parse a JSONL file one line at a time, skipping bad lines."""
+        with open(jsonl_file, 'r') as f:
+            for line in f:
+                try:
+                    yield json.loads(line.strip())
+                except json.JSONDecodeError:
+                    continue
+    
+    def _match_entry(self, entry: Dict[str, Any], prev: Optional[Dict[str, Any]], filename: str,
+                     pattern_re: Optional[re.Pattern], entry_type: Optional[str],
+                     user_type: Optional[str], agent: Optional[str],
+                     interventions_only: bool) -> Optional[Tuple[str, Optional[str]]]:
+        """Apply the query filters to one entry; (content, agent) if it matches."""
+        # Basic filters
+        if entry_type and entry.get('type') != entry_type:
+            return None
+        if user_type and entry.get('userType') != user_type:
+            return None
+        
+        # Content and agent detection
+        content = self.extract_content(entry)
+        detected_agent = self.detect_agent(content, filename)
+        
+        if agent and detected_agent != agent.upper():
+            return None
+        
+        # Pattern filter
+        if pattern_re and not pattern_re.search(content):
+            return None
+        
+        # Intervention filter
+        if interventions_only and not self.is_intervention(entry, prev):
+            return None
+        
+        return content, detected_agent
+    
+    def _annotate(self, filename: str, context: List[list], highlight_idx: int,
+                  detected_agent: Optional[str]) -> Tuple[List[Dict], int]:
+        """
+        Build the yielded context list.
+        
+        Entries are shallow copies with _file/_agent/_content added, so the
+        buffered originals are never mutated and can be dropped freely.
+        """
+        result = []
+        for slot in context:
+            entry, content = slot
+            if content is None:
+                content = slot[1] = self.extract_content(entry)
+            result.append(dict(entry, _file=filename, _agent=detected_agent, _content=content))
+        return (result, highlight_idx)
+
+    def _stream_from_index(self,
+                           pattern: Optional[str],
+                           entry_type: Optional[str],
+                           user_type: Optional[str],
+                           agent: Optional[str],
+                           interventions_only: bool,
+                           context_before: int,
+                           context_after: int) -> Iterator[Tuple[List[Dict], int]]:
+        """Same results as the file scan, answered from the index."""
+        self.index.refresh()
+        
+        for file_id, filename, seq, offset, length, detected_agent, content in self.index.search(
+                pattern, entry_type, user_type, agent, interventions_only):
+            entry = self.index.read_entry(filename, offset, length)
+            entry['_file'] = filename
+            entry['_agent'] = detected_agent
+            entry['_content'] = content
+            entry['_index'] = seq
+            
+            if context_before > 0 or context_after > 0:
+                context = []
+                for ctx_seq, ctx_offset, ctx_length, ctx_content in self.index.window(
+                        file_id, seq - context_before, seq + context_after):
+                    ctx_entry = entry if ctx_seq == seq else self.index.read_entry(filename, ctx_offset, ctx_length)
+                    ctx_entry['_file'] = filename
+                    ctx_entry['_agent'] = detected_agent
+                    ctx_entry['_content'] = ctx_content
+                    context.append(ctx_entry)
+                yield (context, seq - max(0, seq - context_before))
+            else:
+                yield ([entry], 0)
 
 def format_entry_enhanced(entry: Dict[str, Any], highlight: bool = False) -> str:
     """Enhanced formatting with better structure."""
@@ -241,9 +328,14 @@ def main():
     parser.add_argument('--format', choices=['text', 'json', 'stats'], default='text')
     parser.add_argument('--limit', type=int, help='Limit number of results')
     
+    # Index options
+    parser.add_argument('--index', default=str(DEFAULT_INDEX_PATH),
+                        help='SQLite index file (built/updated incrementally before each query)')
+    parser.add_argument('--no-index', action='store_true', help='Scan session files directly')
+    
     args = parser.parse_args()
     
-    query = SessionQueryV2()
+    query = SessionQueryV2(index_path=None if args.no_index else args.index)
     
     count = 0
     stats = {'agents': {}, 'types': {}, 'files': set()}
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Cross-session token/cost rollup for capacity planning.
+
+Each session file's usage is ingested once into a SQLite store of hourly
+buckets per session file: operations, tokens by type, cost, max context,
+clears and logouts. Day, agent and total figures are sums over those
+buckets, so one table answers every report.
+
+Refreshing only reads what was appended since the last run (the parsed
+rows come from the shared session cache). A replaced or truncated file is
+re-ingested. Files that disappear keep their history - archived sessions
+still count towards spend.
+
+    python usage_rollup.py                     # per-day totals, all agents
+    python usage_rollup.py --by hour --agent GOV --since 2025-06-01
+    python usage_rollup.py --by agent --format json
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from context_window_tracker import is_clear_event, operation_rows
+from session_cache import DEFAULT_CACHE_DIR, load_session
+from session_query_v2 import SessionQueryV2
+
+DEFAULT_ROLLUP_PATH = Path(__file__).parent / '.usage_rollup.db'
+
+DEFAULT_SESSION_DIR = "/home/daniel/prj/rtfw/nexus/sessions"
+
+SCHEMA_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    rows INTEGER NOT NULL,
+    last_hour TEXT,
+    agent TEXT
+);
+CREATE TABLE IF NOT EXISTS hourly (
+    file_id INTEGER NOT NULL,
+    hour TEXT NOT NULL,
+    operations INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    cache_creation_tokens INTEGER NOT NULL,
+    cache_read_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cost_usd REAL NOT NULL,
+    max_context INTEGER NOT NULL,
+    clears INTEGER NOT NULL,
+    logouts INTEGER NOT NULL,
+    PRIMARY KEY (file_id, hour)
+);
+"""
+
+# Summed measures, in hourly column order (max_context is combined with MAX)
+SUM_COLUMNS = ('operations', 'input_tokens', 'cache_creation_tokens', 'cache_read_tokens',
+               'output_tokens', 'cost_usd')
+COUNT_COLUMNS = ('clears', 'logouts')
+MEASURES = SUM_COLUMNS + ('max_context',) + COUNT_COLUMNS
+
+# Grouping key for each report period ('hour' values are 'YYYY-MM-DDTHH')
+PERIODS = {
+    'hour': 'h.hour',
+    'day': 'substr(h.hour, 1, 10)',
+    'agent': "COALESCE(f.agent, 'UNKNOWN')",
+    'total': "'all'",
+}
+
+# An agent choosing to log out (same key the engine's state parser reads)
+LOGOUT_RE = re.compile(r'next_state:\s*logout\b', re.IGNORECASE)
+
+
+class UsageRollup:
+    """Incrementally maintained hourly usage aggregates for a session directory."""
+    
+    def __init__(self, db_path: Path = DEFAULT_ROLLUP_PATH,
+                 session_dir: Path = Path(DEFAULT_SESSION_DIR),
+                 cache_dir: Optional[Path] = DEFAULT_CACHE_DIR):
+        self.db_path = Path(db_path)
+        self.session_dir = Path(session_dir)
+        self.cache_dir = cache_dir
+        self._matcher = SessionQueryV2(str(self.session_dir))
+        
+        self.conn = sqlite3.connect(str(self.db_path))
+        self._ensure_schema()
+    
+    def _ensure_schema(self):
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        if version != SCHEMA_VERSION:
+            self.conn.executescript("""
+                DROP TABLE IF EXISTS files;
+                DROP TABLE IF EXISTS hourly;
+            """)
+        self.conn.executescript(SCHEMA)
+        self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.commit()
+    
+    def close(self):
+        self.conn.close()
+    
+    # Ingesting
+    
+    def refresh(self) -> int:
+        """
+        Ingest whatever the session directory gained since the last refresh.
+        
+        Unchanged files cost one stat; grown files only contribute their new
+        rows; replaced or truncated files are ingested again from scratch.
+        
+        Returns:
+            Number of rows ingested
+        """
+        known = {name: (file_id, inode, size)
+                 for file_id, name, inode, size
+                 in self.conn.execute('SELECT id, name, inode, size FROM files')}
+        added = 0
+        
+        with os.scandir(self.session_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.jsonl') or not entry.is_file():
+                    continue
+                st = entry.stat()
+                
+                file_id, inode, size = known.get(entry.name, (None, None, 0))
+                if file_id is not None and (inode != st.st_ino or st.st_size < size):
+                    # Replaced or rewritten - start over
+                    self._drop_file(file_id)
+                    file_id = None
+                elif file_id is not None and st.st_size == size:
+                    continue
+                
+                added += self._ingest_file(Path(entry.path), entry.name, file_id, st.st_ino, st.st_size)
+        
+        self.conn.commit()
+        return added
+    
+    def _drop_file(self, file_id: int):
+        self.conn.execute('DELETE FROM hourly WHERE file_id = ?', (file_id,))
+        self.conn.execute('DELETE FROM files WHERE id = ?', (file_id,))
+    
+    def _ingest_file(self, path: Path, name: str, file_id: Optional[int], inode: int, size: int) -> int:
+        """Add the rows appended since the last ingest to the hourly buckets."""
+        if file_id is None:
+            cursor = self.conn.execute(
+                'INSERT INTO files (name, inode, size, rows) VALUES (?, ?, 0, 0)', (name, inode)
+            )
+            file_id = cursor.lastrowid
+        
+        start, hour, agent = self.conn.execute(
+            'SELECT rows, last_hour, agent FROM files WHERE id = ?', (file_id,)
+        ).fetchone()
+        columns = load_session(path, self.cache_dir)
+        
+        buckets: Dict[str, List[Any]] = {}
+        operations = set(operation_rows(columns))
+        for row in range(start, len(columns)):
+            # Rows without a timestamp belong to the hour of the row before
+            timestamp = columns.timestamp[row]
+            if timestamp:
+                hour = timestamp[:13]
+            if agent is None and columns.type[row] in ('user', 'assistant'):
+                # The file's agent is the first one detected (as detect_agent caches)
+                agent = self._matcher.match_agent(columns.text[row])
+            if hour is None:
+                continue
+            
+            bucket = buckets.get(hour)
+            if bucket is None:
+                bucket = buckets[hour] = [0] * len(MEASURES)
+            
+            if row in operations:
+                bucket[0] += 1
+                bucket[1] += columns.input_tokens[row]
+                bucket[2] += columns.cache_creation_tokens[row]
+                bucket[3] += columns.cache_read_tokens[row]
+                bucket[4] += columns.output_tokens[row]
+                bucket[5] += columns.cost_usd[row]
+                # Context size = cache reads + cache writes (as context_window_tracker)
+                bucket[6] = max(bucket[6], columns.cache_read_tokens[row] + columns.cache_creation_tokens[row])
+                if LOGOUT_RE.search(columns.text[row]):
+                    bucket[8] += 1
+            elif is_clear_event(columns, row):
+                bucket[7] += 1
+        
+        updates = ', '.join([f'{name} = {name} + excluded.{name}' for name in SUM_COLUMNS + COUNT_COLUMNS] +
+                            ['max_context = MAX(max_context, excluded.max_context)'])
+        self.conn.executemany(
+            f"INSERT INTO hourly (file_id, hour, {', '.join(MEASURES)}) "
+            f"VALUES (?, ?, {', '.join('?' * len(MEASURES))}) "
+            f"ON CONFLICT (file_id, hour) DO UPDATE SET {updates}",
+            [(file_id, bucket_hour, *values) for bucket_hour, values in buckets.items()]
+        )
+        self.conn.execute(
+            'UPDATE files SET inode = ?, size = ?, rows = ?, last_hour = ?, agent = ? WHERE id = ?',
+            (inode, size, len(columns), hour, agent, file_id)
+        )
+        return len(columns) - start
+    
+    # Querying
+    
+    def query(self,
+              by: str = 'day',
+              agent: Optional[str] = None,
+              since: Optional[str] = None,
+              until: Optional[str] = None,
+              split_agents: bool = False) -> List[Dict[str, Any]]:
+        """
+        Aggregated usage, one dict per period.
+        
+        Args:
+            by: 'hour', 'day', 'agent' or 'total'
+            agent: Only this agent's sessions
+            since/until: Inclusive bounds, compared as prefixes of the
+                hour key ('2025-06-01' or '2025-06-01T09')
+            split_agents: Also group by agent within each period
+        
+        Returns:
+            Dicts with 'period' (and 'agent' when split), 'sessions' and
+            every measure, ordered by period
+        """
+        if by not in PERIODS:
+            raise ValueError(f"Unknown period {by!r} (expected one of {', '.join(PERIODS)})")
+        
+        keys = [f'{PERIODS[by]} AS period']
+        group = ['period']
+        if split_agents and by != 'agent':
+            keys.append("COALESCE(f.agent, 'UNKNOWN') AS agent")
+            group.append('agent')
+        
+        measures = [f'SUM(h.{name})' for name in SUM_COLUMNS] + ['MAX(h.max_context)'] + \
+                   [f'SUM(h.{name})' for name in COUNT_COLUMNS]
+        sql = [f"SELECT {', '.join(keys)}, COUNT(DISTINCT h.file_id), {', '.join(measures)}",
+               'FROM hourly h JOIN files f ON f.id = h.file_id',
+               'WHERE 1']
+        params: List[Any] = []
+        
+        if agent:
+            sql.append('AND f.agent = ?')
+            params.append(agent.upper())
+        if since:
+            sql.append('AND h.hour >= ?')
+            params.append(since[:13])
+        if until:
+            # Compare prefixes so '2025-06-01' includes every hour of that day
+            sql.append('AND substr(h.hour, 1, ?) <= ?')
+            params.extend([len(until[:13]), until[:13]])
+        
+        sql.append(f"GROUP BY {', '.join(group)} ORDER BY {', '.join(group)}")
+        
+        names = [key.rsplit(' AS ', 1)[1] for key in keys] + ['sessions'] + list(MEASURES)
+        return [dict(zip(names, row)) for row in self.conn.execute(' '.join(sql), params)]
+
+
+def format_table(rows: List[Dict[str, Any]]) -> str:
+    """Plain-text report of query() results."""
+    if not rows:
+        return "No usage recorded"
+    
+    split = 'agent' in rows[0]
+    header = f"{'Period':<14} " + (f"{'Agent':<8} " if split else '') + \
+             f"{'Sess':>5} {'Ops':>7} {'Input':>9} {'CacheWrite':>12} {'CacheRead':>14} " \
+             f"{'Output':>10} {'Cost':>11} {'MaxCtx':>9} {'Clears':>6} {'Logouts':>7}"
+    lines = [header, '-' * len(header)]
+    lines.extend(_format_row(row, split) for row in rows)
+    if len(rows) > 1:
+        lines.append('-' * len(header))
+        lines.append(_format_row(_totals(rows), split))
+    return '\n'.join(lines)
+
+
+def _format_row(row: Dict[str, Any], split: bool) -> str:
+    return (f"{str(row['period']):<14} " + (f"{str(row.get('agent', '')):<8} " if split else '') +
+            f"{row['sessions']:>5} {row['operations']:>7,} {row['input_tokens']:>9,} "
+            f"{row['cache_creation_tokens']:>12,} {row['cache_read_tokens']:>14,} "
+            f"{row['output_tokens']:>10,} {'$' + format(row['cost_usd'], ',.4f'):>11} "
+            f"{row['max_context']:>9,} {row['clears']:>6} {row['logouts']:>7}")
+
+
+def _totals(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    totals = {'period': 'TOTAL', 'agent': '', 'sessions': sum(row['sessions'] for row in rows)}
+    for name in SUM_COLUMNS + COUNT_COLUMNS:
+        totals[name] = sum(row[name] for row in rows)
+    totals['max_context'] = max(row['max_context'] for row in rows)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Token/cost rollup across all sessions')
+    parser.add_argument('session_dir', nargs='?', default=DEFAULT_SESSION_DIR,
+                        help='Directory of session .jsonl files')
+    parser.add_argument('--by', choices=list(PERIODS), default='day', help='Report period (default: day)')
+    parser.add_argument('--agent', help='Only this agent')
+    parser.add_argument('--split-agents', action='store_true', help='Break each period down by agent')
+    parser.add_argument('--since', help='Start (YYYY-MM-DD or YYYY-MM-DDTHH, inclusive)')
+    parser.add_argument('--until', help='End (YYYY-MM-DD or YYYY-MM-DDTHH, inclusive)')
+    parser.add_argument('--format', choices=['text', 'json'], default='text')
+    parser.add_argument('--db', default=str(DEFAULT_ROLLUP_PATH), help='Rollup database file')
+    parser.add_argument('--no-refresh', action='store_true', help="Report without ingesting new usage")
+    args = parser.parse_args()
+    
+    session_dir = Path(args.session_dir)
+    if not args.no_refresh and not session_dir.is_dir():
+        print(f"Session directory not found: {session_dir}")
+        sys.exit(1)
+    
+    rollup = UsageRollup(Path(args.db), session_dir)
+    try:
+        if not args.no_refresh:
+            rollup.refresh()
+        rows = rollup.query(by=args.by, agent=args.agent, since=args.since, until=args.until,
+                            split_agents=args.split_agents)
+    finally:
+        rollup.close()
+    
+    if args.format == 'json':
+        print(json.dumps(rows, indent=2))
+    else:
+        print(format_table(rows))
+
+
+if __name__ == '__main__':
+    main()
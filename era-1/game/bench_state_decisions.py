@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: state decision extraction, scanner vs. the old regex parser
+
+Collects assistant messages from session files (default: the project's
+_sessions/ directory), runs both implementations over each message and
+reports time per message plus any messages where the results differ.
+A few synthetic worst cases (long code output, unbalanced fences) are
+always included.
+
+Expected differences: the scanner parses hyphenated states (deep-work,
+direct-io), and only reads thread/max_tokens/last_read_commit from the
+lines around its next_state:, so fields from unrelated code in the same
+message no longer leak in.
+
+Usage:
+    python bench_state_decisions.py [session files or dirs...] [--repeat N]
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from engine.decision_scanner import STATE_NAMES, scan_state_decision
+from engine.jsonl_parser import JSONLParser
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+class LegacyDecisionParser:
+    """The regex-per-block parser JSONLParser used before decision_scanner"""
+    
+    def __init__(self):
+        self.state_patterns = {
+            'code_block': re.compile(r'```\s*\n?(.*?)\n?```', re.DOTALL),
+            'state_key': re.compile(r'next_state:\s*(\w+)', re.IGNORECASE),
+            'thread_key': re.compile(r'thread:\s*([^\n,]+?)(?:\n|,|$)', re.IGNORECASE),
+            'tokens_key': re.compile(r'max_tokens:\s*(\d+)', re.IGNORECASE),
+            'commit_key': re.compile(r'(?:last_read_commit|last_read):\s*([a-f0-9]{7,40})', re.IGNORECASE),
+        }
+    
+    def extract(self, content: str) -> Optional[Tuple]:
+        for block in self.state_patterns['code_block'].findall(content):
+            decision = self._parse_state_block(block)
+            if decision:
+                return decision
+        return self._parse_state_block(content)
+    
+    def _parse_state_block(self, text: str) -> Optional[Tuple]:
+        state_match = self.state_patterns['state_key'].search(text)
+        if not state_match:
+            return None
+        state = STATE_NAMES.get(state_match.group(1).lower())
+        if not state:
+            return None
+        
+        thread_match = self.state_patterns['thread_key'].search(text)
+        tokens_match = self.state_patterns['tokens_key'].search(text)
+        commit_match = self.state_patterns['commit_key'].search(text)
+        return (state,
+                thread_match.group(1).strip() if thread_match else None,
+                int(tokens_match.group(1)) if tokens_match else None,
+                commit_match.group(1) if commit_match else None)
+
+
+def scanner_extract(content: str) -> Optional[Tuple]:
+    result = scan_state_decision(content)
+    if not result:
+        return None
+    decision = result[0]
+    return decision.next_state, decision.thread, decision.max_tokens, decision.last_read_commit
+
+
+def collect_messages(paths: List[Path]) -> List[str]:
+    """Text of every assistant message in the given session files"""
+    parser = JSONLParser()
+    files = []
+    for path in paths:
+        if path.is_dir():
+            files.extend(sorted(path.glob('*.jsonl')))
+        elif path.exists():
+            files.append(path)
+    
+    messages = []
+    for file_path in files:
+        with open(file_path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                message = entry.get('message') if isinstance(entry, dict) else None
+                if isinstance(message, dict) and message.get('role') == 'assistant':
+                    text = parser._assistant_text(message)
+                    if text:
+                        messages.append(text)
+    return messages
+
+
+def synthetic_messages() -> List[Tuple[str, str]]:
+    """(label, message) worst cases"""
+    code = ''.join(f"    result_{i} = compute(value_{i}, key='thread: {i}')  # next_state handling\n"
+                   for i in range(600))
+    decision = "```\nnext_state: deep_work\nthread: engine-perf\nmax_tokens: 50000\nlast_read_commit: 4f35643\n```\n"
+    return [
+        ('40KB code, decision last', f"Done.\n```python\n{code}```\n\n{decision}"),
+        ('40KB code, unbalanced fences', f"```python\n{code}\n" + "``` " * 200 + f"\n{decision}"),
+        ('40KB prose, no decision', "Lorem ipsum dolor sit amet. " * 1500),
+        ('many small blocks', ("```\nx = 1\n```\ntext\n" * 800) + decision),
+    ]
+
+
+def bench(fn, messages: List[str], repeat: int) -> float:
+    """Best-of-repeat seconds to process every message once"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            fn(message)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark state decision extraction')
+    parser.add_argument('paths', nargs='*', type=Path, default=[PROJECT_ROOT / '_sessions'],
+                        help='Session .jsonl files or directories (default: _sessions/)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per case (best is reported)')
+    args = parser.parse_args()
+    
+    legacy = LegacyDecisionParser()
+    cases = [(label, [message]) for label, message in synthetic_messages()]
+    
+    messages = collect_messages(args.paths)
+    if messages:
+        cases.insert(0, (f"{len(messages)} session messages", messages))
+    else:
+        print("No session messages found - synthetic cases only\n")
+    
+    print(f"{'Case':<32} {'Legacy':>12} {'Scanner':>12} {'Speedup':>8}")
+    print('-' * 67)
+    for label, case_messages in cases:
+        old = bench(legacy.extract, case_messages, args.repeat)
+        new = bench(scanner_extract, case_messages, args.repeat)
+        print(f"{label:<32} {old * 1000:>10.2f}ms {new * 1000:>10.2f}ms {old / new if new else 0:>7.1f}x")
+    
+    # Where the two disagree (the scanner reads fields from the decision's own lines)
+    differences = [message for _, case_messages in cases for message in case_messages
+                   if legacy.extract(message) != scanner_extract(message)]
+    print(f"\nDiffering results: {len(differences)}")
+    for message in differences[:5]:
+        print(f"  legacy:  {legacy.extract(message)}")
+        print(f"  scanner: {scanner_extract(message)}")
+
+
+if __name__ == '__main__':
+    main()
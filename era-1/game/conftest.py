@@ -0,0 +1,61 @@
+"""
+Shared pytest fixtures for the era-1/game tests
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+# Manual run script against the real project, not a pytest module
+collect_ignore = ['test_engine.py']
+
+AGENTS = ('critic', 'era-1', 'gov', 'nexus')
+
+
+def git(root: Path, *args: str) -> str:
+    env = dict(os.environ, GIT_AUTHOR_NAME='test', GIT_AUTHOR_EMAIL='test@example.com',
+               GIT_COMMITTER_NAME='test', GIT_COMMITTER_EMAIL='test@example.com')
+    result = subprocess.run(['git', *args], cwd=root, env=env, check=True,
+                            capture_output=True, text=True)
+    return result.stdout.strip()
+
+
+def commit(root: Path, message: str) -> str:
+    """Empty commit with message, returns its full hash"""
+    git(root, 'commit', '-q', '--allow-empty', '-m', message)
+    return git(root, 'rev-parse', 'HEAD')
+
+
+def session_entry(text: str, tokens: int = 100) -> str:
+    return json.dumps({
+        'timestamp': '2025-06-01T00:00:00Z',
+        'message': {'role': 'assistant', 'content': [{'type': 'text', 'text': text}],
+                    'usage': {'input_tokens': tokens, 'output_tokens': 5}},
+    }) + '\n'
+
+
+@pytest.fixture
+def project(tmp_path):
+    """
+    Git project with agent workspaces and _sessions/<AGENT>_current.jsonl
+    symlinks, one assistant message per session
+    """
+    root = tmp_path / 'project'
+    sessions = root / '_sessions'
+    sessions.mkdir(parents=True)
+    git(root, 'init', '-q')
+    for agent in AGENTS:
+        (root / agent).mkdir()
+        (root / agent / 'notes.md').write_text('notes\n')
+        (sessions / f'{agent}-s1.jsonl').write_text(session_entry(f'I am {agent.upper()}'))
+        (sessions / f'{agent.upper()}_current.jsonl').symlink_to(f'{agent}-s1.jsonl')
+    git(root, 'add', '-A')
+    commit(root, '@GOV: init')
+    return root
@@ -0,0 +1,131 @@
+"""
+Agent Detector - Recognise which agent a piece of session text belongs to
+
+Every agent gets the same set of identity markers ("Read GOV.md",
+"@GOV:", "I am GOV", "gov/context.md", ...). Each marker contains the
+agent's name, so the detector searches the text for agent names only and
+checks the few bytes around each hit against the marker templates. Text
+without agent names costs one fast substring search per name, which in
+CPython beats both a big alternation regex and a pure-Python automaton.
+
+Each distinct marker found adds its weight to its agent's score; the best
+score wins and its share of all scores is the confidence. Callers that
+only trust identity markers ask for min_weight=IDENTITY, which ignores
+agents found through mentions alone however many there are.
+
+Detectors are built from agent names (normally the AgentRegistry's) and
+cached per name set, so callers can ask for one on every use.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+# Markers per agent: (template, weight). {U} = AGENT, {l} = agent.
+# Identity markers name the agent as itself; mentions could come from
+# another agent addressing it, so they count for less.
+IDENTITY = 2
+MENTION = 1
+
+MARKERS: Tuple[Tuple[str, int], ...] = (
+    ('Read {U}.md', IDENTITY),
+    ('bootstrap protocol for @{U}', IDENTITY),
+    ('@{U}:', IDENTITY),
+    ('I am {U}', IDENTITY),
+    ("I'm {U}", IDENTITY),
+    ('{U} context', IDENTITY),
+    ('{l}/context.md', IDENTITY),
+    ('agent/{l}/', IDENTITY),
+    ('@{U}', MENTION),
+    ('{U}.md', MENTION),
+)
+
+
+@dataclass(frozen=True)
+class AgentMatch:
+    """Detection result"""
+    agent: str          # Lowercase agent name
+    score: int          # Sum of weights of distinct markers found
+    confidence: float   # score / all agents' scores (1.0 = unambiguous)
+
+
+class AgentDetector:
+    """
+    Multi-agent marker matcher anchored on agent names
+    
+    Usage:
+        detector = detector_for(registry.all_agents())
+        match = detector.detect(text)  # AgentMatch or None
+    """
+    
+    def __init__(self, agents: Iterable[str]):
+        self.agents: List[str] = sorted({agent.lower() for agent in agents})
+        
+        # Name as it appears in text -> [(text before, text after, agent, marker index, weight)]
+        self._anchors: Dict[str, List[Tuple[str, str, str, int, int]]] = {}
+        for agent in self.agents:
+            for index, (template, weight) in enumerate(MARKERS):
+                form, name = ('{U}', agent.upper()) if '{U}' in template else ('{l}', agent)
+                before, after = template.split(form)
+                self._anchors.setdefault(name, []).append((before, after, agent, index, weight))
+    
+    def scores(self, text: str) -> Dict[str, int]:
+        """Score of every agent with at least one marker in text"""
+        scores: Dict[str, int] = {}
+        for agent, _, weight in self._markers(text):
+            scores[agent] = scores.get(agent, 0) + weight
+        return scores
+    
+    def _markers(self, text: str) -> Set[Tuple[str, int, int]]:
+        """Distinct (agent, marker index, weight) found in text"""
+        found = set()
+        if not text:
+            return found
+        
+        for name, templates in self._anchors.items():
+            pos = text.find(name)
+            while pos != -1:
+                end = pos + len(name)
+                for before, after, agent, index, weight in templates:
+                    if (pos >= len(before) and text.startswith(before, pos - len(before))
+                            and text.startswith(after, end)):
+                        found.add((agent, index, weight))
+                pos = text.find(name, end)
+        return found
+    
+    def detect(self, text: str, min_weight: int = MENTION) -> Optional[AgentMatch]:
+        """
+        Best-scoring agent for text
+        
+        Args:
+            text: Content to scan
+            min_weight: Agents need at least one marker this strong to be
+                picked (IDENTITY ignores agents that are only mentioned)
+        
+        Returns:
+            AgentMatch, or None if no agent has a strong enough marker
+        """
+        scores: Dict[str, int] = {}
+        strongest: Dict[str, int] = {}
+        for agent, _, weight in self._markers(text):
+            scores[agent] = scores.get(agent, 0) + weight
+            strongest[agent] = max(strongest.get(agent, 0), weight)
+        
+        candidates = [agent for agent in scores if strongest[agent] >= min_weight]
+        if not candidates:
+            return None
+        
+        # Highest score, ties to the first agent alphabetically
+        agent = min(candidates, key=lambda name: (-scores[name], name))
+        return AgentMatch(agent, scores[agent], scores[agent] / sum(scores.values()))
+
+
+@lru_cache(maxsize=8)
+def _cached_detector(agents: FrozenSet[str]) -> AgentDetector:
+    return AgentDetector(agents)
+
+
+def detector_for(agents: Iterable[str]) -> AgentDetector:
+    """Shared detector for a set of agent names (built once per set)"""
+    return _cached_detector(frozenset(agent.lower() for agent in agents))
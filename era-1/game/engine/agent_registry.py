@@ -0,0 +1,203 @@
+"""
+Agent Registry - Discovers agents instead of hard-coding them
+
+Agents are found from two places:
+- _sessions/<AGENT>_current.jsonl symlinks (agents the engine can monitor)
+- <agent>/_state.md workspace directories under the project root
+
+Results are cached. refresh() only rescans a directory when its mtime
+changed, and only re-checks a top-level directory when its own mtime
+changed (a _state.md created or removed inside it). Watchers can feed
+individual changed entries through update_session_entry() /
+update_workspace_entry(), so a refresh costs one stat per top-level
+directory plus O(changed entries).
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+
+class AgentRegistry:
+    """
+    Cached view of which agents exist
+    
+    Agent names are lowercase workspace names (e.g. 'era-1'); symlinks use
+    the uppercase form (ERA-1_current.jsonl).
+    """
+    
+    SYMLINK_SUFFIX = '_current.jsonl'
+    STATE_FILE = '_state.md'
+    
+    def __init__(self, project_root: Path, sessions_dir: Path):
+        self.project_root = project_root
+        self.sessions_dir = sessions_dir
+        
+        # agent_name -> symlink filename
+        self._session_agents: Dict[str, str] = {}
+        # Agent workspaces containing _state.md
+        self._workspace_agents: Set[str] = set()
+        
+        # Directory mtimes at last full scan (None = never scanned)
+        self._sessions_mtime: Optional[int] = None
+        self._root_mtime: Optional[int] = None
+        # Candidate workspace directory -> mtime when last checked
+        self._dir_mtimes: Dict[str, Optional[int]] = {}
+        
+        self._lock = threading.Lock()
+        self.refresh()
+    
+    @classmethod
+    def symlink_name(cls, agent_name: str) -> str:
+        """Session symlink filename for an agent"""
+        return f"{agent_name.upper()}{cls.SYMLINK_SUFFIX}"
+    
+    @classmethod
+    def agent_from_symlink(cls, filename: str) -> Optional[str]:
+        """Agent name for a session symlink filename, None if not one"""
+        if not filename.endswith(cls.SYMLINK_SUFFIX):
+            return None
+        name = filename[:-len(cls.SYMLINK_SUFFIX)]
+        return name.lower() if name else None
+    
+    # Queries
+    
+    @property
+    def session_agents(self) -> Dict[str, str]:
+        """agent_name -> symlink filename, for agents with a session symlink"""
+        with self._lock:
+            return dict(sorted(self._session_agents.items()))
+    
+    @property
+    def workspace_agents(self) -> List[str]:
+        """Agents with a <agent>/_state.md workspace"""
+        with self._lock:
+            return sorted(self._workspace_agents)
+    
+    def all_agents(self) -> List[str]:
+        """Every known agent, from either source"""
+        with self._lock:
+            return sorted(set(self._session_agents) | self._workspace_agents)
+    
+    def is_agent(self, name: str) -> bool:
+        with self._lock:
+            return name in self._session_agents or name in self._workspace_agents
+    
+    # Refresh
+    
+    def refresh(self) -> bool:
+        """
+        Rescan any directory whose mtime changed since the last scan
+        
+        Entry creation, removal and renames (including symlink retargets)
+        change a directory's mtime; appends to files don't.
+        
+        Returns:
+            True if the set of agents changed
+        """
+        changed = False
+        
+        sessions_mtime = self._mtime(self.sessions_dir)
+        if sessions_mtime != self._sessions_mtime:
+            changed |= self._scan_sessions()
+            self._sessions_mtime = sessions_mtime
+        
+        root_mtime = self._mtime(self.project_root)
+        if root_mtime != self._root_mtime:
+            changed |= self._scan_workspaces()
+            self._root_mtime = root_mtime
+        else:
+            # _state.md created or removed inside an existing directory
+            for name, mtime in list(self._dir_mtimes.items()):
+                dir_mtime = self._mtime(self.project_root / name)
+                if dir_mtime != mtime:
+                    self._dir_mtimes[name] = dir_mtime
+                    changed |= self.update_workspace_entry(name)
+        
+        return changed
+    
+    def _mtime(self, path: Path) -> Optional[int]:
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _scan_sessions(self) -> bool:
+        found = {}
+        try:
+            with os.scandir(self.sessions_dir) as entries:
+                for entry in entries:
+                    agent = self.agent_from_symlink(entry.name)
+                    if agent and entry.is_symlink():
+                        found[agent] = entry.name
+        except OSError:
+            pass
+        
+        with self._lock:
+            changed = found != self._session_agents
+            self._session_agents = found
+        return changed
+    
+    def _scan_workspaces(self) -> bool:
+        found = set()
+        dir_mtimes = {}
+        try:
+            with os.scandir(self.project_root) as entries:
+                for entry in entries:
+                    if entry.name.startswith(('.', '_')) or not entry.is_dir():
+                        continue
+                    dir_mtimes[entry.name] = self._mtime(entry.path)
+                    if self._is_workspace(entry.name):
+                        found.add(entry.name)
+        except OSError:
+            pass
+        self._dir_mtimes = dir_mtimes
+        
+        with self._lock:
+            changed = found != self._workspace_agents
+            self._workspace_agents = found
+        return changed
+    
+    def _is_workspace(self, name: str) -> bool:
+        if name.startswith(('.', '_')):
+            return False
+        return (self.project_root / name / self.STATE_FILE).is_file()
+    
+    def update_session_entry(self, filename: str) -> bool:
+        """
+        Re-check one entry in the sessions directory (e.g. from an inotify event)
+        
+        Returns:
+            True if the set of agents changed
+        """
+        agent = self.agent_from_symlink(filename)
+        if not agent:
+            return False
+        
+        exists = (self.sessions_dir / filename).is_symlink()
+        with self._lock:
+            if exists == (agent in self._session_agents):
+                return False
+            if exists:
+                self._session_agents[agent] = filename
+            else:
+                del self._session_agents[agent]
+        return True
+    
+    def update_workspace_entry(self, name: str) -> bool:
+        """
+        Re-check one directory under the project root
+        
+        Returns:
+            True if the set of agents changed
+        """
+        exists = self._is_workspace(name)
+        with self._lock:
+            if exists == (name in self._workspace_agents):
+                return False
+            if exists:
+                self._workspace_agents.add(name)
+            else:
+                self._workspace_agents.discard(name)
+        return True
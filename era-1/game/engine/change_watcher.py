@@ -0,0 +1,304 @@
+"""
+Change Watcher - inotify-based change detection for the state engine
+
+Watches the inputs the engine derives state from and maps raw filesystem
+events back to the agents they affect:
+- _sessions/ (symlink retargets, appends to symlink targets, new sessions)
+- each agent's _state.md (manual edits), and the project root for new
+  agent workspaces
+- .git/HEAD and .git/refs/heads/* (new commits, branch moves)
+
+Linux only. Uses libc through ctypes so no extra dependency is needed;
+callers should check ChangeWatcher.available() and fall back to polling.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Set, Tuple
+
+from .agent_registry import AgentRegistry
+
+
+# inotify event masks (from <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+# Directory entry changes we care about everywhere
+_DIR_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_CLOSE_WRITE | IN_ONLYDIR
+
+
+@dataclass
+class ChangeSet:
+    """Agents affected by a batch of filesystem events"""
+    agents: Set[str] = field(default_factory=set)  # Session symlink or target changed
+    state_files: Set[str] = field(default_factory=set)  # _state.md replaced or edited
+    all_agents: bool = False  # Git moved or the event queue overflowed
+    new_sessions: bool = False  # Unknown session file appeared or changed
+    registry_changed: bool = False  # Agents were added or removed
+    
+    def __bool__(self) -> bool:
+        return (bool(self.agents or self.state_files) or self.all_agents
+                or self.new_sessions or self.registry_changed)
+
+
+class ChangeWatcher:
+    """
+    Watches engine inputs with inotify and reports which agents changed
+    
+    Usage:
+        watcher = ChangeWatcher(project_root, sessions_dir, registry)
+        changes = watcher.wait(timeout=30)  # None on timeout
+    """
+    
+    # Time to keep draining after the first event so bursts coalesce
+    DEBOUNCE_SECONDS = 0.05
+    
+    _libc = None
+    
+    @classmethod
+    def available(cls) -> bool:
+        """Check whether inotify can be used on this platform"""
+        if not sys.platform.startswith('linux'):
+            return False
+        try:
+            libc = cls._load_libc()
+        except OSError:
+            return False
+        return hasattr(libc, 'inotify_init1') and hasattr(libc, 'inotify_add_watch')
+    
+    @classmethod
+    def _load_libc(cls):
+        if cls._libc is None:
+            cls._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        return cls._libc
+    
+    def __init__(self, project_root: Path, sessions_dir: Path, registry: AgentRegistry):
+        """
+        Args:
+            project_root: Repository root (contains agent dirs and .git)
+            sessions_dir: Directory holding session JSONL files and symlinks
+            registry: Agent registry, kept up to date from the events seen
+        
+        Raises:
+            OSError: If inotify can't be initialised or a watch can't be added
+        """
+        self.project_root = project_root
+        self.sessions_dir = sessions_dir
+        self.registry = registry
+        
+        self._libc = self._load_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        
+        # Self-pipe so another thread can interrupt wait()
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        
+        # wd -> (kind, agent_name or None)
+        self._watches: Dict[int, Tuple[str, Optional[str]]] = {}
+        self._watched_dirs: Set[str] = set()
+        
+        # Session target filenames -> agent
+        self._target_agents: Dict[str, str] = {}
+        
+        self._add_watches()
+        self.refresh_targets()
+    
+    def _add_watch(self, path: Path, mask: int, kind: str, agent: Optional[str] = None):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed for {path}: {os.strerror(err)}")
+        self._watches[wd] = (kind, agent)
+    
+    def _add_watches(self):
+        """Register watches on sessions, agent dirs and git refs"""
+        # Sessions: symlink retargets (create/move) and appends (modify)
+        self._add_watch(self.sessions_dir.resolve(), _DIR_MASK | IN_MODIFY, 'sessions')
+        
+        # Project root: new agent workspaces
+        self._add_watch(self.project_root, _DIR_MASK, 'root')
+        
+        # _state.md is replaced by rename, so watch its directory
+        for agent_name in self.registry.all_agents():
+            self._watch_agent_dir(agent_name)
+        
+        # Git: HEAD / packed-refs live in .git, branch tips in refs/heads
+        git_dir = self.project_root / '.git'
+        if git_dir.is_dir():
+            self._add_watch(git_dir, _DIR_MASK, 'git')
+            heads_dir = git_dir / 'refs' / 'heads'
+            if heads_dir.is_dir():
+                self._add_watch(heads_dir, _DIR_MASK, 'git_heads')
+    
+    def _watch_agent_dir(self, name: str):
+        """Watch a (possible) agent workspace for _state.md changes"""
+        agent_dir = self.project_root / name
+        if name in self._watched_dirs or not agent_dir.is_dir():
+            return
+        try:
+            self._add_watch(agent_dir, _DIR_MASK, 'state', name)
+        except OSError:
+            return
+        self._watched_dirs.add(name)
+    
+    def refresh_targets(self):
+        """Re-resolve which session file each agent symlink points at"""
+        targets = {}
+        for agent_name, symlink_name in self.registry.session_agents.items():
+            try:
+                target = os.readlink(self.sessions_dir / symlink_name)
+            except OSError:
+                continue
+            targets[os.path.basename(target)] = agent_name
+        self._target_agents = targets
+    
+    def fileno(self) -> int:
+        return self._fd
+    
+    def wake(self):
+        """Interrupt a blocking wait() from another thread"""
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            pass
+    
+    def wait(self, timeout: Optional[float] = None) -> Optional[ChangeSet]:
+        """
+        Block until relevant changes arrive or timeout expires
+        
+        Returns:
+            ChangeSet of affected agents, or None on timeout/wake
+        """
+        readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        if not readable:
+            return None
+        
+        if self._wake_r in readable:
+            self._drain_wake()
+            if self._fd not in readable:
+                return None
+        
+        changes = ChangeSet()
+        self._read_events(changes)
+        
+        # Coalesce the rest of a burst (e.g. git writing several refs)
+        while select.select([self._fd], [], [], self.DEBOUNCE_SECONDS)[0]:
+            self._read_events(changes)
+        
+        return changes
+    
+    def _drain_wake(self):
+        try:
+            while os.read(self._wake_r, 64):
+                pass
+        except BlockingIOError:
+            pass
+    
+    def _read_events(self, changes: ChangeSet):
+        """Read all pending inotify events and fold them into changes"""
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except OSError as e:
+                if e.errno in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    return
+                raise
+            if not data:
+                return
+            
+            pos = 0
+            while pos + _EVENT_HEADER.size <= len(data):
+                wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, pos)
+                pos += _EVENT_HEADER.size
+                name = data[pos:pos + name_len].rstrip(b'\0').decode('utf-8', errors='replace')
+                pos += name_len
+                self._handle_event(wd, mask, name, changes)
+    
+    def _handle_event(self, wd: int, mask: int, name: str, changes: ChangeSet):
+        """Map a single raw event to the agents it affects"""
+        if mask & IN_Q_OVERFLOW:
+            changes.all_agents = True
+            changes.new_sessions = True
+            return
+        
+        if mask & IN_IGNORED:
+            # Watched directory went away; allow re-watching if it returns
+            kind, agent = self._watches.pop(wd, (None, None))
+            if kind == 'state':
+                self._watched_dirs.discard(agent)
+            return
+        
+        kind, agent = self._watches.get(wd, (None, None))
+        
+        if kind == 'sessions':
+            symlink_agent = self.registry.agent_from_symlink(name)
+            if symlink_agent:
+                # Symlink created/replaced/removed - target may have changed
+                if self.registry.update_session_entry(name):
+                    changes.registry_changed = True
+                self.refresh_targets()
+                changes.agents.add(symlink_agent)
+            elif name in self._target_agents:
+                changes.agents.add(self._target_agents[name])
+            elif name.endswith('.jsonl'):
+                changes.new_sessions = True
+        
+        elif kind == 'root':
+            if mask & (IN_CREATE | IN_MOVED_TO | IN_DELETE | IN_MOVED_FROM):
+                self._watch_agent_dir(name)
+                if self.registry.update_workspace_entry(name):
+                    changes.registry_changed = True
+        
+        elif kind == 'state':
+            if name == self.registry.STATE_FILE:
+                if self.registry.update_workspace_entry(agent):
+                    changes.registry_changed = True
+                changes.state_files.add(agent)
+        
+        elif kind == 'git':
+            if name in ('HEAD', 'packed-refs'):
+                changes.all_agents = True
+        
+        elif kind == 'git_heads':
+            if not name.endswith('.lock'):
+                changes.all_agents = True
+    
+    def close(self):
+        """Release the inotify descriptor and wake pipe"""
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._watches.clear()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,152 @@
+"""
+Decision Scanner - Find an agent's state decision in assistant output
+
+Agents end their turns with a key/value block such as:
+
+    ```
+    next_state: deep_work
+    thread: engine-perf
+    max_tokens: 50000
+    last_read_commit: 4f35643
+    ```
+
+Assistant messages can be tens of KB of code, so the scanner never runs
+patterns over the whole message more than once: one pass finds the
+`next_state:` anchors, fences are only counted up to each anchor, and the
+optional fields are only looked for in the lines around the chosen anchor.
+
+Choice of anchor (as before): the first one inside the first code block
+that holds a valid decision, otherwise the first anchor in the message.
+"""
+
+import re
+from typing import Optional, Tuple
+
+from .models import StateDecision, AgentState
+
+
+STATE_NAMES = {
+    'bootstrap': AgentState.BOOTSTRAP,
+    'inbox': AgentState.INBOX,
+    'distill': AgentState.DISTILL,
+    'deep_work': AgentState.DEEP_WORK,
+    'deep-work': AgentState.DEEP_WORK,  # Handle hyphenated
+    'idle': AgentState.IDLE,
+    'logout': AgentState.LOGOUT,
+    'direct_io': AgentState.DIRECT_IO,
+    'direct-io': AgentState.DIRECT_IO,  # Handle hyphenated
+    'offline': AgentState.OFFLINE,
+}
+
+FENCE = '```'
+
+# Lines either side of the anchor searched for the optional fields
+NEIGHBOUR_LINES = 8
+
+_ANCHOR = re.compile(r'next_state:\s*([\w-]+)', re.IGNORECASE)
+_THREAD = re.compile(r'thread:\s*([^\n,]+?)(?:\n|,|$)', re.IGNORECASE)
+_TOKENS = re.compile(r'max_tokens:\s*(\d+)', re.IGNORECASE)
+_COMMIT = re.compile(r'(?:last_read_commit|last_read):\s*([a-f0-9]{7,40})', re.IGNORECASE)
+
+
+def scan_state_decision(content: str) -> Optional[Tuple[StateDecision, Tuple[int, int]]]:
+    """
+    Locate and parse the state decision in a message
+    
+    Returns:
+        (decision, (start, end)) where content[start:end] are the lines the
+        decision was read from, or None if there is no valid decision
+    """
+    # Cheap rejection for the common case of no decision at all
+    if 'next_state:' not in content.lower():
+        return None
+    
+    anchors = list(_ANCHOR.finditer(content))
+    if not anchors:
+        return None
+    
+    # A decision inside a code block wins, earliest block first. An anchor
+    # is inside a block when an odd number of fences come before it.
+    fences = 0
+    counted_to = 0
+    previous_block = None
+    for anchor in anchors:
+        fences += content.count(FENCE, counted_to, anchor.start())
+        counted_to = anchor.start()
+        if fences % 2 == 0:
+            continue
+        
+        end = content.find(FENCE, anchor.end())
+        if end == -1:
+            # Unclosed fence - no more blocks
+            break
+        block = (content.rfind(FENCE, 0, anchor.start()) + len(FENCE), end)
+        if block == previous_block:
+            # Only a block's first anchor counts
+            continue
+        previous_block = block
+        
+        result = _decision_at(content, anchor, *block)
+        if result:
+            return result
+    
+    # Then the first declaration anywhere
+    return _decision_at(content, anchors[0], 0, len(content))
+
+
+def _decision_at(content: str, anchor: re.Match, lo: int,
+                 hi: int) -> Optional[Tuple[StateDecision, Tuple[int, int]]]:
+    """Build the decision for one anchor, reading fields from nearby lines in [lo, hi)"""
+    state = STATE_NAMES.get(anchor.group(1).lower())
+    if not state:
+        return None
+    
+    start, end = _neighbourhood(content, anchor.start(), lo, hi)
+    text = content[start:end]
+    
+    thread_match = _THREAD.search(text)
+    tokens_match = _TOKENS.search(text)
+    commit_match = _COMMIT.search(text)
+    
+    decision = StateDecision(
+        next_state=state,
+        thread=thread_match.group(1).strip() if thread_match else None,
+        max_tokens=int(tokens_match.group(1)) if tokens_match else None,
+        last_read_commit=commit_match.group(1) if commit_match else None
+    )
+    return decision, (start, end)
+
+
+def _neighbourhood(content: str, pos: int, lo: int, hi: int) -> Tuple[int, int]:
+    """
+    Span of the lines around pos, stopping at blank lines, the region
+    bounds, or NEIGHBOUR_LINES lines either way
+    """
+    start = _line_start(content, pos, lo)
+    for _ in range(NEIGHBOUR_LINES):
+        if start <= lo:
+            break
+        above = _line_start(content, start - 1, lo)
+        if not content[above:start - 1].strip():
+            break
+        start = above
+    
+    end = _line_end(content, pos, hi)
+    for _ in range(NEIGHBOUR_LINES):
+        if end >= hi:
+            break
+        below = _line_end(content, end + 1, hi)
+        if not content[end + 1:below].strip():
+            break
+        end = below
+    
+    return start, end
+
+
+def _line_start(content: str, pos: int, lo: int) -> int:
+    return max(content.rfind('\n', lo, pos) + 1, lo)
+
+
+def _line_end(content: str, pos: int, hi: int) -> int:
+    end = content.find('\n', pos, hi)
+    return hi if end == -1 else end
@@ -0,0 +1,186 @@
+"""
+Git Batch - Long-lived `git cat-file --batch` co-processes
+
+Spawning git costs several milliseconds per call. CatFilePool keeps a few
+`git cat-file --batch` processes running and answers object lookups over
+their pipes instead:
+- resolve(rev): full hash for any revision (HEAD, branch, short hash)
+- commit(rev): (hash, committer timestamp, subject) for a commit
+
+Processes are handed out through a queue, so concurrent callers share them
+and wait their turn. A process that dies or desyncs is restarted and the
+request retried once.
+"""
+
+import queue
+import subprocess
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+
+class CatFileProcess:
+    """One `git cat-file --batch` co-process (not thread-safe on its own)"""
+    
+    def __init__(self, repo_path: Path):
+        self.repo_path = repo_path
+        self._proc: Optional[subprocess.Popen] = None
+        self.restarts = 0
+    
+    def _start(self):
+        self._proc = subprocess.Popen(
+            ['git', 'cat-file', '--batch'],
+            cwd=self.repo_path,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+    
+    def request(self, rev: str) -> Optional[Tuple[str, str, bytes]]:
+        """
+        Look up one object
+        
+        Returns:
+            (hash, type, contents), or None if the object doesn't exist
+        
+        Raises:
+            OSError: If git can't be started or keeps failing
+        """
+        for attempt in range(2):
+            if self._proc is not None and self._proc.poll() is not None:
+                # Died since the last request
+                self.close()
+                self.restarts += 1
+            if self._proc is None:
+                self._start()
+            
+            try:
+                return self._request(rev)
+            except (OSError, ValueError):
+                # Broken pipe or garbled output - start fresh
+                self.close()
+                self.restarts += 1
+                if attempt:
+                    raise OSError(f"git cat-file failed for {rev!r}")
+        return None
+    
+    def _request(self, rev: str) -> Optional[Tuple[str, str, bytes]]:
+        self._proc.stdin.write(rev.encode() + b'\n')
+        self._proc.stdin.flush()
+        
+        header = self._proc.stdout.readline()
+        if not header:
+            raise OSError("git cat-file exited")
+        
+        parts = header.decode(errors='replace').split()
+        if len(parts) != 3:
+            # "<rev> missing" / "<rev> ambiguous"
+            return None
+        
+        hash_val, obj_type, size = parts[0], parts[1], int(parts[2])
+        contents = self._proc.stdout.read(size + 1)  # Trailing newline
+        if len(contents) != size + 1:
+            raise ValueError("short read from git cat-file")
+        return hash_val, obj_type, contents[:-1]
+    
+    def close(self):
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self._proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        self._proc = None
+
+
+class CatFilePool:
+    """
+    Queue of CatFileProcess workers shared by all callers
+    
+    Processes start lazily on first request, so an unused pool costs nothing.
+    """
+    
+    def __init__(self, repo_path: Path, size: int = 1):
+        self.repo_path = repo_path
+        self._workers: List[CatFileProcess] = [CatFileProcess(repo_path) for _ in range(max(1, size))]
+        self._idle: "queue.Queue[CatFileProcess]" = queue.Queue()
+        for worker in self._workers:
+            self._idle.put(worker)
+        
+        self.requests = 0
+        self._stats_lock = threading.Lock()
+    
+    def request(self, rev: str) -> Optional[Tuple[str, str, bytes]]:
+        """Look up one object on the next free process (blocks while all are busy)"""
+        if not rev or any(c.isspace() for c in rev):
+            return None
+        
+        worker = self._idle.get()
+        try:
+            return worker.request(rev)
+        finally:
+            self._idle.put(worker)
+            with self._stats_lock:
+                self.requests += 1
+    
+    def resolve(self, rev: str) -> Optional[str]:
+        """Full hash of a revision, None if it doesn't resolve"""
+        result = self.request(rev)
+        return result[0] if result else None
+    
+    def commit(self, rev: str) -> Optional[Tuple[str, datetime, str]]:
+        """
+        Commit metadata, matching `git log --format=%H %cI %s`
+        
+        Returns:
+            (hash, committer timestamp, subject), or None if rev isn't a commit
+        """
+        result = self.request(rev)
+        if not result or result[1] != 'commit':
+            return None
+        
+        hash_val, _, contents = result
+        return (hash_val, *parse_commit(contents))
+    
+    @property
+    def restarts(self) -> int:
+        return sum(worker.restarts for worker in self._workers)
+    
+    def close(self):
+        """Stop all processes (they restart if the pool is used again)"""
+        for worker in self._workers:
+            worker.close()
+
+
+def parse_commit(contents: bytes) -> Tuple[Optional[datetime], str]:
+    """
+    Extract committer timestamp and subject from a raw commit object
+    
+    The subject is the message's first paragraph joined onto one line,
+    as git's %s does.
+    """
+    text = contents.decode('utf-8', errors='replace')
+    headers, _, message = text.partition('\n\n')
+    
+    timestamp = None
+    for line in headers.split('\n'):
+        if line.startswith('committer '):
+            # committer Name <email> 1700000000 +0100
+            try:
+                seconds, tz = line.rsplit(' ', 2)[1:]
+                sign = -1 if tz[0] == '-' else 1
+                offset = timedelta(hours=int(tz[1:3]), minutes=int(tz[3:5])) * sign
+                timestamp = datetime.fromtimestamp(int(seconds), timezone(offset))
+            except (ValueError, IndexError):
+                pass
+            break
+    
+    paragraph = message.strip('\n').split('\n\n', 1)[0]
+    subject = ' '.join(line.strip() for line in paragraph.split('\n'))
+    return timestamp, subject
@@ -2,13 +2,19 @@
 Git Monitor - Tracks agent git activity and messages
 """
 
+import bisect
 import subprocess
 import re
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict
 from dataclasses import dataclass
 
+from .git_batch import CatFilePool
+from .git_refs import RefReader
+
 
 @dataclass
 class CommitInfo:
@@ -18,6 +24,130 @@ class CommitInfo:
     message: str
 
 
+class CommitIndex:
+    """
+    In-memory index of commit history reachable from HEAD
+    
+    Commits are kept in topological order (oldest first) and referred to by
+    position, so every per-agent list is sorted and "commits after X" is a
+    bisect. Per-agent lists are built the first time an agent is queried
+    and then extended as new commits are ingested:
+    - authored: commits whose subject starts with @AGENT (writes/announcements)
+    - announcements: authored commits that declare a state ([state/thread])
+    - mentions: commits by others mentioning @AGENT or @ALL (messages)
+    """
+    
+    def __init__(self, state_pattern: re.Pattern):
+        self.state_pattern = state_pattern
+        self.generation = 0
+        self._track_lock = threading.Lock()
+        self.clear()
+    
+    def clear(self):
+        """Forget everything, including which agents are tracked"""
+        self.generation += 1
+        self.head: Optional[str] = None
+        self.hashes: List[str] = []
+        self.subjects: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.timestamps: Dict[str, datetime] = {}
+        self._short: Dict[str, str] = {}  # 7-char prefix -> full hash
+        
+        # agent_upper -> ordered positions
+        self._tracked = set()
+        self.authored: Dict[str, List[int]] = {}
+        self.mentions: Dict[str, List[int]] = {}
+        # agent_upper -> position -> (state, thread)
+        self.announcements: Dict[str, Dict[int, Tuple[str, Optional[str]]]] = {}
+    
+    def invalidate(self):
+        """
+        Drop all commits and positions (e.g. after HEAD moved
+        non-fast-forward) but keep tracking the same agents
+        
+        generation is bumped so holders of old positions can tell.
+        """
+        tracked = list(self.authored)
+        self.clear()
+        for agent_upper in tracked:
+            self.track(agent_upper)
+    
+    def __len__(self) -> int:
+        return len(self.hashes)
+    
+    def add(self, hash_val: str, timestamp: datetime, subject: str):
+        """Append one commit (must come after its ancestors)"""
+        if hash_val in self.positions:
+            return
+        
+        pos = len(self.hashes)
+        self.hashes.append(hash_val)
+        self.subjects.append(subject)
+        self.positions[hash_val] = pos
+        self.timestamps[hash_val] = timestamp
+        self._short.setdefault(hash_val[:7], hash_val)
+        
+        for agent_upper in self.authored:
+            self._classify(agent_upper, pos)
+    
+    def _classify(self, agent_upper: str, pos: int):
+        """Add a commit to an agent's authored/announcement/mention lists"""
+        subject = self.subjects[pos]
+        
+        if subject.startswith(f'@{agent_upper}'):
+            self.authored[agent_upper].append(pos)
+            
+            match = self.state_pattern.match(subject)
+            if match and match.group(1).upper() == agent_upper:
+                # Normalize state names
+                state = match.group(2).lower().replace('-', '_')
+                thread = match.group(3) if match.group(3) else None
+                self.announcements[agent_upper][pos] = (state, thread)
+            
+            # Agent's own commits are never unread messages
+            return
+        
+        if f'@{agent_upper}' in subject or '@ALL' in subject:
+            self.mentions[agent_upper].append(pos)
+    
+    def track(self, agent_name: str) -> str:
+        """Make sure per-agent lists exist, building them on first use"""
+        agent_upper = agent_name.upper()
+        if agent_upper in self._tracked:
+            return agent_upper
+        
+        # Agents may be processed concurrently - build each list once and
+        # only mark it tracked when complete
+        with self._track_lock:
+            if agent_upper not in self._tracked:
+                self.authored[agent_upper] = []
+                self.mentions[agent_upper] = []
+                self.announcements[agent_upper] = {}
+                for pos in range(len(self.hashes)):
+                    self._classify(agent_upper, pos)
+                self._tracked.add(agent_upper)
+        return agent_upper
+    
+    def resolve(self, hash_prefix: Optional[str]) -> Optional[int]:
+        """Position of a full or abbreviated hash, None if unknown"""
+        if not hash_prefix:
+            return None
+        
+        if hash_prefix in self.positions:
+            return self.positions[hash_prefix]
+        
+        if len(hash_prefix) == 7:
+            full = self._short.get(hash_prefix)
+        else:
+            full = next((h for h in self.hashes if h.startswith(hash_prefix)), None)
+        
+        return self.positions.get(full) if full else None
+    
+    def commit_info(self, pos: int) -> CommitInfo:
+        hash_val = self.hashes[pos]
+        return CommitInfo(hash=hash_val, timestamp=self.timestamps[hash_val], message=self.subjects[pos])
+
+
 class GitMonitor:
     """
     Monitors git repository for agent activity
@@ -26,8 +156,23 @@ class GitMonitor:
     - Last read/write commits per agent
     - Unread message counts
     - Recent commit activity
+    
+    History is read with a single `git log` per new HEAD into a CommitIndex
+    (only old_head..new_head once built); queries are answered from memory.
+    Call refresh() once per cycle to pick up new commits.
+    
+    HEAD is resolved by reading .git directly, so an unchanged HEAD costs
+    no git process at all. Other single-object lookups go through a
+    long-lived `git cat-file --batch` pool instead of spawning git.
     """
     
+    # Field/record separators for parsing git log output
+    # (%m marks boundary commits with '-')
+    _LOG_FORMAT = '--format=%m%x1f%H%x1f%cI%x1f%s%x1e'
+    
+    # Seconds before git log is retried for a HEAD it already failed on
+    LOG_RETRY_SECONDS = 30.0
+    
     def __init__(self, repo_path: Path):
         self.repo_path = repo_path
         
@@ -35,52 +180,144 @@ class GitMonitor:
         # Matches: @AGENT [state]: ... or @AGENT [state/thread]: ...
         # Updated to handle agent names with hyphens (e.g. ERA-1)
         self.state_pattern = re.compile(r'^@([\w-]+)\s*\[(\w+)(?:/(\S+))?\]:', re.IGNORECASE)
+        
+        self.index = CommitIndex(self.state_pattern)
+        self.objects = CatFilePool(repo_path)
+        self.refs = RefReader(repo_path)
+        
+        # (head, monotonic time) of the last HEAD whose history couldn't be read
+        self._failed_head: Optional[Tuple[str, float]] = None
+    
+    def _git(self, *args: str, check: bool = True) -> subprocess.CompletedProcess:
+        return subprocess.run(
+            ['git', *args],
+            cwd=self.repo_path,
+            capture_output=True,
+            text=True,
+            check=check
+        )
+    
+    def refresh(self) -> bool:
+        """
+        Bring the commit index up to date with HEAD
+        
+        A non-fast-forward HEAD move (rebase, reset, force-push) is detected
+        from the same incremental git log - the old head must show up as a
+        boundary commit - and invalidates the index, which is then rebuilt.
+        
+        Returns:
+            True if new commits were ingested
+        """
+        head = self._read_head()
+        if not head:
+            # No commits yet (or not a repo)
+            return False
+        
+        # Steady state: nothing committed, nothing to do
+        old_head = self.index.head
+        if head == old_head:
+            return False
+        
+        # Every query calls this while the index is empty - don't rerun a
+        # failing git log for each of them
+        if self._failed_head and self._failed_head[0] == head:
+            if time.monotonic() - self._failed_head[1] < self.LOG_RETRY_SECONDS:
+                return False
+        
+        records = None
+        if old_head:
+            records = self._log(f'{old_head}..{head}', boundary=True)
+            boundary = {hash_val for marker, hash_val, _, _ in records or [] if marker == '-'}
+            if old_head not in boundary:
+                # Rebase / reset / force-push: positions are no longer valid
+                print(f"  HEAD moved non-fast-forward ({old_head[:7]} -> {head[:7]}), rebuilding commit index")
+                records = None
+        
+        if records is None:
+            self.index.invalidate()
+            records = self._log(head)
+            if records is None:
+                self._failed_head = (head, time.monotonic())
+                return False
+        
+        for marker, hash_val, timestamp, subject in records:
+            if marker != '-':
+                self.index.add(hash_val, timestamp, subject)
+        
+        self.index.head = head
+        self._failed_head = None
+        return True
+    
+    def _read_head(self) -> Optional[str]:
+        """Current HEAD hash - read from .git, asking git only as a fallback"""
+        head = self.refs.head()
+        if head:
+            return head
+        
+        try:
+            return self.objects.resolve('HEAD')
+        except OSError:
+            return None
+    
+    def _log(self, revs: str, boundary: bool = False) -> Optional[List[Tuple[str, str, datetime, str]]]:
+        """
+        Run git log oldest-first in topological order
+        
+        Returns:
+            List of (boundary_marker, hash, timestamp, subject), or None if
+            git failed (e.g. the old head no longer exists)
+        """
+        args = ['log', '--topo-order', '--reverse', self._LOG_FORMAT]
+        if boundary:
+            args.append('--boundary')
+        
+        try:
+            output = self._git(*args, revs).stdout
+        except subprocess.CalledProcessError:
+            return None
+        
+        records = []
+        for record in output.split('\x1e'):
+            record = record.strip('\n')
+            if not record:
+                continue
+            parts = record.split('\x1f', 3)
+            if len(parts) != 4:
+                continue
+            marker, hash_val, timestamp_str, subject = parts
+            try:
+                timestamp = datetime.fromisoformat(timestamp_str)
+            except ValueError:
+                continue
+            records.append((marker, hash_val, timestamp, subject))
+        
+        return records
+    
+    def _ensure_index(self):
+        """Build the index on first use if no refresh has happened yet"""
+        if self.index.head is None:
+            self.refresh()
     
     def get_unread_count(self, agent_name: str, last_read_hash: str) -> int:
         """
         Count unread messages for an agent since last read commit
         
-        Runs: git log --oneline HASH..HEAD | grep -v '^[a-f0-9]* @AGENT:' | grep -E '@AGENT|@ALL' | wc -l
+        Counts commits after last_read_hash mentioning @AGENT or @ALL,
+        excluding the agent's own commits.
         """
         if not last_read_hash:
             return 0
         
-        try:
-            # Get commits mentioning this agent (but not from this agent)
-            cmd = [
-                'git', 'log', '--oneline', f'{last_read_hash}..HEAD'
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            # Count mentions
-            count = 0
-            agent_upper = agent_name.upper()
-            
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                    
-                # Skip agent's own commits (both @AGENT: and @AGENT [state]: formats)
-                # Extract commit message part after hash
-                parts = line.split(' ', 1)
-                if len(parts) > 1 and parts[1].startswith(f'@{agent_upper}'):
-                    continue
-                    
-                # Count if mentioned
-                if f'@{agent_upper}' in line or '@ALL' in line:
-                    count += 1
-            
-            return count
-            
-        except subprocess.CalledProcessError:
+        self._ensure_index()
+        agent_upper = self.index.track(agent_name)
+        
+        last_read_pos = self.index.resolve(last_read_hash)
+        if last_read_pos is None:
             return 0
+        
+        # Mention positions are sorted, so unread is everything after last read
+        mentions = self.index.mentions[agent_upper]
+        return len(mentions) - bisect.bisect_right(mentions, last_read_pos)
     
     def get_last_commits(self, agent_name: str) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -88,80 +325,50 @@ class GitMonitor:
         
         Returns: (last_read_hash, last_write_hash)
         """
-        agent_upper = agent_name.upper()
+        self._ensure_index()
+        agent_upper = self.index.track(agent_name)
         
-        try:
-            # Get last write (agent's own commit)
-            cmd_write = [
-                'git', 'log', '--oneline', '-1', '--grep', f'^@{agent_upper}:'
-            ]
-            
-            result = subprocess.run(
-                cmd_write,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True
-            )
-            
-            last_write = None
-            if result.returncode == 0 and result.stdout.strip():
-                # Extract hash from "hash message"
-                last_write = result.stdout.strip().split()[0]
-            
-            # For last read, we'd need to parse agent messages or state files
-            # This would require looking at commit content
-            # For now, return None (would be tracked in _state.md)
-            last_read = None
-            
-            return last_read, last_write
-            
-        except Exception:
-            return None
+        # Last write is the agent's own latest @AGENT: commit
+        last_write = None
+        for pos in reversed(self.index.authored[agent_upper]):
+            if self.index.subjects[pos].startswith(f'@{agent_upper}:'):
+                last_write = self.index.hashes[pos][:7]
+                break
+        
+        # For last read, we'd need to parse agent messages or state files
+        # This would require looking at commit content
+        # For now, return None (would be tracked in _state.md)
+        last_read = None
+        
+        return last_read, last_write
     
     def get_agent_state_from_commits(self, agent_name: str, since_hash: Optional[str] = None) -> Optional[Tuple[str, Optional[str], str]]:
         """
         Check recent commits for state announcements by this agent
         
+        Only the agent's 20 most recent commits (after since_hash, if given)
+        are considered.
+        
         Returns: (state, thread, commit_hash) or None
         """
-        agent_upper = agent_name.upper()
+        self._ensure_index()
+        agent_upper = self.index.track(agent_name)
         
-        try:
-            # Get recent commits by this agent
-            cmd = ['git', 'log', '--format=%H|%s', '-20', '--grep', f'^@{agent_upper}']
-            if since_hash:
-                cmd.extend([f'{since_hash}..HEAD'])
-            
-            result = subprocess.run(
-                cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            if result.stdout.strip():
-                # Check each commit message
-                for line in result.stdout.strip().split('\n'):
-                    if '|' not in line:
-                        continue
-                    
-                    hash_val, message = line.split('|', 1)
-                    match = self.state_pattern.match(message)
-                    
-                    if match and match.group(1).upper() == agent_upper:
-                        state = match.group(2).lower()
-                        thread = match.group(3) if match.group(3) else None
-                        
-                        # Normalize state names
-                        state = state.replace('-', '_')
-                        
-                        return (state, thread, hash_val)
-            
-            return None
-            
-        except subprocess.CalledProcessError:
-            return None, None
+        since_pos = -1
+        if since_hash:
+            since_pos = self.index.resolve(since_hash)
+            if since_pos is None:
+                return None
+        
+        announcements = self.index.announcements[agent_upper]
+        for pos in reversed(self.index.authored[agent_upper][-20:]):
+            if pos <= since_pos:
+                break
+            if pos in announcements:
+                state, thread = announcements[pos]
+                return (state, thread, self.index.hashes[pos])
+        
+        return None
     
     def get_recent_activity(self, limit: int = 10) -> List[dict]:
         """
@@ -169,63 +376,41 @@ class GitMonitor:
         
         Returns list of recent commits with agent attribution
         """
-        try:
-            cmd = ['git', 'log', '--oneline', f'-{limit}']
-            
-            result = subprocess.run(
-                cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            activity = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                
-                parts = line.split(None, 1)
-                if len(parts) == 2:
-                    hash_val, message = parts
-                    
-                    # Extract agent from message
-                    agent = None
-                    if message.startswith('@'):
-                        agent_part = message.split(':', 1)[0]
-                        agent = agent_part[1:].lower()  # Remove @ and lowercase
-                    
-                    activity.append({
-                        'hash': hash_val,
-                        'agent': agent,
-                        'message': message
-                    })
+        self._ensure_index()
+        
+        activity = []
+        for pos in range(len(self.index) - 1, max(-1, len(self.index) - 1 - limit), -1):
+            message = self.index.subjects[pos]
             
-            return activity
+            # Extract agent from message
+            agent = None
+            if message.startswith('@'):
+                agent_part = message.split(':', 1)[0]
+                agent = agent_part[1:].lower()  # Remove @ and lowercase
             
-        except subprocess.CalledProcessError:
-            return []
+            activity.append({
+                'hash': self.index.hashes[pos][:7],
+                'agent': agent,
+                'message': message
+            })
+        
+        return activity
     
     def get_commit_timestamp(self, commit_hash: str) -> Optional[datetime]:
         """Get timestamp for a specific commit"""
+        self._ensure_index()
+        
+        pos = self.index.resolve(commit_hash)
+        if pos is not None:
+            return self.index.timestamps[self.index.hashes[pos]]
+        
+        # Not reachable from HEAD - look the object up directly
         try:
-            cmd = ['git', 'show', '-s', '--format=%cI', commit_hash]
-            
-            result = subprocess.run(
-                cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            if result.stdout.strip():
-                return datetime.fromisoformat(result.stdout.strip())
-                
-        except (subprocess.CalledProcessError, ValueError):
-            pass
-            
-        return None
+            commit = self.objects.commit(commit_hash)
+        except OSError:
+            return None
+        
+        return commit[1] if commit else None
     
     def get_last_agent_commit(self, agent_name: str) -> Optional[CommitInfo]:
         """
@@ -233,33 +418,14 @@ class GitMonitor:
         
         Returns CommitInfo with hash, timestamp, and message
         """
-        agent_upper = agent_name.upper()
+        self._ensure_index()
+        agent_upper = self.index.track(agent_name)
+        
+        # Match both @AGENT: and @AGENT [state]: formats
+        authored = self.index.authored[agent_upper]
+        if authored:
+            return self.index.commit_info(authored[-1])
         
-        try:
-            # Get last commit by this agent
-            # Match both @AGENT: and @AGENT [state]: formats
-            cmd = [
-                'git', 'log', '--format=%H|%cI|%s', '-1', '--grep', f'^@{agent_upper}'
-            ]
-            
-            result = subprocess.run(
-                cmd,
-                cwd=self.repo_path,
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            
-            if result.stdout.strip():
-                parts = result.stdout.strip().split('|', 2)
-                if len(parts) == 3:
-                    hash_val, timestamp_str, message = parts
-                    timestamp = datetime.fromisoformat(timestamp_str)
-                    return CommitInfo(hash=hash_val, timestamp=timestamp, message=message)
-                    
-        except (subprocess.CalledProcessError, ValueError):
-            pass
-            
         return None
     
     def count_unread_messages(self, agent_name: str, last_read_hash: str) -> int:
@@ -268,4 +434,8 @@ class GitMonitor:
         
         Same as get_unread_count but with clearer name
         """
-        return self.get_unread_count(agent_name, last_read_hash)
\ No newline at end of file
+        return self.get_unread_count(agent_name, last_read_hash)
+    
+    def close(self):
+        """Stop the git co-processes"""
+        self.objects.close()
@@ -0,0 +1,121 @@
+"""
+Git Refs - Resolve HEAD by reading .git directly
+
+Answering "did HEAD move?" through git costs a process (or a co-process
+round trip) per poll. RefReader reads HEAD, loose refs under refs/ and
+packed-refs from disk instead: a couple of tiny reads, with packed-refs
+only re-parsed when its stat changes.
+
+Unusual layouts (reftable, unreadable files) return None so callers can
+fall back to asking git.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+_HASH_RE = re.compile(r'^[0-9a-f]{40}(?:[0-9a-f]{24})?$')
+
+
+class RefReader:
+    """
+    Pure-Python reader for HEAD, refs/heads/* and packed-refs
+    
+    Usage:
+        refs = RefReader(repo_path)
+        head = refs.head()  # Full hash, or None if it can't be resolved
+    """
+    
+    # Symbolic refs followed before giving up (git uses 5)
+    MAX_DEPTH = 5
+    
+    def __init__(self, repo_path: Path):
+        self.git_dir, self.common_dir = self._find_git_dirs(repo_path)
+        
+        # packed-refs: stat key and parsed refname -> hash
+        self._packed_key: Optional[Tuple[int, int, int]] = None
+        self._packed: Dict[str, str] = {}
+    
+    @staticmethod
+    def _find_git_dirs(repo_path: Path) -> Tuple[Path, Path]:
+        """
+        Locate the git dir and the common dir holding shared refs
+        
+        Handles worktrees/submodules where .git is a "gitdir: <path>" file.
+        """
+        git_dir = repo_path / '.git'
+        if git_dir.is_file():
+            try:
+                content = git_dir.read_text().strip()
+            except OSError:
+                content = ''
+            if content.startswith('gitdir:'):
+                git_dir = (repo_path / content[len('gitdir:'):].strip()).resolve()
+        
+        common_dir = git_dir
+        try:
+            common = (git_dir / 'commondir').read_text().strip()
+            common_dir = (git_dir / common).resolve()
+        except OSError:
+            pass
+        
+        return git_dir, common_dir
+    
+    def head(self) -> Optional[str]:
+        """Hash HEAD currently points at, None if unresolvable (or unborn)"""
+        return self.resolve('HEAD')
+    
+    def resolve(self, ref: str) -> Optional[str]:
+        """Resolve a full ref name (HEAD, refs/heads/main, ...) to a hash"""
+        for _ in range(self.MAX_DEPTH):
+            value = self._read_loose(ref)
+            if value is None:
+                return self._packed_refs().get(ref)
+            
+            if value.startswith('ref:'):
+                ref = value[len('ref:'):].strip()
+                continue
+            
+            return value if _HASH_RE.match(value) else None
+        
+        return None
+    
+    def _read_loose(self, ref: str) -> Optional[str]:
+        # Per-worktree refs (HEAD) live in the git dir, shared refs in the common dir
+        base = self.git_dir if '/' not in ref else self.common_dir
+        try:
+            with open(base / ref, 'r') as f:
+                return f.readline().strip()
+        except (OSError, UnicodeDecodeError):
+            return None
+    
+    def _packed_refs(self) -> Dict[str, str]:
+        """Parsed packed-refs, re-read only when the file changed"""
+        path = self.common_dir / 'packed-refs'
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._packed_key, self._packed = None, {}
+            return self._packed
+        
+        key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        if key == self._packed_key:
+            return self._packed
+        
+        packed = {}
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    # Skip header comments and peeled (^) lines
+                    if line.startswith(('#', '^')):
+                        continue
+                    parts = line.split()
+                    if len(parts) == 2 and _HASH_RE.match(parts[0]):
+                        packed[parts[1]] = parts[0]
+        except (OSError, UnicodeDecodeError):
+            return {}
+        
+        self._packed_key, self._packed = key, packed
+        return packed
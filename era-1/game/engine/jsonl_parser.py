@@ -3,12 +3,119 @@ JSONL Parser for extracting agent state and context information from session log
 """
 
 import json
+import os
 import re
+import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Tuple
 
-from .models import StateDecision, AgentState
+from .models import StateDecision, SessionSnapshot
+from .decision_scanner import scan_state_decision
+
+
+class SessionTail:
+    """
+    Incremental reader for a single session JSONL file
+    
+    Remembers the byte offset and inode of the file so each refresh only
+    reads bytes appended since the previous one. Incomplete trailing lines
+    are buffered until their newline arrives.
+    
+    Parsed results (owned by JSONLParser) are kept on the tail:
+    - last_timestamp / last_content: most recent timestamped record
+    - usage: most recent context usage dict
+    - decision / decision_offset: most recent assistant state decision
+      and the byte offset of the record it came from
+    """
+    
+    # How far back to start reading a file we haven't seen before
+    BOOTSTRAP_BYTES = 10240
+    
+    def __init__(self, file_path: Path):
+        self.file_path = file_path
+        self.inode: Optional[int] = None
+        self.offset = 0  # Bytes consumed (including buffered partial line)
+        self.size = 0  # File size at last refresh
+        self.partial = b''
+        
+        self.last_timestamp: Optional[datetime] = None
+        self.last_content: Optional[str] = None
+        self.usage: Optional[Dict[str, Any]] = None
+        self.decision: Optional[StateDecision] = None
+        self.decision_offset: Optional[int] = None
+    
+    def _reset(self, inode: int, file_size: int):
+        """Start over on a new or truncated file, reading only its tail"""
+        self.inode = inode
+        self.partial = b''
+        self.last_timestamp = None
+        self.last_content = None
+        self.usage = None
+        self.decision = None
+        self.decision_offset = None
+        self.offset = self._line_start_before(max(0, file_size - self.BOOTSTRAP_BYTES))
+    
+    def _line_start_before(self, pos: int) -> int:
+        """
+        Find the start of the line containing byte `pos`
+        
+        Walks backwards so a record straddling the bootstrap window (e.g. a
+        long assistant message) is read whole rather than cut in half.
+        """
+        if pos == 0:
+            return 0
+        
+        chunk_size = 4096
+        with open(self.file_path, 'rb') as f:
+            end = pos
+            while end > 0:
+                start = max(0, end - chunk_size)
+                f.seek(start)
+                chunk = f.read(end - start)
+                newline = chunk.rfind(b'\n')
+                if newline != -1:
+                    return start + newline + 1
+                end = start
+        return 0
+    
+    def read_new_lines(self) -> List[Tuple[int, bytes]]:
+        """
+        Read bytes appended since last call
+        
+        Returns:
+            List of (byte_offset, line) for each newly completed line
+        """
+        stat = os.stat(self.file_path)
+        
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            # New file, replaced file, or truncated - start over
+            self._reset(stat.st_ino, stat.st_size)
+        
+        self.size = stat.st_size
+        if stat.st_size == self.offset:
+            return []
+        
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(stat.st_size - self.offset)
+        
+        buffer_start = self.offset - len(self.partial)
+        buffer = self.partial + data
+        self.offset += len(data)
+        self.size = self.offset
+        
+        pos = 0
+        lines = []
+        while True:
+            newline = buffer.find(b'\n', pos)
+            if newline == -1:
+                break
+            lines.append((buffer_start + pos, buffer[pos:newline]))
+            pos = newline + 1
+        
+        self.partial = buffer[pos:]
+        return lines
 
 
 class JSONLParser:
@@ -21,17 +128,6 @@ class JSONLParser:
     """
     
     def __init__(self):
-        # Patterns for extracting state decisions from agent messages
-        self.state_patterns = {
-            # Pattern 1: Markdown code block
-            'code_block': re.compile(r'```\s*\n?(.*?)\n?```', re.DOTALL),
-            # Pattern 2: Direct state annotation
-            'state_key': re.compile(r'next_state:\s*(\w+)', re.IGNORECASE),
-            'thread_key': re.compile(r'thread:\s*([^\n,]+?)(?:\n|,|$)', re.IGNORECASE),
-            'tokens_key': re.compile(r'max_tokens:\s*(\d+)', re.IGNORECASE),
-            'commit_key': re.compile(r'(?:last_read_commit|last_read):\s*([a-f0-9]{7,40})', re.IGNORECASE),
-        }
-        
         # Pattern for agent identification
         # TODO: Validate actual JSONL structure - assuming system prompt or early message contains agent name
         self.agent_patterns = {
@@ -39,6 +135,10 @@ class JSONLParser:
             'bootstrap_prompt': re.compile(r'apply.*?for agent @(\w+)\.md', re.IGNORECASE),
             'agent_message': re.compile(r'^@(\w+)[:\s\[]', re.MULTILINE),  # @AGENT: or @AGENT [state]
         }
+        
+        # Incremental readers for session files, keyed by path
+        self._tails: Dict[Path, SessionTail] = {}
+        self._tails_lock = threading.Lock()
     
     def parse_session_file(self, file_path: Path) -> Dict[str, Any]:
         """
@@ -129,7 +229,7 @@ class JSONLParser:
         """
         content = entry.get('content', '')
         
-        # Check each pattern
+        # Check each pattern (separately - one kind's text can contain another's)
         for pattern_name, pattern in self.agent_patterns.items():
             match = pattern.search(content)
             if match:
@@ -149,93 +249,145 @@ class JSONLParser:
         Handles multiple formats agents use:
         1. Markdown code blocks with key:value pairs
         2. Inline state declarations
-        3. Structured decision sections
+        
+        See decision_scanner for how the message is searched.
         """
-        # First try code blocks
-        code_blocks = self.state_patterns['code_block'].findall(content)
-        for block in code_blocks:
-            decision = self._parse_state_block(block)
-            if decision:
-                return decision
-        
-        # Then try direct parsing of content
-        decision = self._parse_state_block(content)
-        if decision:
-            return decision
+        result = scan_state_decision(content)
+        return result[0] if result else None
+    
+    def refresh_tail(self, file_path: Path) -> SessionTail:
+        """
+        Bring the incremental reader for a session file up to date
         
-        return None
+        Reads only bytes appended since the last refresh and updates the
+        tail's parsed state once per new record.
+        
+        Raises:
+            OSError: If the file can't be read
+        """
+        file_path = Path(file_path)
+        
+        with self._tails_lock:
+            tail = self._tails.get(file_path)
+            if tail is None:
+                tail = SessionTail(file_path)
+                self._tails[file_path] = tail
+            
+            for offset, line in tail.read_new_lines():
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line.decode('utf-8', errors='ignore'))
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict):
+                    self._ingest_record(tail, offset, entry)
+            
+            return tail
     
-    def _parse_state_block(self, text: str) -> Optional[StateDecision]:
-        """Parse state information from text block"""
-        # Extract state
-        state_match = self.state_patterns['state_key'].search(text)
-        if not state_match:
-            return None
+    def _ingest_record(self, tail: SessionTail, offset: int, entry: Dict[str, Any]):
+        """Update a tail's parsed state from one appended record"""
+        timestamp = None
+        if 'timestamp' in entry:
+            try:
+                timestamp = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00'))
+            except (ValueError, AttributeError):
+                timestamp = None
         
-        state_name = state_match.group(1).lower()
-        
-        # Map to enum (handle both forms)
-        state_map = {
-            'bootstrap': AgentState.BOOTSTRAP,
-            'inbox': AgentState.INBOX,
-            'distill': AgentState.DISTILL,
-            'deep_work': AgentState.DEEP_WORK,
-            'deep-work': AgentState.DEEP_WORK,  # Handle hyphenated
-            'idle': AgentState.IDLE,
-            'logout': AgentState.LOGOUT,
-            'direct_io': AgentState.DIRECT_IO,
-            'direct-io': AgentState.DIRECT_IO,  # Handle hyphenated
-            'offline': AgentState.OFFLINE,
-        }
+        if timestamp:
+            content = entry.get('content', '')
+            tail.last_timestamp = timestamp
+            tail.last_content = content[:100] if isinstance(content, str) else ''
         
-        state = state_map.get(state_name)
-        if not state:
-            return None
+        message = entry.get('message', {})
+        if not isinstance(message, dict):
+            return
+        
+        # Look for usage in message field (actual JSONL structure)
+        usage = message.get('usage', {})
+        if isinstance(usage, dict) and 'input_tokens' in usage:
+            tail.usage = self._usage_to_context(usage)
+        
+        if message.get('role') != 'assistant':
+            return
+        
+        content = self._assistant_text(message)
+        if not content:
+            return
+        
+        decision = self._extract_state_decision(content)
+        if decision:
+            if timestamp:
+                decision.timestamp = timestamp
+            tail.decision = decision
+            tail.decision_offset = offset
+    
+    def _assistant_text(self, message: Dict[str, Any]) -> str:
+        """Join the text items of an assistant message's content list"""
+        content_parts = []
+        for item in message.get('content', []) or []:
+            if isinstance(item, dict) and item.get('type') == 'text':
+                content_parts.append(item.get('text', ''))
+        return '\n'.join(content_parts)
+    
+    def _usage_to_context(self, usage: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a message usage block into context usage fields"""
+        # Calculate total from all token types
+        total = (usage.get('input_tokens', 0) + 
+                usage.get('cache_creation_input_tokens', 0) +
+                usage.get('cache_read_input_tokens', 0) +
+                usage.get('output_tokens', 0))
+        
+        # Assume standard context window
+        max_tokens = 128000  # Could be extracted from model info
         
-        # Extract optional fields
-        thread_match = self.state_patterns['thread_key'].search(text)
-        thread = thread_match.group(1).strip() if thread_match else None
+        return {
+            'used': total,
+            'max': max_tokens,
+            'percent': (total / max_tokens) * 100
+        }
+    
+    def snapshot(self, file_path: Path) -> SessionSnapshot:
+        """
+        Scan the tail of a session file once and return everything the
+        engine needs from it
         
-        tokens_match = self.state_patterns['tokens_key'].search(text)
-        max_tokens = int(tokens_match.group(1)) if tokens_match else None
+        The decision only counts if it came from the latest output: the
+        last 2KB of the file, widened to the start of the record that
+        straddles it.
         
-        commit_match = self.state_patterns['commit_key'].search(text)
-        last_read_commit = commit_match.group(1) if commit_match else None
+        Raises:
+            OSError: If the file can't be read
+        """
+        tail = self.refresh_tail(file_path)
+        
+        decision = None
+        if tail.decision:
+            window_start = tail.size - 2048
+            # Only look for the straddling record's start when it matters
+            if tail.decision_offset < window_start:
+                window_start = tail._line_start_before(window_start)
+            if tail.decision_offset >= window_start:
+                decision = tail.decision
         
-        return StateDecision(
-            next_state=state,
-            thread=thread,
-            max_tokens=max_tokens,
-            last_read_commit=last_read_commit
+        return SessionSnapshot(
+            file_path=str(file_path),
+            offset=tail.offset,
+            last_timestamp=tail.last_timestamp,
+            last_content=tail.last_content,
+            usage=dict(tail.usage) if tail.usage else None,
+            decision=decision
         )
     
     def extract_last_activity(self, file_path: Path) -> Tuple[Optional[datetime], Optional[str]]:
         """
         Quick extraction of just the last timestamp and message
-        Reads file backwards for efficiency
+        Only reads bytes appended since the last call
         """
         try:
-            # Read last few lines (more efficient than whole file)
-            with open(file_path, 'rb') as f:
-                # Seek to end and read last 10KB
-                f.seek(0, 2)  # End of file
-                file_size = f.tell()
-                read_size = min(file_size, 10240)  # 10KB max
-                f.seek(file_size - read_size)
-                tail = f.read().decode('utf-8', errors='ignore')
-            
-            # Split into lines and parse backwards
-            lines = tail.strip().split('\n')
-            for line in reversed(lines):
-                try:
-                    entry = json.loads(line)
-                    if 'timestamp' in entry:
-                        ts = datetime.fromisoformat(entry['timestamp'].replace('Z', '+00:00'))
-                        content = entry.get('content', '')[:100]  # First 100 chars
-                        return ts, content
-                except:
-                    continue
-                    
+            snapshot = self.snapshot(file_path)
+            if snapshot.last_timestamp:
+                return snapshot.last_timestamp, snapshot.last_content
         except Exception:
             pass
         
@@ -243,118 +395,27 @@ class JSONLParser:
     
     def parse_state_decisions(self, file_path: Path) -> List[StateDecision]:
         """
-        Parse state decision from LAST line only (most recent assistant output)
+        Parse state decision from the most recent assistant output
         
         Returns list with single StateDecision if found, empty list otherwise
         """
         try:
-            # Read just the last line
-            with open(file_path, 'rb') as f:
-                # Get file size
-                f.seek(0, 2)
-                file_size = f.tell()
-                # Go back 2KB from end or to start if file is smaller
-                seek_pos = max(0, file_size - 2048)
-                f.seek(seek_pos)
-                tail = f.read()
-                
-            # Get last complete line that's an assistant message
-            lines = tail.decode('utf-8', errors='ignore').strip().split('\n')
-            
-            # Look backwards for last assistant message
-            for line in reversed(lines):
-                if not line.strip():
-                    continue
-                    
-                try:
-                    entry = json.loads(line)
-                    
-                    # Skip if not a message or not assistant
-                    message = entry.get('message', {})
-                    if message.get('role') != 'assistant':
-                        continue
-                    
-                    # Extract content
-                    content_list = message.get('content', [])
-                    if not content_list:
-                        continue
-                    
-                    # Join text content
-                    content_parts = []
-                    for item in content_list:
-                        if isinstance(item, dict) and item.get('type') == 'text':
-                            content_parts.append(item.get('text', ''))
-                    
-                    content = '\n'.join(content_parts)
-                    if not content:
-                        continue
-                    
-                    # Try to extract state decision
-                    decision = self._extract_state_decision(content)
-                    if decision:
-                        # Add timestamp from entry
-                        if 'timestamp' in entry:
-                            decision.timestamp = datetime.fromisoformat(
-                                entry['timestamp'].replace('Z', '+00:00')
-                            )
-                        return [decision]
-                        
-                except (json.JSONDecodeError, KeyError):
-                    continue
-            
-            # No state decision found
-            return []
-            
+            snapshot = self.snapshot(file_path)
         except Exception as e:
             raise RuntimeError(f"Failed to parse last line of {file_path}: {e}")
+        
+        return [snapshot.decision] if snapshot.decision else []
     
     def parse_context_usage(self, file_path: Path) -> Optional[Dict[str, Any]]:
         """
-        Parse context token usage from last few lines (most recent usage)
+        Parse context token usage from the most recent usage record
         
         Returns dict with 'used', 'max', and 'percent' fields
         """
         try:
-            # Read last 10KB to find recent usage data
-            with open(file_path, 'rb') as f:
-                f.seek(0, 2)
-                file_size = f.tell()
-                seek_pos = max(0, file_size - 10240)
-                f.seek(seek_pos)
-                tail = f.read()
-            
-            # Parse lines in reverse to find most recent usage
-            lines = tail.decode('utf-8', errors='ignore').strip().split('\n')
-            for line in reversed(lines):
-                try:
-                    entry = json.loads(line)
-                    
-                    # Look for usage in message field (actual JSONL structure)
-                    message = entry.get('message', {})
-                    usage = message.get('usage', {})
-                    
-                    if 'input_tokens' in usage:
-                        # Calculate total from all token types
-                        total = (usage.get('input_tokens', 0) + 
-                                usage.get('cache_creation_input_tokens', 0) +
-                                usage.get('cache_read_input_tokens', 0) +
-                                usage.get('output_tokens', 0))
-                        
-                        # Assume standard context window
-                        max_tokens = 128000  # Could be extracted from model info
-                        
-                        return {
-                            'used': total,
-                            'max': max_tokens,
-                            'percent': (total / max_tokens) * 100
-                        }
-                
-                except (json.JSONDecodeError, KeyError):
-                    continue
-            
-            return None
+            return self.snapshot(file_path).usage
             
         except Exception as e:
             # Don't throw - context usage is optional
             print(f"Warning: Could not parse context usage: {e}")
-            return None
\ No newline at end of file
+            return None
@@ -9,7 +9,8 @@ TODO: Consider versioning strategy for _state.md files
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Optional, Dict, Any
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping
 from enum import Enum
 
 
@@ -25,6 +26,17 @@ class AgentState(Enum):
     DIRECT_IO = "direct_io"  # Admin override - skip idle checks
 
 
+@dataclass
+class SessionSnapshot:
+    """Parsed view of the tail of a session JSONL file, from a single scan"""
+    file_path: str
+    offset: int = 0  # Bytes of the file consumed so far
+    last_timestamp: Optional[datetime] = None
+    last_content: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None  # 'used', 'max', 'percent'
+    decision: Optional['StateDecision'] = None  # From the latest assistant output
+
+
 @dataclass
 class SessionInfo:
     """Information about a JSONL session file"""
@@ -37,6 +49,10 @@ class SessionInfo:
     line_count: int = 0
     agent_name: Optional[str] = None  # Extracted from content
     is_continuation: bool = False
+    snapshot: Optional[SessionSnapshot] = None  # Tail scan taken with this info
+    
+    # Seconds without writes before a session counts as idle
+    STALE_SECONDS = 60
     
     @property
     def is_stale(self) -> bool:
@@ -44,7 +60,7 @@ class SessionInfo:
         if not self.last_modified:
             return False
         age = datetime.now() - self.last_modified
-        return age.total_seconds() > 60
+        return age.total_seconds() > self.STALE_SECONDS
 
 
 @dataclass
@@ -157,6 +173,21 @@ unread_message_count: {self.unread_message_count}
 """
 
 
+@dataclass(frozen=True)
+class EngineSnapshot:
+    """
+    Every agent's state as of one engine version
+    
+    Published by swapping the reference, never modified, so readers can keep
+    one as long as they like without locking. The AgentGroundState objects
+    are shared between snapshots (unchanged agents keep the same object) and
+    must be treated as read-only.
+    """
+    version: int = 0  # Increases by one per published change
+    agents: Mapping[str, AgentGroundState] = field(default_factory=lambda: MappingProxyType({}))
+    updated: Optional[datetime] = None  # When this version was published
+
+
 @dataclass
 class EngineState:
     """Internal state tracking for the engine"""
@@ -0,0 +1,152 @@
+"""
+Session Ownership Index - Remembers which agent each session file belongs to
+
+Detecting a session's owner means opening the file and sniffing up to 10KB
+of its head. The result is cached per file, keyed by (path, inode, size,
+mtime), and persisted to a small JSON file so a restart doesn't re-sniff
+hundreds of historical sessions.
+
+Session files are append-only, so a file that grew on the same inode keeps
+its known owner without being re-read.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+# Next to the engine's pid file (era-1/game/)
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent / ".session_owners.json"
+
+
+@dataclass
+class SessionFile:
+    """A session file seen by the last directory scan"""
+    path: Path
+    mtime: float
+    owner: Optional[str]
+
+
+class SessionOwnershipIndex:
+    """
+    Cached session file -> owning agent mapping
+    
+    Usage:
+        index = SessionOwnershipIndex(detect_owner)
+        for session in index.scan(sessions_dir, agent_names, skip=is_symlink_name):
+            ...
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, detect: Callable[[Path], Optional[str]],
+                 cache_path: Optional[Path] = DEFAULT_CACHE_PATH):
+        """
+        Args:
+            detect: Sniffs a file and returns its owning agent (or None)
+            cache_path: JSON file persisting the index (None = memory only)
+        """
+        self.detect = detect
+        self.cache_path = cache_path
+        
+        # path -> [inode, size, mtime_ns, owner, agents_key]
+        self._entries: Dict[str, list] = {}
+        self._dirty = False
+        
+        self.files_sniffed = 0
+        
+        self._load()
+    
+    def scan(self, sessions_dir: Path, agent_names: Iterable[str],
+             skip: Callable[[str], bool] = lambda name: False) -> List[SessionFile]:
+        """
+        List session files with their owners in one os.scandir pass
+        
+        Only new or changed files are sniffed. Files with no detected owner
+        are re-sniffed when the set of known agents changes.
+        
+        Args:
+            sessions_dir: Directory holding session JSONL files
+            agent_names: Currently known agents
+            skip: Filenames to ignore (e.g. agent symlinks)
+        """
+        agents_key = ",".join(sorted(agent_names))
+        files = []
+        seen = set()
+        
+        with os.scandir(sessions_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.jsonl') or skip(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                
+                key = os.path.join(str(sessions_dir), entry.name)
+                seen.add(key)
+                owner = self._owner(key, Path(key), st, agents_key)
+                files.append(SessionFile(Path(key), st.st_mtime, owner))
+        
+        # Forget deleted files
+        for key in set(self._entries) - seen:
+            if key.startswith(os.path.join(str(sessions_dir), '')):
+                del self._entries[key]
+                self._dirty = True
+        
+        self.save()
+        return files
+    
+    def _owner(self, key: str, path: Path, st: os.stat_result, agents_key: str) -> Optional[str]:
+        cached = self._entries.get(key)
+        if cached:
+            inode, size, mtime_ns, owner, cached_agents = cached
+            if (inode, size, mtime_ns) == (st.st_ino, st.st_size, st.st_mtime_ns):
+                if owner or cached_agents == agents_key:
+                    return owner
+            elif owner and inode == st.st_ino and st.st_size >= size:
+                # Appended to - the head (and so the owner) is unchanged.
+                # Not marked dirty: active sessions grow every poll, and a
+                # stale size on disk takes this same path after a restart.
+                self._entries[key] = [st.st_ino, st.st_size, st.st_mtime_ns, owner, agents_key]
+                return owner
+        
+        try:
+            owner = self.detect(path)
+        except Exception:
+            owner = None
+        self.files_sniffed += 1
+        
+        self._entries[key] = [st.st_ino, st.st_size, st.st_mtime_ns, owner, agents_key]
+        self._dirty = True
+        return owner
+    
+    # Persistence
+    
+    def _load(self):
+        if not self.cache_path:
+            return
+        try:
+            data = json.loads(self.cache_path.read_text())
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get('version') == self.VERSION:
+            self._entries = {k: v for k, v in data.get('files', {}).items()
+                             if isinstance(v, list) and len(v) == 5}
+    
+    def save(self):
+        """Write the index if it changed (atomic replace, best effort)"""
+        if not self.cache_path or not self._dirty:
+            return
+        
+        tmp_path = self.cache_path.with_name(self.cache_path.name + '.tmp')
+        try:
+            tmp_path.write_text(json.dumps({'version': self.VERSION, 'files': self._entries}))
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            return
+        self._dirty = False
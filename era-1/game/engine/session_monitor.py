@@ -1,49 +1,57 @@
 """
-Simplified Session Monitor - Only tracks known agent symlinks
+Simplified Session Monitor - Only tracks registered agent symlinks
 """
 
 import os
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 import json
 
 from .models import SessionInfo
 from .jsonl_parser import JSONLParser
+from .agent_registry import AgentRegistry
+from .agent_detector import detector_for
+from .session_index import SessionOwnershipIndex, DEFAULT_CACHE_PATH
 
 
 class SessionMonitor:
     """
     Monitors agent session symlinks in _sessions/
     
-    Only tracks:
-    - CRITIC_current.jsonl
-    - ERA-1_current.jsonl  
-    - GOV_current.jsonl
-    - NEXUS_current.jsonl
+    Only tracks <AGENT>_current.jsonl symlinks discovered by the
+    AgentRegistry (e.g. CRITIC_current.jsonl, ERA-1_current.jsonl).
     
     Throws exceptions for any unexpected conditions.
     """
     
-    # Known agents and their symlink names
-    AGENT_SYMLINKS = {
-        'critic': 'CRITIC_current.jsonl',
-        'era-1': 'ERA-1_current.jsonl',
-        'gov': 'GOV_current.jsonl',
-        'nexus': 'NEXUS_current.jsonl'
-    }
-    
-    def __init__(self, sessions_dir: Path):
+    def __init__(self, sessions_dir: Path, registry: Optional[AgentRegistry] = None,
+                 ownership_cache: Optional[Path] = DEFAULT_CACHE_PATH):
         self.sessions_dir = sessions_dir
         self.parser = JSONLParser()
         
         if not self.sessions_dir.exists():
             raise FileNotFoundError(f"Sessions directory not found: {sessions_dir}")
+        
+        self.registry = registry or AgentRegistry(sessions_dir.parent, sessions_dir)
+        
+        # Which agent owns each session file, persisted across restarts
+        self.ownership = SessionOwnershipIndex(self._detect_agent_from_session, ownership_cache)
     
-    def scan_sessions(self) -> Dict[str, SessionInfo]:
+    @property
+    def agent_symlinks(self) -> Dict[str, str]:
+        """Registered agents and their symlink names"""
+        return self.registry.session_agents
+    
+    def scan_sessions(self, agent_names: Optional[Iterable[str]] = None,
+                      check_newer: bool = True) -> Dict[str, SessionInfo]:
         """
         Read current state from agent symlinks
         
+        Args:
+            agent_names: Only scan these agents (default: all known agents)
+            check_newer: Also look for session files newer than the symlinks
+        
         Returns:
             Dict mapping agent_name -> SessionInfo
             
@@ -57,7 +65,11 @@ class SessionMonitor:
         # Get modification time of newest symlink target
         newest_symlink_target_mtime = 0.0
         
-        for agent_name, symlink_name in self.AGENT_SYMLINKS.items():
+        if agent_names is None:
+            agent_names = self.agent_symlinks.keys()
+        
+        for agent_name in agent_names:
+            symlink_name = self.registry.symlink_name(agent_name)
             symlink_path = self.sessions_dir / symlink_name
             
             if not symlink_path.exists():
@@ -79,8 +91,11 @@ class SessionMonitor:
             target_mtime = target_path.stat().st_mtime
             newest_symlink_target_mtime = max(newest_symlink_target_mtime, target_mtime)
             
-            # Get just the last activity (optimized - reads only tail)
-            last_ts, _ = self.parser.extract_last_activity(target_path)
+            # Single tail scan shared with the engine (reads only appended bytes)
+            try:
+                snapshot = self.parser.snapshot(target_path)
+            except OSError:
+                snapshot = None
             
             # Create SessionInfo
             info = SessionInfo(
@@ -90,14 +105,16 @@ class SessionMonitor:
                 file_size=target_path.stat().st_size,
                 agent_name=agent_name,  # Use our known mapping
                 first_timestamp=None,  # Not needed for state monitoring
-                last_timestamp=last_ts,
-                line_count=0  # Not used by engine
+                last_timestamp=snapshot.last_timestamp if snapshot else None,
+                line_count=0,  # Not used by engine
+                snapshot=snapshot
             )
             
             sessions[agent_name] = info
         
         # Check for any JSONL files newer than our symlinks
-        self._check_for_newer_files(newest_symlink_target_mtime)
+        if check_newer:
+            self._check_for_newer_files(newest_symlink_target_mtime)
         
         return sessions
     
@@ -111,55 +128,57 @@ class SessionMonitor:
         Raises:
             RuntimeError: Only if we can't determine which agent owns a newer file
         """
-        # Group all JSONL files by agent based on content
-        agent_sessions = {agent: [] for agent in self.AGENT_SYMLINKS.keys()}
+        # Group all JSONL files by agent (owners cached, only new/changed files sniffed)
+        agent_symlinks = self.agent_symlinks
+        agent_sessions = {agent: [] for agent in agent_symlinks.keys()}
         unmatched_files = []
         
-        for file_path in self.sessions_dir.glob("*.jsonl"):
-            # Skip our known symlinks
-            if file_path.name in self.AGENT_SYMLINKS.values():
-                continue
-            
-            # Try to determine which agent this session belongs to
-            try:
-                # Read first few lines to find agent name
-                agent_name = self._detect_agent_from_session(file_path)
-                if agent_name and agent_name in agent_sessions:
-                    agent_sessions[agent_name].append(file_path)
-                else:
-                    unmatched_files.append(file_path)
-            except Exception:
-                # If we can't read the file, add to unmatched
-                unmatched_files.append(file_path)
+        session_files = self.ownership.scan(
+            self.sessions_dir, agent_symlinks.keys(),
+            skip=self.registry.agent_from_symlink  # Skip agent symlinks
+        )
+        mtimes = {session.path.name: session.mtime for session in session_files}
+        
+        for session in session_files:
+            if session.owner in agent_sessions:
+                agent_sessions[session.owner].append(session)
+            else:
+                unmatched_files.append(session)
         
         # For each agent, check if there's a newer session than current symlink
         updates_made = False
-        for agent_name, session_files in agent_sessions.items():
-            if not session_files:
+        for agent_name, owned in agent_sessions.items():
+            if not owned:
                 continue
                 
             # Find newest session for this agent
-            newest_session = max(session_files, key=lambda p: p.stat().st_mtime)
+            newest_session = max(owned, key=lambda session: session.mtime)
             
-            # Get current symlink target
-            symlink_path = self.sessions_dir / self.AGENT_SYMLINKS[agent_name]
-            current_target = symlink_path.resolve() if symlink_path.exists() else None
+            # Get current symlink target (mtime from the scan when possible)
+            symlink_path = self.sessions_dir / agent_symlinks[agent_name]
+            try:
+                target_name = os.path.basename(os.readlink(symlink_path))
+                current_mtime = mtimes.get(target_name)
+                if current_mtime is None:
+                    current_mtime = symlink_path.stat().st_mtime
+            except OSError:
+                current_mtime = None
             
             # Update symlink if newer session exists
-            if not current_target or newest_session.stat().st_mtime > current_target.stat().st_mtime:
-                print(f"  Auto-updating {agent_name} symlink: {newest_session.name}")
+            if current_mtime is None or newest_session.mtime > current_mtime:
+                print(f"  Auto-updating {agent_name} symlink: {newest_session.path.name}")
                 
                 # Remove old symlink if exists
-                if symlink_path.exists():
+                if symlink_path.is_symlink():
                     symlink_path.unlink()
                 
                 # Create new symlink
-                symlink_path.symlink_to(newest_session.name)
+                symlink_path.symlink_to(newest_session.path.name)
                 updates_made = True
         
         # Only raise error if we have unmatched files that are newer
-        newer_unmatched = [f for f in unmatched_files 
-                          if f.stat().st_mtime > newest_symlink_mtime]
+        newer_unmatched = [session.path for session in unmatched_files
+                           if session.mtime > newest_symlink_mtime]
         
         if newer_unmatched and not updates_made:
             raise RuntimeError(
@@ -182,6 +201,7 @@ class SessionMonitor:
             bytes_read = 0
             max_lines = 50
             max_bytes = 10240
+            detector = detector_for(self.agent_symlinks)
             
             with open(file_path, 'r') as f:
                 while lines_read < max_lines and bytes_read < max_bytes:
@@ -210,23 +230,10 @@ class SessionMonitor:
                                     if isinstance(item, dict) and item.get('type') == 'text':
                                         content += item.get('text', '')
                             
-                            # Check for our known agents in the content
-                            for agent_lower, agent_upper in [
-                                ('critic', 'CRITIC'),
-                                ('era-1', 'ERA-1'),
-                                ('gov', 'GOV'),
-                                ('nexus', 'NEXUS')
-                            ]:
-                                # Check various patterns
-                                if any(pattern in content for pattern in [
-                                    f'@{agent_upper}',
-                                    f'I am {agent_upper}',
-                                    f"I'm {agent_upper}",
-                                    f'{agent_upper}.md',
-                                    f'agent/{agent_lower}/',
-                                    f'bootstrap protocol for @{agent_upper}',
-                                ]):
-                                    return agent_lower
+                            # Check for registered agents in the content
+                            match = detector.detect(content)
+                            if match:
+                                return match.agent
                     except:
                         # If JSON parsing fails, continue to next line
                         pass
@@ -0,0 +1,117 @@
+"""
+State Changes - Per-agent field diffs pushed to observers
+
+After each cycle the engine diffs the new agent states against the previous
+ones and hands observers one AgentStateChange per agent that actually
+changed, so UIs redraw only what moved instead of polling everything.
+
+StateObserver mirrors architecture/core_interfaces.StateObserver (state
+transitions and context thresholds) and adds on_agent_changed for the full
+field diff. All callbacks run on the engine's thread.
+"""
+
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .models import AgentGroundState, AgentState
+from .state_writer import StateWriter
+
+
+# Context percentages that fire on_context_threshold when crossed upwards
+CONTEXT_THRESHOLDS = (50.0, 70.0, 85.0, 95.0)
+
+# Fields refreshed every cycle whatever happened - never a change on their own
+VOLATILE_FIELDS = StateWriter.VOLATILE_KEYS
+
+
+@dataclass(frozen=True)
+class AgentStateChange:
+    """One agent's difference between two engine cycles"""
+    agent: str
+    old: Optional[AgentGroundState]  # None: agent is new
+    new: Optional[AgentGroundState]  # None: agent was removed
+    fields: Dict[str, Tuple[Any, Any]]  # name -> (old value, new value)
+    
+    @property
+    def state_changed(self) -> bool:
+        return 'state' in self.fields
+    
+    @property
+    def crossed_threshold(self) -> Optional[float]:
+        """Highest threshold the context percent rose past, if any"""
+        if 'context_percent' not in self.fields:
+            return None
+        old, new = self.fields['context_percent']
+        crossed = [t for t in CONTEXT_THRESHOLDS if (old or 0) < t <= (new or 0)]
+        return crossed[-1] if crossed else None
+
+
+class StateObserver:
+    """
+    Receives engine state changes (override what you need)
+    
+    Register with ThreadedStateEngine.subscribe(); callbacks are made from
+    the engine thread, so UIs must hand them over to their own loop.
+    """
+    
+    def on_agent_changed(self, change: AgentStateChange):
+        """Called for every agent whose state fields changed"""
+        pass
+    
+    def on_agent_state_changed(self, agent_name: str, old_state: Optional[AgentState],
+                               new_state: Optional[AgentState]):
+        """Called when agent transitions states"""
+        pass
+    
+    def on_context_threshold(self, agent_name: str, percent: float):
+        """Called when context usage crosses thresholds"""
+        pass
+
+
+def diff_agent_state(agent: str, old: Optional[AgentGroundState],
+                     new: Optional[AgentGroundState]) -> Optional[AgentStateChange]:
+    """Field diff for one agent (volatile fields ignored), None if nothing changed"""
+    if old == new:
+        return None
+    
+    changed = {}
+    for f in fields(AgentGroundState):
+        if f.name in VOLATILE_FIELDS:
+            continue
+        old_value = getattr(old, f.name) if old else None
+        new_value = getattr(new, f.name) if new else None
+        if old_value != new_value:
+            changed[f.name] = (old_value, new_value)
+    if not changed and old and new:
+        return None
+    return AgentStateChange(agent, old, new, changed)
+
+
+def diff_agent_states(old: Dict[str, AgentGroundState],
+                      new: Dict[str, AgentGroundState]) -> List[AgentStateChange]:
+    """Changes between two {agent: state} maps (agents missing from new are removed)"""
+    changes = []
+    for agent in sorted(old.keys() | new.keys()):
+        change = diff_agent_state(agent, old.get(agent), new.get(agent))
+        if change:
+            changes.append(change)
+    return changes
+
+
+def notify_observers(observers: Iterable[StateObserver], changes: List[AgentStateChange]):
+    """Deliver changes; a failing observer doesn't stop the others or the engine"""
+    for observer in list(observers):
+        for change in changes:
+            try:
+                observer.on_agent_changed(change)
+                if change.state_changed:
+                    observer.on_agent_state_changed(
+                        change.agent,
+                        change.old.state if change.old else None,
+                        change.new.state if change.new else None
+                    )
+                threshold = change.crossed_threshold
+                if threshold is not None:
+                    observer.on_context_threshold(change.agent, change.new.context_percent)
+            except Exception as e:
+                print(f"State observer error ({type(observer).__name__}): {e}")
@@ -1,38 +1,60 @@
 """
-Simplified State Engine - Works with known agent symlinks only
+Simplified State Engine - Works with the agents found by AgentRegistry
 """
 
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Set
 
-from .models import AgentState, AgentGroundState
+from .models import AgentState, AgentGroundState, SessionInfo
 from .session_monitor import SessionMonitor
-from .jsonl_parser import JSONLParser
 from .state_writer import StateWriter
 from .prompt_generator import PromptGenerator
 from .git_monitor import GitMonitor
 from .logout_handler import LogoutHandler
 from .tmux_handler import TmuxHandler
+from .change_watcher import ChangeWatcher
+from .agent_registry import AgentRegistry
 
 
 class StateEngine:
     """
     Simplified state management engine
     
-    Only processes the 4 known agent symlinks.
+    Processes agents with a session symlink (see AgentRegistry).
     Throws exceptions for any unexpected conditions.
+    
+    Agents can be processed concurrently (max_workers > 1); each agent's
+    work is serialised by a per-agent lock and logouts run on a dedicated
+    worker so they never block a cycle.
     """
     
-    def __init__(self, project_root: Path, sessions_dir: Path, poll_interval: int = 1):
+    # Full rescan interval in event-driven mode (seconds)
+    RESCAN_INTERVAL = 30.0
+    
+    def __init__(self, project_root: Path, sessions_dir: Path, poll_interval: int = 1,
+                 max_workers: int = 1):
+        """
+        Args:
+            project_root: Repository root containing agent directories
+            sessions_dir: Directory holding session JSONL files and symlinks
+            poll_interval: Seconds between polls when not event-driven
+            max_workers: Agents processed concurrently per cycle (1 = sequential)
+        """
         self.project_root = project_root
         self.sessions_dir = sessions_dir
         self.poll_interval = poll_interval
+        self.max_workers = max(1, max_workers)
         
         # Initialize components
-        self.monitor = SessionMonitor(sessions_dir)
-        self.parser = JSONLParser()
+        self.registry = AgentRegistry(project_root, sessions_dir)
+        self.monitor = SessionMonitor(sessions_dir, self.registry)
+        # Share the monitor's parser so each session file has one incremental reader
+        self.parser = self.monitor.parser
         self.writer = StateWriter(project_root)
         self.prompt_gen = PromptGenerator()
         self.git = GitMonitor(project_root)
@@ -43,46 +65,224 @@ class StateEngine:
         self.last_poll = None
         self.errors = []
         
-    def start(self):
-        """Start the state engine polling loop"""
+        # Authoritative agent states; _state.md is a write-behind projection
+        self.states: Dict[str, AgentGroundState] = {}
+        
+        # Concurrency: per-agent locks, agent pool, dedicated logout worker
+        self._agent_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._logout_worker: Optional[ThreadPoolExecutor] = None
+        self._logouts_in_flight: Set[str] = set()
+        self._logouts_lock = threading.Lock()
+        # Per-thread buffer of deferred _state.md writes during a concurrent cycle
+        self._local = threading.local()
+        
+        # Event-driven mode: agent -> wall time its session becomes idle
+        self._stale_deadlines: Dict[str, float] = {}
+        self._next_rescan = 0.0
+        
+    def start(self, event_driven: bool = True):
+        """
+        Start the state engine loop
+        
+        Args:
+            event_driven: Wait for inotify events instead of polling every
+                poll_interval (falls back to polling where unavailable)
+        """
         self.running = True
         print(f"State Engine starting - monitoring {self.sessions_dir}")
         
-        while self.running:
-            try:
-                self.poll_cycle()
-                time.sleep(self.poll_interval)
-            except KeyboardInterrupt:
-                print("\nState Engine stopped by user")
-                self.running = False
-            except Exception as e:
-                error_msg = f"Poll cycle error: {e}"
-                print(f"ERROR: {error_msg}")
-                self.errors.append(error_msg)
-                # Re-raise to fail fast
-                raise
+        watcher = self.create_watcher() if event_driven else None
+        if watcher:
+            print("  Event-driven mode (inotify)")
+        
+        try:
+            while self.running:
+                try:
+                    if watcher:
+                        self.event_cycle(watcher)
+                    else:
+                        self.poll_cycle()
+                        time.sleep(self.poll_interval)
+                except KeyboardInterrupt:
+                    print("\nState Engine stopped by user")
+                    self.running = False
+                except Exception as e:
+                    error_msg = f"Poll cycle error: {e}"
+                    print(f"ERROR: {error_msg}")
+                    self.errors.append(error_msg)
+                    # Re-raise to fail fast
+                    raise
+        finally:
+            if watcher:
+                watcher.close()
+    
+    def create_watcher(self) -> Optional[ChangeWatcher]:
+        """Create an inotify watcher over engine inputs, or None to poll"""
+        if not ChangeWatcher.available():
+            return None
+        
+        try:
+            return ChangeWatcher(self.project_root, self.sessions_dir, self.registry)
+        except OSError as e:
+            print(f"Warning: inotify unavailable ({e}) - falling back to polling")
+            return None
     
     def poll_cycle(self):
         """
         Single polling cycle - check all agents and update states
         
+        Raises exceptions for any unexpected conditions.
+        """
+        self.poll_agents(None)
+    
+    def poll_agents(self, agent_names: Optional[Iterable[str]], check_newer: bool = True):
+        """
+        Check the given agents (None for all) and update their states
+        
+        check_newer only applies to full scans, where every symlink
+        target's mtime is known.
+        
         Raises exceptions for any unexpected conditions.
         """
         self.last_poll = datetime.now()
         
+        # Pick up agents added/removed since the last cycle (mtime-gated)
+        self.registry.refresh()
+        
+        # Ingest any new commits once, before per-agent git queries
+        self.git.refresh()
+        
         # Get current sessions from symlinks
-        sessions = self.monitor.scan_sessions()
+        sessions = self.monitor.scan_sessions(
+            agent_names,
+            check_newer=check_newer and agent_names is None
+        )
+        
+        # Agents mid-logout are owned by the logout worker until it finishes
+        with self._logouts_lock:
+            in_flight = set(self._logouts_in_flight)
+        sessions = {name: info for name, info in sessions.items()
+                    if name not in in_flight}
+        
+        if self.max_workers > 1 and len(sessions) > 1:
+            self._process_concurrently(sessions)
+        else:
+            # Process each agent
+            for agent_name, session_info in sessions.items():
+                try:
+                    with self._agent_lock(agent_name):
+                        self.process_agent(agent_name, session_info)
+                except Exception as e:
+                    error_msg = f"Error processing {agent_name}: {e}"
+                    print(f"ERROR: {error_msg}")
+                    self.errors.append(error_msg)
+                    # Re-raise to fail fast
+                    raise
         
-        # Process each agent
         for agent_name, session_info in sessions.items():
+            # Active sessions need another look once they go idle, even if
+            # nothing else changes by then
+            if session_info.is_stale:
+                self._stale_deadlines.pop(agent_name, None)
+            else:
+                self._stale_deadlines[agent_name] = (
+                    session_info.last_modified.timestamp() + SessionInfo.STALE_SECONDS + 0.5
+                )
+    
+    def _process_concurrently(self, sessions: Dict[str, SessionInfo]):
+        """
+        Process agents on the bounded pool, then write _state.md files
+        
+        Writes are deferred and flushed in agent-name order once every
+        agent has finished, so file updates happen in the same order every
+        cycle regardless of which agent finished first. The first error (in
+        agent order) is re-raised after the flush.
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix="StateEngine-agent")
+        
+        futures = {
+            agent_name: self._pool.submit(self._process_deferred, agent_name, session_info)
+            for agent_name, session_info in sessions.items()
+        }
+        
+        pending_writes = {}
+        first_error = None
+        for agent_name in sorted(futures):
             try:
-                self.process_agent(agent_name, session_info)
+                pending_writes.update(futures[agent_name].result())
             except Exception as e:
                 error_msg = f"Error processing {agent_name}: {e}"
                 print(f"ERROR: {error_msg}")
                 self.errors.append(error_msg)
-                # Re-raise to fail fast
-                raise
+                first_error = first_error or e
+        
+        for agent_name in sorted(pending_writes):
+            with self._agent_lock(agent_name):
+                # Write the latest in-memory state (a logout may have moved on)
+                self.writer.write_agent_state(agent_name, self.states[agent_name])
+        
+        if first_error:
+            # Re-raise to fail fast
+            raise first_error
+    
+    def _process_deferred(self, agent_name: str, session_info: SessionInfo) -> Dict[str, AgentGroundState]:
+        """Run process_agent on a pool thread, collecting its writes"""
+        self._local.pending_writes = {}
+        try:
+            with self._agent_lock(agent_name):
+                self.process_agent(agent_name, session_info)
+            return self._local.pending_writes
+        finally:
+            self._local.pending_writes = None
+    
+    def _agent_lock(self, agent_name: str) -> threading.Lock:
+        """Lock serialising all work on one agent's state"""
+        with self._locks_guard:
+            lock = self._agent_locks.get(agent_name)
+            if lock is None:
+                lock = self._agent_locks[agent_name] = threading.Lock()
+            return lock
+    
+    def event_cycle(self, watcher: ChangeWatcher) -> bool:
+        """
+        Wait for input changes, then process only the affected agents
+        
+        Also wakes for sessions going idle and a periodic full rescan
+        (safety net for missed events).
+        
+        Returns:
+            True if any agents were processed
+        """
+        now = time.time()
+        wakeups = [self._next_rescan] + list(self._stale_deadlines.values())
+        changes = watcher.wait(max(0.0, min(wakeups) - now))
+        now = time.time()
+        
+        if now >= self._next_rescan or (changes and changes.all_agents):
+            self._next_rescan = now + self.RESCAN_INTERVAL
+            self.poll_agents(None, check_newer=True)
+            return True
+        
+        if changes and (changes.new_sessions or changes.registry_changed):
+            self.poll_agents(None, check_newer=True)
+            return True
+        
+        agents = {name for name, due in self._stale_deadlines.items() if due <= now}
+        if changes:
+            agents |= changes.agents
+            # Ignore events caused by our own _state.md writes
+            agents |= {name for name in changes.state_files
+                       if self.writer.changed_externally(name)}
+        
+        if not agents:
+            return False
+        
+        self.poll_agents(sorted(agents), check_newer=False)
+        return True
     
     def process_agent(self, agent_name: str, session_info):
         """
@@ -96,13 +296,14 @@ class StateEngine:
         print(f"  Session: {session_info.session_id}")
         print(f"  File: {Path(session_info.file_path).name}")
         
-        # Read current state first
-        current_state = self.writer.read_agent_state(agent_name)
-        if not current_state:
-            current_state = AgentGroundState()
+        # Work on a copy of the in-memory state; committed when written
+        current_state = replace(self.load_agent_state(agent_name))
+        
+        # One tail scan per cycle - usage, last activity and state decision
+        snapshot = session_info.snapshot or self.parser.snapshot(Path(session_info.file_path))
         
         # ALWAYS update context usage first (needed for state transitions)
-        context_info = self.parser.parse_context_usage(Path(session_info.file_path))
+        context_info = snapshot.usage
         
         # Store the OLD commit hash before updating
         old_commit_hash = current_state.last_write_commit_hash if current_state else None
@@ -160,19 +361,14 @@ class StateEngine:
                     current_state.context_percent = 0.0
                     # Set offline as expected next state
                     current_state.expected_next_state = AgentState.OFFLINE
-                    # Write state immediately before triggering logout
-                    self.writer.write_agent_state(agent_name, current_state)
+                    # Record state before triggering logout
+                    self._commit_state(agent_name, current_state)
                     
-                    # Trigger logout handler
+                    # Trigger logout handler (runs on its own worker - it sleeps for seconds)
                     tmux_session = agent_name  # Tmux session name is just agent name (e.g. 'era-1')
                     if self.logout_handler.check_tmux_session_exists(tmux_session):
                         print(f"  Triggering logout handler for {tmux_session}")
-                        success = self.logout_handler.handle_logout(agent_name, tmux_session)
-                        if success:
-                            # Update state to offline → bootstrap
-                            current_state.state = AgentState.OFFLINE
-                            current_state.expected_next_state = AgentState.BOOTSTRAP
-                            current_state.session_id = None  # Will be updated on next poll
+                        self._start_logout(agent_name, tmux_session)
                     else:
                         print(f"  WARNING: No tmux session '{tmux_session}' found")
         
@@ -202,7 +398,7 @@ class StateEngine:
             # Update session and write state
             current_state.session_id = session_info.session_id
             current_state.last_updated = datetime.now()
-            self.writer.write_agent_state(agent_name, current_state)
+            self._commit_state(agent_name, current_state)
             return
         
         # Context and git info already updated above
@@ -216,7 +412,7 @@ class StateEngine:
             print(f"  Session is idle - checking for state transitions")
             
             try:
-                decisions = self.parser.parse_state_decisions(Path(session_info.file_path))
+                decisions = [snapshot.decision] if snapshot.decision else []
                 
                 if decisions:
                     latest = decisions[-1]
@@ -267,9 +463,89 @@ class StateEngine:
             print(f"  Session active - metadata updated, state unchanged")
         
         # Always write updated state
-        self.writer.write_agent_state(agent_name, current_state)
+        self._commit_state(agent_name, current_state)
         print(f"  Updated _state.md")
     
+    def load_agent_state(self, agent_name: str) -> AgentGroundState:
+        """
+        Current in-memory state for an agent
+        
+        Memory is the source of truth; _state.md is only read on first use
+        or when it changed underneath us (e.g. a manual edit).
+        """
+        state = self.states.get(agent_name)
+        if state is None or self.writer.changed_externally(agent_name):
+            state = self.writer.read_agent_state(agent_name) or AgentGroundState()
+            self.states[agent_name] = state
+        return state
+    
+    def get_agent_states(self) -> Dict[str, AgentGroundState]:
+        """Copies of all in-memory agent states (safe to hand to other threads)"""
+        return {name: replace(state) for name, state in self.states.items()}
+    
+    def _commit_state(self, agent_name: str, state: AgentGroundState):
+        """
+        Make state authoritative in memory and project it to _state.md
+        
+        During a concurrent cycle the file write is deferred until the
+        ordered flush at the end of the cycle.
+        """
+        self.states[agent_name] = state
+        
+        pending_writes = getattr(self._local, 'pending_writes', None)
+        if pending_writes is not None:
+            pending_writes[agent_name] = state
+        else:
+            self.writer.write_agent_state(agent_name, state)
+    
+    def _start_logout(self, agent_name: str, tmux_session: str):
+        """Hand an agent's logout → bootstrap automation to the logout worker"""
+        with self._logouts_lock:
+            if agent_name in self._logouts_in_flight:
+                return
+            self._logouts_in_flight.add(agent_name)
+        
+        if self._logout_worker is None:
+            self._logout_worker = ThreadPoolExecutor(max_workers=1,
+                                                     thread_name_prefix="StateEngine-logout")
+        
+        self._logout_worker.submit(self._run_logout, agent_name, tmux_session)
+    
+    def _run_logout(self, agent_name: str, tmux_session: str):
+        """Logout worker: restart the agent's session, then record the result"""
+        try:
+            # Make sure LOGOUT is on disk before /exit (waits for the cycle to finish)
+            with self._agent_lock(agent_name):
+                self.writer.write_agent_state(agent_name, self.states[agent_name])
+            
+            success = self.logout_handler.handle_logout(agent_name, tmux_session)
+            
+            if success:
+                with self._agent_lock(agent_name):
+                    # Update state to offline → bootstrap
+                    state = replace(self.states[agent_name])
+                    state.state = AgentState.OFFLINE
+                    state.expected_next_state = AgentState.BOOTSTRAP
+                    state.session_id = None  # Will be updated on next poll
+                    self._commit_state(agent_name, state)
+        except Exception as e:
+            error_msg = f"Logout error for {agent_name}: {e}"
+            print(f"ERROR: {error_msg}")
+            self.errors.append(error_msg)
+        finally:
+            with self._logouts_lock:
+                self._logouts_in_flight.discard(agent_name)
+    
     def stop(self):
         """Stop the state engine"""
-        self.running = False
\ No newline at end of file
+        self.running = False
+        
+        # Let an in-progress logout finish; don't start queued agent work
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._logout_worker:
+            self._logout_worker.shutdown(wait=False)
+            self._logout_worker = None
+        
+        self.git.close()
\ No newline at end of file
@@ -0,0 +1,345 @@
+"""
+State Protocol - Wire format and clients for the state engine daemon
+
+One StateEngineDaemon (threaded_engine.py) owns the engine; dashboards and
+tools connect to its Unix socket instead of each running their own.
+
+Frames are a 4-byte big-endian length followed by compact JSON. Requests
+carry an "op":
+- snapshot:  -> {"op": "snapshot", "version": N, "agents": {name: state}}
+- status:    -> {"op": "status", "status": {...}}
+- poll:      -> {"op": "ok"} once a forced poll cycle finished
+- ping:      -> {"op": "pong", "version": N}
+- subscribe: -> a snapshot, then {"op": "update", "version": N,
+  "agents": {changed}, "removed": [names]} whenever agent state changes
+Failures come back as {"op": "error", "error": "..."}.
+"""
+
+import json
+import socket
+import struct
+import threading
+from dataclasses import fields
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .models import AgentGroundState, AgentState, EngineSnapshot
+from .state_changes import StateObserver, diff_agent_state, notify_observers
+
+
+# Next to the engine's pid file (era-1/game/)
+DEFAULT_SOCKET_PATH = Path(__file__).parent.parent / ".rtfw-engine.sock"
+
+HEADER = struct.Struct('>I')
+
+# Largest frame either side accepts
+MAX_FRAME = 16 * 1024 * 1024
+
+
+class ProtocolError(Exception):
+    """Malformed frame or unexpected reply"""
+
+
+# Framing
+
+def encode_frame(message: Dict[str, Any]) -> bytes:
+    payload = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(len(payload)) + payload
+
+
+class FrameDecoder:
+    """Incremental frame parser for non-blocking reads"""
+    
+    def __init__(self):
+        self._buffer = bytearray()
+    
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """
+        Add received bytes
+        
+        Returns:
+            Every message completed by them
+        
+        Raises:
+            ProtocolError: On an oversized or undecodable frame
+        """
+        self._buffer += data
+        messages = []
+        while len(self._buffer) >= HEADER.size:
+            (length,) = HEADER.unpack_from(self._buffer)
+            if length > MAX_FRAME:
+                raise ProtocolError(f"Frame too large: {length} bytes")
+            if len(self._buffer) < HEADER.size + length:
+                break
+            payload = bytes(self._buffer[HEADER.size:HEADER.size + length])
+            del self._buffer[:HEADER.size + length]
+            try:
+                messages.append(json.loads(payload))
+            except ValueError as e:
+                raise ProtocolError(f"Bad frame: {e}")
+        return messages
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]):
+    sock.sendall(encode_frame(message))
+
+
+def recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    """Read one message from a blocking socket, None when the peer closed"""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME:
+        raise ProtocolError(f"Frame too large: {length} bytes")
+    payload = _recv_exactly(sock, length)
+    if payload is None:
+        raise ProtocolError("Connection closed mid-frame")
+    try:
+        return json.loads(payload)
+    except ValueError as e:
+        raise ProtocolError(f"Bad frame: {e}")
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return bytes(data)
+
+
+# Agent state encoding
+
+_DATETIME_FIELDS = {f.name for f in fields(AgentGroundState) if 'datetime' in str(f.type)}
+_STATE_FIELDS = {f.name for f in fields(AgentGroundState) if 'AgentState' in str(f.type)}
+
+
+def encode_state(state: AgentGroundState) -> Dict[str, Any]:
+    """AgentGroundState as a JSON-safe dict"""
+    data = {}
+    for f in fields(state):
+        value = getattr(state, f.name)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif isinstance(value, AgentState):
+            value = value.value
+        data[f.name] = value
+    return data
+
+
+def decode_state(data: Dict[str, Any]) -> AgentGroundState:
+    """Inverse of encode_state (unknown keys are ignored)"""
+    values = {}
+    for f in fields(AgentGroundState):
+        if f.name not in data:
+            continue
+        value = data[f.name]
+        if value is not None and f.name in _DATETIME_FIELDS:
+            value = datetime.fromisoformat(value)
+        elif value is not None and f.name in _STATE_FIELDS:
+            value = AgentState(value)
+        values[f.name] = value
+    return AgentGroundState(**values)
+
+
+# Clients
+
+class StateClient:
+    """
+    Blocking request/response connection to the daemon
+    
+    Usage:
+        with StateClient() as client:
+            version, agents = client.snapshot()
+    
+    Raises OSError (usually ConnectionRefusedError/FileNotFoundError) when
+    no daemon is listening.
+    """
+    
+    def __init__(self, socket_path: Path = DEFAULT_SOCKET_PATH, timeout: Optional[float] = 2.0):
+        self.socket_path = Path(socket_path)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(str(self.socket_path))
+        except OSError:
+            self.sock.close()
+            raise
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def close(self):
+        self.sock.close()
+    
+    def request(self, op: str, **params) -> Dict[str, Any]:
+        """Send one request and return its reply"""
+        send_message(self.sock, {'op': op, **params})
+        reply = recv_message(self.sock)
+        if reply is None:
+            raise ProtocolError("Daemon closed the connection")
+        if reply.get('op') == 'error':
+            raise ProtocolError(reply.get('error', 'unknown error'))
+        return reply
+    
+    def snapshot(self) -> Tuple[int, Dict[str, AgentGroundState]]:
+        """(version, all agent states)"""
+        reply = self.request('snapshot')
+        return reply['version'], {name: decode_state(data) for name, data in reply['agents'].items()}
+    
+    def status(self) -> Dict[str, Any]:
+        return self.request('status')['status']
+    
+    def poll(self):
+        """Ask the daemon for an immediate poll cycle (returns when done)"""
+        self.request('poll')
+    
+    def subscribe(self) -> Iterator[Tuple[int, Dict[str, AgentGroundState], List[str]]]:
+        """
+        Stream state changes (this connection is used up by the stream)
+        
+        Yields:
+            (version, changed agent states, removed agent names); the first
+            item is the full snapshot
+        """
+        send_message(self.sock, {'op': 'subscribe'})
+        self.sock.settimeout(None)
+        while True:
+            message = recv_message(self.sock)
+            if message is None:
+                return
+            op = message.get('op')
+            if op == 'error':
+                raise ProtocolError(message.get('error', 'unknown error'))
+            if op in ('snapshot', 'update'):
+                agents = {name: decode_state(data) for name, data in message['agents'].items()}
+                yield message['version'], agents, message.get('removed', [])
+
+
+def daemon_available(socket_path: Path = DEFAULT_SOCKET_PATH) -> bool:
+    """Check whether a daemon is accepting connections"""
+    try:
+        StateClient(socket_path, timeout=0.5).close()
+        return True
+    except OSError:
+        return False
+
+
+class RemoteStateEngine:
+    """
+    ThreadedStateEngine stand-in fed by a daemon subscription
+    
+    Offers the same accessors (get_all_agents, get_agent_state, get_status,
+    force_poll, subscribe, snapshot, ...) so UIs can use either. State is
+    mirrored locally as EngineSnapshots carrying the daemon's versions, so
+    reads never touch the socket or a lock.
+    """
+    
+    def __init__(self, socket_path: Path = DEFAULT_SOCKET_PATH):
+        self.socket_path = Path(socket_path)
+        self.thread: Optional[threading.Thread] = None
+        self._client: Optional[StateClient] = None
+        self._snapshot = EngineSnapshot()
+        self._observers: List[StateObserver] = []
+        self._running = False
+    
+    def start(self):
+        """Connect and load the current snapshot (raises OSError if no daemon)"""
+        if self._running:
+            return
+        self._client = StateClient(self.socket_path)
+        stream = self._client.subscribe()
+        # Initial snapshot before returning, so the first render has data
+        self._apply(*next(stream))
+        self._running = True
+        
+        self.thread = threading.Thread(target=self._follow, args=(stream,),
+                                       name="StateEngine-remote", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self._running = False
+        if self._client:
+            try:
+                self._client.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._client.close()
+            self._client = None
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+    
+    def _follow(self, stream: Iterator):
+        try:
+            for update in stream:
+                self._apply(*update)
+        except (OSError, ProtocolError) as e:
+            if self._running:
+                print(f"Lost connection to state engine daemon: {e}")
+        finally:
+            self._running = False
+    
+    def subscribe(self, observer: StateObserver):
+        """Push per-agent changes to observer (from the subscription thread)"""
+        if observer not in self._observers:
+            self._observers.append(observer)
+    
+    def unsubscribe(self, observer: StateObserver):
+        if observer in self._observers:
+            self._observers.remove(observer)
+    
+    def _apply(self, version: int, agents: Dict[str, AgentGroundState], removed: List[str]):
+        """Publish the daemon's update as a new snapshot (subscription thread only)"""
+        current = self._snapshot
+        changes = [diff_agent_state(name, current.agents.get(name), state)
+                   for name, state in agents.items()]
+        changes += [diff_agent_state(name, current.agents[name], None)
+                    for name in removed if name in current.agents]
+        
+        states = dict(current.agents)
+        states.update(agents)
+        for name in removed:
+            states.pop(name, None)
+        self._snapshot = EngineSnapshot(version, MappingProxyType(states), datetime.now())
+        
+        notify_observers(self._observers, [change for change in changes if change])
+    
+    # Same accessors as ThreadedStateEngine
+    
+    def snapshot(self) -> EngineSnapshot:
+        return self._snapshot
+    
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+    
+    def changed_since(self, version: int) -> bool:
+        return self._snapshot.version != version
+    
+    def get_agent_state(self, agent_name: str) -> Optional[AgentGroundState]:
+        return self._snapshot.agents.get(agent_name)
+    
+    def get_all_agents(self) -> Dict[str, AgentGroundState]:
+        return dict(self._snapshot.agents)
+    
+    def get_status(self) -> Dict:
+        with StateClient(self.socket_path) as client:
+            return client.status()
+    
+    def is_running(self) -> bool:
+        return self._running
+    
+    def force_poll(self):
+        with StateClient(self.socket_path, timeout=None) as client:
+            client.poll()
+    
+    def get_engine_errors(self) -> list:
+        return self.get_status().get('errors', [])
@@ -4,6 +4,8 @@ State Writer - Atomically updates agent _state.md files
 
 import os
 import tempfile
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
@@ -19,30 +21,89 @@ class StateWriter:
     - Atomic updates (no partial writes)
     - Consistent formatting
     - Backup on error
+    - No rewrite when only volatile fields (last_updated) changed, unless
+      min_refresh_interval has passed since the last real write
     """
     
-    def __init__(self, project_root: Path):
+    # Lines that change every cycle without meaning anything changed
+    VOLATILE_KEYS = ('last_updated',)
+    
+    def __init__(self, project_root: Path, min_refresh_interval: float = 60.0):
+        """
+        Args:
+            project_root: Repository root containing agent directories
+            min_refresh_interval: Seconds before an otherwise unchanged file
+                is rewritten just to refresh last_updated (0 = every call)
+        """
         self.project_root = project_root
+        self.min_refresh_interval = min_refresh_interval
+        
+        # agent_name -> (inode, mtime_ns) of the file we last wrote,
+        # so watchers can tell our own writes from external edits
+        self._last_written = {}
+        
+        # agent_name -> (canonical content, time.monotonic() of write)
+        self._last_canonical = {}
+        
+        # Write counters (agents may be written from several threads)
+        self.writes_performed = 0
+        self.writes_skipped = 0
+        self._stats_lock = threading.Lock()
+    
+    def _canonical(self, content: str) -> str:
+        """Content with volatile lines removed, for change detection"""
+        return '\n'.join(
+            line for line in content.split('\n')
+            if line.split(':', 1)[0] not in self.VOLATILE_KEYS
+        )
+    
+    def _is_noop(self, agent_name: str, canonical: str) -> bool:
+        """Check if writing canonical content would change nothing that matters"""
+        previous = self._last_canonical.get(agent_name)
+        if not previous or previous[0] != canonical:
+            return False
+        
+        if time.monotonic() - previous[1] >= self.min_refresh_interval:
+            return False
+        
+        # Rewrite if someone else touched the file since our last write
+        return not self.changed_externally(agent_name)
+    
+    def get_write_stats(self) -> dict:
+        """Counts of performed and skipped _state.md writes"""
+        return {
+            'performed': self.writes_performed,
+            'skipped': self.writes_skipped
+        }
     
     def write_agent_state(self, agent_name: str, state: AgentGroundState) -> bool:
         """
         Atomically write agent state to _state.md file
         
+        Skipped (and counted) when nothing but volatile fields changed since
+        the last write and min_refresh_interval hasn't passed.
+        
         Args:
             agent_name: Name of agent (e.g., 'era-1', 'gov')
             state: Ground state to write
             
         Returns:
-            True if successful, False on error
+            True if successful (or skipped as a no-op), False on error
         """
         # Determine file path
         state_file = self.project_root / agent_name / "_state.md"
         
-        # Ensure directory exists
-        state_file.parent.mkdir(exist_ok=True)
-        
         # Generate content
         content = state.to_state_file_content(agent_name)
+        canonical = self._canonical(content)
+        
+        if self._is_noop(agent_name, canonical):
+            with self._stats_lock:
+                self.writes_skipped += 1
+            return True
+        
+        # Ensure directory exists
+        state_file.parent.mkdir(exist_ok=True)
         
         try:
             # Write atomically using temp file + rename
@@ -59,6 +120,12 @@ class StateWriter:
             # Atomic rename
             os.replace(tmp_path, state_file)
             
+            stat = os.stat(state_file)
+            self._last_written[agent_name] = (stat.st_ino, stat.st_mtime_ns)
+            self._last_canonical[agent_name] = (canonical, time.monotonic())
+            with self._stats_lock:
+                self.writes_performed += 1
+            
             return True
             
         except Exception as e:
@@ -79,6 +146,21 @@ class StateWriter:
             
             return False
     
+    def changed_externally(self, agent_name: str) -> bool:
+        """
+        Check if _state.md differs from what this writer last wrote
+        
+        Returns True for files we have never written or that someone else
+        has replaced or edited since.
+        """
+        state_file = self.project_root / agent_name / "_state.md"
+        try:
+            stat = os.stat(state_file)
+        except FileNotFoundError:
+            return agent_name in self._last_written
+        
+        return self._last_written.get(agent_name) != (stat.st_ino, stat.st_mtime_ns)
+    
     def read_agent_state(self, agent_name: str) -> Optional[AgentGroundState]:
         """
         Read current agent state from _state.md file
@@ -1,15 +1,26 @@
 """
 Threaded State Engine - Runs in background thread with shared state access
+
+StateEngineDaemon puts one ThreadedStateEngine behind a Unix socket so any
+number of dashboards and tools can share it (see state_protocol.py).
 """
 
+import selectors
+import socket
 import threading
 import time
+from concurrent.futures import Future
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Optional
+from types import MappingProxyType
+from typing import Callable, Dict, List, Optional
 
 from .state_engine import StateEngine
-from .models import AgentGroundState
+from .models import AgentGroundState, EngineSnapshot
+from .change_watcher import ChangeWatcher
+from .state_changes import StateObserver, diff_agent_states, notify_observers
+from .state_protocol import (DEFAULT_SOCKET_PATH, FrameDecoder, ProtocolError,
+                             encode_frame, encode_state)
 
 
 class ThreadedStateEngine:
@@ -18,28 +29,70 @@ class ThreadedStateEngine:
     
     Provides thread-safe access to current agent states for TUI/GUI
     Easy to later split into separate daemon process
+    
+    Readers never lock: each cycle that changes anything publishes a new
+    immutable EngineSnapshot with one reference assignment, and accessors
+    read whichever snapshot is current.
+    
+    Only one thread ever runs engine cycles: while the engine thread is up,
+    force_poll() hands it the poll and waits, otherwise the caller polls
+    under the same cycle lock the engine thread holds while running.
     """
     
-    def __init__(self, project_root: Path, sessions_dir: Path, poll_interval: int = 1):
+    def __init__(self, project_root: Path, sessions_dir: Path, poll_interval: int = 1,
+                 event_driven: bool = True, max_workers: int = 1):
         # Core engine
-        self.engine = StateEngine(project_root, sessions_dir, poll_interval)
+        self.engine = StateEngine(project_root, sessions_dir, poll_interval, max_workers)
+        self.event_driven = event_driven
         
         # Thread management
         self.thread: Optional[threading.Thread] = None
+        self._watcher: Optional[ChangeWatcher] = None
         self._stop_event = threading.Event()
-        self._state_lock = threading.RLock()
         
-        # Shared state - updated by engine thread, read by TUI
-        self._agent_states: Dict[str, AgentGroundState] = {}
+        # Shared state - replaced (never modified) by the engine thread, read by TUI
+        self._snapshot = EngineSnapshot()
         self._last_update: Optional[datetime] = None
+        
+        # Serialises publishers (engine thread and force_poll callers) only
+        self._publish_lock = threading.Lock()
         self._running = False
         
+        # Held by whichever thread runs engine cycles
+        self._cycle_lock = threading.RLock()
+        # Forced polls waiting for the engine thread (None: not taking any)
+        self._poll_requests: Optional[List[Future]] = None
+        self._requests_lock = threading.Lock()
+        # Wakes the engine thread between polls in polling mode
+        self._wakeup = threading.Event()
+        
+        # Called from the engine thread after each shared state update
+        self._listeners: List[Callable[[], None]] = []
+        self._observers: List[StateObserver] = []
+        
+    def add_listener(self, callback: Callable[[], None]):
+        """Register callback() to run (on the engine thread) after every state update"""
+        self._listeners.append(callback)
+    
+    def subscribe(self, observer: StateObserver):
+        """Push per-agent changes to observer after each cycle (engine thread)"""
+        if observer not in self._observers:
+            self._observers.append(observer)
+    
+    def unsubscribe(self, observer: StateObserver):
+        if observer in self._observers:
+            self._observers.remove(observer)
+    
     def start(self):
         """Start the engine in a background thread"""
         if self.thread and self.thread.is_alive():
             return
         
         self._stop_event.clear()
+        self._wakeup.clear()
+        # Forced polls go to the engine thread from now on
+        with self._requests_lock:
+            self._poll_requests = []
         self._running = True
         
         # Start engine thread
@@ -57,71 +110,153 @@ class ThreadedStateEngine:
         self._stop_event.set()
         self._running = False
         
+        # Interrupt a blocking inotify wait or poll interval
+        self._wakeup.set()
+        if self._watcher:
+            self._watcher.wake()
+        
         if self.thread and self.thread.is_alive():
             self.thread.join(timeout=5.0)
+        
+        self.engine.stop()
             
         print("State Engine thread stopped")
     
     def _run_engine(self):
         """Background thread main loop"""
+        with self._cycle_lock:
+            self._watcher = self.engine.create_watcher() if self.event_driven else None
+            try:
+                self._engine_loop()
+            finally:
+                with self._requests_lock:
+                    requests, self._poll_requests = self._poll_requests, None
+                for request in requests:
+                    request.set_exception(RuntimeError("State engine stopped"))
+                if self._watcher:
+                    self._watcher.close()
+                    self._watcher = None
+    
+    def _engine_loop(self):
         while not self._stop_event.is_set():
             try:
-                # Run poll cycle
-                self.engine.poll_cycle()
+                if self._run_requested_polls():
+                    continue
                 
-                # Update shared state
-                self._update_shared_state()
-                
-                # Sleep until next poll
-                self._stop_event.wait(self.engine.poll_interval)
+                if self._watcher:
+                    # Block until inputs change, process only affected agents
+                    if self.engine.event_cycle(self._watcher):
+                        self._update_shared_state()
+                else:
+                    # Run poll cycle
+                    self.engine.poll_cycle()
+                    
+                    # Update shared state
+                    self._update_shared_state()
+                    
+                    # Sleep until next poll (or a forced one)
+                    self._wakeup.wait(self.engine.poll_interval)
+                    self._wakeup.clear()
                 
             except Exception as e:
                 print(f"Engine thread error: {e}")
                 # Continue running despite errors
+                if self._watcher:
+                    # Avoid a hot loop if the same error repeats
+                    self._stop_event.wait(self.engine.poll_interval)
+    
+    def _run_requested_polls(self) -> bool:
+        """Run one poll cycle for every force_poll() waiting (engine thread)"""
+        with self._requests_lock:
+            requests, self._poll_requests = self._poll_requests, []
+        if not requests:
+            return False
+        
+        try:
+            self.engine.poll_cycle()
+            self._update_shared_state()
+        except Exception as e:
+            for request in requests:
+                request.set_exception(e)
+        else:
+            for request in requests:
+                request.set_result(None)
+        return True
     
     def _update_shared_state(self):
-        """Update shared state from engine (thread-safe)"""
-        with self._state_lock:
-            # Read all agent states from known symlinks
-            for agent_name in self.engine.monitor.AGENT_SYMLINKS.keys():
-                state = self.engine.writer.read_agent_state(agent_name)
-                if state:
-                    self._agent_states[agent_name] = state
+        """Publish a new snapshot if the engine's states changed (thread-safe)"""
+        # Engine keeps authoritative state in memory - no _state.md reads
+        states = self.engine.get_agent_states()
+        
+        with self._publish_lock:
+            current = self._snapshot
+            # Only last_updated moving doesn't count; agents gone from the registry do
+            changes = diff_agent_states(current.agents, states)
             
+            if changes:
+                # Unchanged agents keep their objects from the last snapshot
+                agents = dict(current.agents)
+                for change in changes:
+                    if change.new is None:
+                        del agents[change.agent]
+                    else:
+                        agents[change.agent] = change.new
+                self._snapshot = EngineSnapshot(current.version + 1, MappingProxyType(agents), datetime.now())
             self._last_update = datetime.now()
+        
+        # Outside the lock, so observers can call back into the accessors
+        notify_observers(self._observers, changes)
+        
+        for callback in self._listeners:
+            callback()
+    
+    # Lock-free accessors for TUI (states are shared - don't modify them)
     
-    # Thread-safe accessors for TUI
+    def snapshot(self) -> EngineSnapshot:
+        """Current snapshot of all agents"""
+        return self._snapshot
+    
+    @property
+    def version(self) -> int:
+        """Version of the current snapshot"""
+        return self._snapshot.version
+    
+    def changed_since(self, version: int) -> bool:
+        """Check whether anything was published after version"""
+        return self._snapshot.version != version
     
     def get_agent_state(self, agent_name: str) -> Optional[AgentGroundState]:
-        """Get current state for an agent (thread-safe)"""
-        with self._state_lock:
-            return self._agent_states.get(agent_name)
+        """Get current state for an agent"""
+        return self._snapshot.agents.get(agent_name)
     
     def get_all_agents(self) -> Dict[str, AgentGroundState]:
-        """Get all agent states (thread-safe copy)"""
-        with self._state_lock:
-            return dict(self._agent_states)
+        """Get all agent states (copy of the current snapshot's mapping)"""
+        return dict(self._snapshot.agents)
     
     def get_status(self) -> Dict:
-        """Get engine status (thread-safe)"""
-        with self._state_lock:
-            agent_summary = {}
-            for name, state in self._agent_states.items():
-                agent_summary[name] = {
-                    'state': state.state.value,
-                    'thread': state.thread,
-                    'context_percent': state.context_percent,
-                    'unread_messages': state.unread_message_count,
-                    'session_id': state.session_id
-                }
-            
-            return {
-                'running': self._running,
-                'thread_alive': self.thread.is_alive() if self.thread else False,
-                'last_update': self._last_update.isoformat() if self._last_update else None,
-                'agents': agent_summary,
-                'errors': self.engine.errors[-5:]  # Last 5 errors
+        """Get engine status"""
+        snapshot = self._snapshot
+        last_update = self._last_update
+        
+        agent_summary = {}
+        for name, state in snapshot.agents.items():
+            agent_summary[name] = {
+                'state': state.state.value,
+                'thread': state.thread,
+                'context_percent': state.context_percent,
+                'unread_messages': state.unread_message_count,
+                'session_id': state.session_id
             }
+        
+        return {
+            'running': self._running,
+            'thread_alive': self.thread.is_alive() if self.thread else False,
+            'version': snapshot.version,
+            'last_update': last_update.isoformat() if last_update else None,
+            'agents': agent_summary,
+            'state_writes': self.engine.writer.get_write_stats(),
+            'errors': self.engine.errors[-5:]  # Last 5 errors
+        }
     
     def is_running(self) -> bool:
         """Check if engine thread is running"""
@@ -130,9 +265,26 @@ class ThreadedStateEngine:
     # Direct engine access for testing/debugging
     
     def force_poll(self):
-        """Force an immediate poll cycle (blocks)"""
-        self.engine.poll_cycle()
-        self._update_shared_state()
+        """Force an immediate poll cycle (blocks until it ran)"""
+        if threading.current_thread() is not self.thread:
+            request = Future()
+            with self._requests_lock:
+                queued = self._poll_requests is not None
+                if queued:
+                    # Engine thread picks it up before its next wait (the
+                    # watcher isn't closed while requests are taken)
+                    self._poll_requests.append(request)
+                    self._wakeup.set()
+                    if self._watcher:
+                        self._watcher.wake()
+            if queued:
+                request.result()
+                return
+        
+        # No engine thread running cycles - poll here, still one at a time
+        with self._cycle_lock:
+            self.engine.poll_cycle()
+            self._update_shared_state()
     
     def get_engine_errors(self) -> list:
         """Get recent engine errors"""
@@ -166,17 +318,297 @@ class TUIExample:
         self.engine.stop()
 
 
-# Daemon split preparation
+# Unsent bytes a client may fall behind by before it is disconnected
+MAX_CLIENT_BACKLOG = 8 * 1024 * 1024
+
+
+class _DaemonClient:
+    """One connection's buffers"""
+    
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.decoder = FrameDecoder()
+        self.outbox = bytearray()
+        self.writing = False  # Registered for EVENT_WRITE
+        self.subscribed = False
+        self.closed = False
+
+
 class StateEngineDaemon:
     """
-    Future: State engine as separate daemon process
+    State engine as a shared service on a Unix socket
     
-    Would expose state via:
-    - Unix socket
-    - Shared memory
-    - REST API
-    - Message queue
+    Owns one ThreadedStateEngine. A single selector loop serves every
+    client from an encoded copy of the agent states, so readers never touch
+    the engine; after each engine cycle subscribers get only the agents
+    that changed. A client that stops reading is dropped once
+    MAX_CLIENT_BACKLOG bytes are queued for it instead of stalling others.
     
-    For now, threading is sufficient and simpler
+    Usage:
+        daemon = StateEngineDaemon(project_root, project_root / "_sessions")
+        daemon.serve_forever()  # or start()/stop() for a background thread
     """
-    pass
\ No newline at end of file
+    
+    def __init__(self, project_root: Path, sessions_dir: Path,
+                 socket_path: Path = DEFAULT_SOCKET_PATH, **engine_options):
+        self.engine = ThreadedStateEngine(project_root, sessions_dir, **engine_options)
+        self.engine.add_listener(self._wake)
+        self.socket_path = Path(socket_path)
+        
+        self.thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._server: Optional[socket.socket] = None
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._clients: Dict[socket.socket, _DaemonClient] = {}
+        
+        # Engine thread -> loop wakeups
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        
+        # Engine snapshot last published, its encoded states, and the
+        # snapshot frame for them (version follows the engine's)
+        self._source = EngineSnapshot()
+        self._published: Dict[str, dict] = {}
+        self._snapshot_frame: Optional[bytes] = None
+        self.version = 0
+        
+        # Replies completed off the loop (forced polls), sent on next wakeup
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+    
+    def serve_forever(self):
+        """Bind the socket and serve until stop() (or KeyboardInterrupt)"""
+        self._bind()
+        self._serve()
+    
+    def start(self):
+        """Bind the socket and serve from a background thread"""
+        self._bind()
+        self.thread = threading.Thread(target=self._serve, name="StateEngineDaemon", daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop serving (safe from signal handlers and other threads)"""
+        self._stop_event.set()
+        self._wake()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=10.0)
+    
+    def _bind(self):
+        """Listen on socket_path, replacing a stale socket file"""
+        if self.socket_path.exists():
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(str(self.socket_path))
+                raise RuntimeError(f"State engine daemon already running on {self.socket_path}")
+            except OSError:
+                # Left behind by a daemon that didn't shut down cleanly
+                self.socket_path.unlink()
+            finally:
+                probe.close()
+        
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(str(self.socket_path))
+        self._server.listen(64)
+        self._server.setblocking(False)
+    
+    def _serve(self):
+        """Selector loop (daemon thread or caller's thread)"""
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        self._selector.register(self._wake_recv, selectors.EVENT_READ)
+        
+        try:
+            # Serve real state from the first request on; if that poll fails,
+            # serve the empty snapshot and let the engine thread retry
+            try:
+                self.engine.force_poll()
+            except Exception as e:
+                error_msg = f"Initial poll error: {e}"
+                print(f"ERROR: {error_msg}")
+                self.engine.engine.errors.append(error_msg)
+            self._publish()
+            self.engine.start()
+            print(f"State engine daemon listening on {self.socket_path}")
+            
+            while not self._stop_event.is_set():
+                for key, events in self._selector.select():
+                    if key.fileobj is self._server:
+                        self._accept()
+                    elif key.fileobj is self._wake_recv:
+                        self._drain_wake()
+                        self._publish()
+                        self._send_pending()
+                    else:
+                        client = key.data
+                        if events & selectors.EVENT_WRITE:
+                            self._flush(client)
+                        if events & selectors.EVENT_READ and not client.closed:
+                            self._read(client)
+        finally:
+            self.engine.stop()
+            for client in list(self._clients.values()):
+                self._drop(client)
+            self._selector.close()
+            self._server.close()
+            self.socket_path.unlink(missing_ok=True)
+            print("State engine daemon stopped")
+    
+    def _wake(self):
+        """Interrupt the selector (engine updated, reply ready, or stopping)"""
+        try:
+            self._wake_send.send(b'\0')
+        except (BlockingIOError, OSError):
+            # Already pending, or shutting down
+            pass
+    
+    def _drain_wake(self):
+        try:
+            while self._wake_recv.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+    
+    def _publish(self):
+        """Broadcast the agents that changed since the last engine snapshot sent"""
+        snapshot = self.engine.snapshot()
+        if snapshot.version == self.version:
+            return
+        
+        # Snapshots share unchanged agents' objects - only encode the rest
+        previous = self._source.agents
+        changed = {name: encode_state(state) for name, state in snapshot.agents.items()
+                   if previous.get(name) is not state}
+        removed = [name for name in previous if name not in snapshot.agents]
+        
+        published = {name: data for name, data in self._published.items() if name in snapshot.agents}
+        published.update(changed)
+        self._published = published
+        self._source = snapshot
+        self._snapshot_frame = None
+        self.version = snapshot.version
+        
+        frame = encode_frame({'op': 'update', 'version': self.version,
+                              'agents': changed, 'removed': removed})
+        for client in list(self._clients.values()):
+            if client.subscribed:
+                self._queue(client, frame)
+    
+    def _snapshot(self) -> bytes:
+        # Encoded once per version however many clients ask
+        if self._snapshot_frame is None:
+            self._snapshot_frame = encode_frame({'op': 'snapshot', 'version': self.version,
+                                                 'agents': self._published})
+        return self._snapshot_frame
+    
+    # Connections
+    
+    def _accept(self):
+        try:
+            sock, _ = self._server.accept()
+        except BlockingIOError:
+            return
+        sock.setblocking(False)
+        client = _DaemonClient(sock)
+        self._clients[sock] = client
+        self._selector.register(sock, selectors.EVENT_READ, client)
+    
+    def _drop(self, client: _DaemonClient):
+        if client.closed:
+            return
+        client.closed = True
+        self._clients.pop(client.sock, None)
+        try:
+            self._selector.unregister(client.sock)
+        except (KeyError, ValueError):
+            pass
+        client.sock.close()
+    
+    def _read(self, client: _DaemonClient):
+        try:
+            data = client.sock.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b''
+        if not data:
+            self._drop(client)
+            return
+        
+        try:
+            messages = client.decoder.feed(data)
+        except ProtocolError:
+            self._drop(client)
+            return
+        for message in messages:
+            self._handle(client, message)
+    
+    def _queue(self, client: _DaemonClient, frame: bytes):
+        if client.closed:
+            return
+        client.outbox += frame
+        if len(client.outbox) > MAX_CLIENT_BACKLOG:
+            print(f"Dropping state engine client: {len(client.outbox)} bytes unread")
+            self._drop(client)
+            return
+        self._flush(client)
+    
+    def _flush(self, client: _DaemonClient):
+        """Send what the socket takes now; wait for EVENT_WRITE for the rest"""
+        if client.outbox:
+            try:
+                sent = client.sock.send(client.outbox)
+                del client.outbox[:sent]
+            except BlockingIOError:
+                pass
+            except OSError:
+                self._drop(client)
+                return
+        
+        writing = bool(client.outbox)
+        if writing != client.writing:
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if writing else 0)
+            self._selector.modify(client.sock, events, client)
+            client.writing = writing
+    
+    # Requests
+    
+    def _handle(self, client: _DaemonClient, message):
+        op = message.get('op') if isinstance(message, dict) else None
+        
+        if op == 'snapshot':
+            self._queue(client, self._snapshot())
+        elif op == 'subscribe':
+            client.subscribed = True
+            self._queue(client, self._snapshot())
+        elif op == 'status':
+            status = self.engine.get_status()
+            status.update(version=self.version, clients=len(self._clients),
+                          socket=str(self.socket_path))
+            self._queue(client, encode_frame({'op': 'status', 'status': status}))
+        elif op == 'poll':
+            # Poll cycles take a while - run off the loop
+            threading.Thread(target=self._poll_for, args=(client,), daemon=True).start()
+        elif op == 'ping':
+            self._queue(client, encode_frame({'op': 'pong', 'version': self.version}))
+        else:
+            self._queue(client, encode_frame({'op': 'error', 'error': f"Unknown op: {op}"}))
+    
+    def _poll_for(self, client: _DaemonClient):
+        """Forced poll for one client (worker thread)"""
+        try:
+            self.engine.force_poll()
+            reply = {'op': 'ok'}
+        except Exception as e:
+            reply = {'op': 'error', 'error': f"Poll failed: {e}"}
+        
+        with self._pending_lock:
+            self._pending.append((client, reply))
+        self._wake()
+    
+    def _send_pending(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, []
+        for client, reply in pending:
+            self._queue(client, encode_frame(reply))
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+State Engine Daemon - Entry Point
+
+Runs the project's single state engine and shares it over a Unix socket.
+The TUI, tools/unified_state_v2.py and validate_state.py read from it
+when it is running instead of starting their own engine.
+"""
+
+import sys
+import signal
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from engine.threaded_engine import StateEngineDaemon
+from engine.state_protocol import DEFAULT_SOCKET_PATH
+from engine.pidfile import PidFile
+
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve agent state to TUIs and tools")
+    parser.add_argument("--socket", type=Path, default=DEFAULT_SOCKET_PATH,
+                        help=f"Unix socket path (default: {DEFAULT_SOCKET_PATH.name})")
+    parser.add_argument("--poll", action="store_true",
+                        help="Poll on an interval instead of waiting for file changes")
+    parser.add_argument("--poll-interval", type=int, default=1,
+                        help="Seconds between polls with --poll (default: 1)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Agents processed in parallel per cycle (default: 1)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with PidFile(Path(__file__).parent / ".rtfw-engine.pid"):
+        daemon = StateEngineDaemon(
+            PROJECT_ROOT,
+            PROJECT_ROOT / "_sessions",
+            socket_path=args.socket,
+            poll_interval=args.poll_interval,
+            event_driven=not args.poll,
+            max_workers=args.workers
+        )
+        signal.signal(signal.SIGTERM, lambda *_: daemon.stop())
+
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
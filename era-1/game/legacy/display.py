@@ -2,7 +2,7 @@
 Terminal display manager with 1970s aesthetic
 """
 
-from typing import List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 import sys
 import os
 import time
@@ -11,6 +11,7 @@ import shutil
 from datetime import datetime
 
 from interfaces import DisplayManager, Agent, Message, AgentStatus
+from framebuffer import FrameBuffer
 
 
 class RetroTerminalDisplay(DisplayManager):
@@ -19,6 +20,10 @@ class RetroTerminalDisplay(DisplayManager):
     
     Features responsive layout, dynamic sizing, and enhanced capabilities
     while maintaining retro phosphor aesthetic
+    
+    Data areas (timestamp, status panel, message log, command output) are
+    drawn through a FrameBuffer: each update sends only the cells that
+    changed since the last frame, in one write.
     """
     
     def __init__(self):
@@ -42,6 +47,10 @@ class RetroTerminalDisplay(DisplayManager):
         self.layout = {}
         self._calculate_layout()
         
+        # Last frame on screen, for damage-tracked updates
+        self.frame = FrameBuffer(base_style=self.phosphor_green)
+        self._write_lock = threading.Lock()
+        
         # For auto-refresh
         self.auto_refresh = False
         self.refresh_thread = None
@@ -91,10 +100,26 @@ class RetroTerminalDisplay(DisplayManager):
         """ANSI escape to position cursor"""
         return f"\033[{row};{col}H"
     
+    def _timestamp_row(self) -> int:
+        """Screen row of the header timestamp"""
+        # Header starts on row 2; wide terminals have a subtitle line
+        return 5 if self.width >= 60 else 4
+    
+    def _present(self, rows: Dict[int, str], cursor: Optional[Tuple[int, int]] = None):
+        """Draw rows via the frame buffer: changed cells only, one write"""
+        with self._write_lock:
+            output = self.frame.render(rows, self.width)
+            if cursor:
+                output += self._goto(*cursor)
+            if output:
+                sys.stdout.write(output)
+                sys.stdout.flush()
+    
     def initialize(self) -> None:
         """Set up terminal for early 1980s aesthetic"""
         # Clear screen and set green text
         print(self.hide_cursor + self.clear + self.phosphor_green, end='')
+        self.frame.invalidate()
         self._draw_layout()
         self.show_header()
     
@@ -128,55 +153,48 @@ class RetroTerminalDisplay(DisplayManager):
         print(datetime.now().strftime("%Y-%m-%d %H:%M:%S").center(self.width))
         print("=" * self.width)
         print(self.reset + self.phosphor_green, end='')
+        self.frame.forget([self._timestamp_row()])
     
     def show_status_panel(self, agents: List[Agent]) -> None:
         """Update agent status display in its designated area"""
-        if self.layout['status_lines'] < 3:
-            return  # Not enough space
-            
         self.last_agents = agents  # Store for refresh
+        self._present(self._status_rows(agents))
+    
+    def _status_rows(self, agents: List[Agent]) -> Dict[int, str]:
+        """Status area lines by screen row ({} if there isn't room)"""
+        if self.layout['status_lines'] < 3:
+            return {}  # Not enough space
         
-        # Position at status section
+        # Every row of the area, so rows no longer used get blanked
         row = self.layout['status_start'] + 1
-        print(self._goto(row), end='')
-        
-        # Clear status area first
-        for i in range(self.layout['status_lines'] - 1):
-            print(self._goto(row + i) + self.clear_line, end='')
+        rows = {row + i: "" for i in range(self.layout['status_lines'] - 1)}
         
         # Draw status
-        print(self._goto(row) + f"{self.bright}AGENT STATUS:{self.reset}{self.phosphor_green}")
+        rows[row] = f"{self.bright}AGENT STATUS:{self.reset}{self.phosphor_green}"
         row += 1
         
+        # Only as many agents as there are rows are formatted
+        max_agents = self.layout['status_lines'] - 3
+        
         # Adjust columns based on width
         if self.width < 80:
             # Compact mode
-            print(self._goto(row) + f"{'AGENT':<8} {'STATE':<8} {'CTX':<6} {'SEEN':<15}")
+            rows[row] = f"{'AGENT':<8} {'STATE':<8} {'CTX':<6} {'SEEN':<15}"
             row += 1
             
-            # Agent rows
-            max_agents = self.layout['status_lines'] - 3
             for i, agent in enumerate(agents[:max_agents]):
-                if i >= max_agents:
-                    break
-                    
                 # Shorter format for narrow terminals
                 color = self.bright + self.phosphor_green if agent.status == AgentStatus.ACTIVE else self.phosphor_green
                 ctx = f"{agent.context_percent:>3}%"
                 seen = agent.last_activity[:15]
                 
-                print(self._goto(row + i) + f"{color}{agent.name[:8]:<8} {agent.status.value[:8]:<8} {ctx:<6} {seen:<15}{self.reset}{self.phosphor_green}")
+                rows[row + i] = f"{color}{agent.name[:8]:<8} {agent.status.value[:8]:<8} {ctx:<6} {seen:<15}{self.reset}{self.phosphor_green}"
         else:
             # Full mode
-            print(self._goto(row) + f"{'AGENT':<10} {'STATUS':<10} {'CONTEXT':<12} {'LAST SEEN':<20} {'CURRENT TASK':<25}")
+            rows[row] = f"{'AGENT':<10} {'STATUS':<10} {'CONTEXT':<12} {'LAST SEEN':<20} {'CURRENT TASK':<25}"
             row += 1
             
-            # Agent rows (limited by available space)
-            max_agents = self.layout['status_lines'] - 3
             for i, agent in enumerate(agents[:max_agents]):
-                if i >= max_agents:
-                    break
-                    
                 # Color based on status
                 if agent.status == AgentStatus.ACTIVE:
                     color = self.bright + self.phosphor_green
@@ -196,67 +214,64 @@ class RetroTerminalDisplay(DisplayManager):
                 if len(task) > max_task_width:
                     task = task[:max_task_width-3] + "..."
                 
-                print(self._goto(row + i) + f"{color}{agent.name:<10} {agent.status.value:<10} {context_bar:<12} "
-                      f"{agent.last_activity:<20} {task:<25}{self.reset}{self.phosphor_green}")
+                rows[row + i] = (f"{color}{agent.name:<10} {agent.status.value:<10} {context_bar:<12} "
+                                 f"{agent.last_activity:<20} {task:<25}{self.reset}{self.phosphor_green}")
         
         # Auto-refresh indicator at bottom of status area
         if self.auto_refresh and self.layout['status_lines'] > 3:
             indicator_row = self.layout['status_start'] + self.layout['status_lines']
             indicator = "[AUTO-REFRESH: ON]" if self.width > 40 else "[AUTO]"
-            print(self._goto(indicator_row) + self.clear_line + 
-                  f"{self.dim}{indicator}{self.reset}{self.phosphor_green}", end='')
+            rows[indicator_row] = f"{self.dim}{indicator}{self.reset}{self.phosphor_green}"
+        
+        return rows
     
     def show_message_log(self, messages: List[Message]) -> None:
         """Display recent system messages in message area"""
-        if self.layout['message_lines'] < 2:
-            return  # Not enough space
-            
         self.last_messages = messages  # Store for refresh
+        self._present(self._message_rows(messages))
+    
+    def _message_rows(self, messages: List[Message]) -> Dict[int, str]:
+        """Message area lines by screen row ({} if there isn't room)"""
+        if self.layout['message_lines'] < 2:
+            return {}  # Not enough space
         
-        # Position at message section
         row = self.layout['message_start'] + 1
+        rows = {row + i: "" for i in range(self.layout['message_lines'] - 1)}
         
-        # Clear message area
-        for i in range(self.layout['message_lines'] - 1):
-            print(self._goto(row + i) + self.clear_line, end='')
-        
-        print(self._goto(row) + f"{self.bright}RECENT MESSAGES:{self.reset}{self.phosphor_green}")
+        rows[row] = f"{self.bright}RECENT MESSAGES:{self.reset}{self.phosphor_green}"
         row += 1
         
-        # Show messages (limited by available space)
+        # Only the messages that fit are formatted, however long the log
         max_messages = self.layout['message_lines'] - 2
         for i, msg in enumerate(messages[:max_messages]):
-            if i >= max_messages:
-                break
-                
             # Truncate long messages based on terminal width
             content = msg.content
             max_content = self.width - 10
             if len(content) > max_content:
                 content = content[:max_content-3] + "..."
             
-            print(self._goto(row + i) + f"{self.dim}{msg.hash[:7]}{self.reset}{self.phosphor_green} {content}")
+            rows[row + i] = f"{self.dim}{msg.hash[:7]}{self.reset}{self.phosphor_green} {content}"
+        
+        return rows
     
     def show_command_output(self, output: str) -> None:
         """Display command execution results in message area temporarily"""
         if self.layout['message_lines'] < 2:
             # If no message area, show in status area briefly
             row = self.layout['status_start'] + 2
-            print(self._goto(row) + self.clear_line + f"{self.phosphor_amber}{output[:self.width-2]}{self.phosphor_green}")
+            self._present({row: f"{self.phosphor_amber}{output[:self.width-2]}{self.phosphor_green}"})
             return
             
         # Clear message area and show output
         row = self.layout['message_start'] + 1
-        
-        for i in range(self.layout['message_lines'] - 1):
-            print(self._goto(row + i) + self.clear_line, end='')
+        rows = {row + i: "" for i in range(self.layout['message_lines'] - 1)}
         
         # Handle multi-line output
         lines = output.split('\n')
         for i, line in enumerate(lines[:self.layout['message_lines']-1]):
-            if i >= self.layout['message_lines'] - 1:
-                break
-            print(self._goto(row + i) + f"{self.phosphor_amber}{line[:self.width-2]}{self.phosphor_green}")
+            rows[row + i] = f"{self.phosphor_amber}{line[:self.width-2]}{self.phosphor_green}"
+        
+        self._present(rows)
     
     def get_input(self, prompt: str = "> ") -> str:
         """Get user input in dedicated input area"""
@@ -288,21 +303,20 @@ class RetroTerminalDisplay(DisplayManager):
             self.handle_resize()
             return
         
-        # Update header timestamp
-        ts_row = 3 if self.width >= 60 else 2  # Adjust for compact header
-        print(self._goto(ts_row + 1) + self.clear_line + 
-              datetime.now().strftime("%Y-%m-%d %H:%M:%S").center(self.width))
+        # Whole frame at once: header timestamp, status panel, messages
+        rows = {self._timestamp_row(): datetime.now().strftime("%Y-%m-%d %H:%M:%S").center(self.width)}
         
-        # Update status panel
-        self.show_status_panel(agents)
+        self.last_agents = agents
+        rows.update(self._status_rows(agents))
         
         # Update messages if provided
         if messages:
-            self.show_message_log(messages)
+            self.last_messages = messages
+            rows.update(self._message_rows(messages))
         
         # Make sure cursor returns to input area
         input_row = self.layout['input_start'] + 1
-        print(self._goto(input_row, 3), end='', flush=True)  # After "> "
+        self._present(rows, cursor=(input_row, 3))  # After "> "
     
     def start_auto_refresh(self, refresh_callback, interval: int = 5):
         """Start auto-refresh thread"""
@@ -327,6 +341,7 @@ class RetroTerminalDisplay(DisplayManager):
         """Handle terminal resize events"""
         # Redraw entire layout
         print(self.clear, end='')
+        self.frame.invalidate()
         self._draw_layout()
         self.show_header()
         
@@ -0,0 +1,138 @@
+"""
+Damage-tracking frame buffer for the retro terminal display
+
+Keeps the last frame as styled cells per screen row. Rendering a new frame
+only emits cursor moves and text for the cells that changed (plus a
+clear-to-end-of-line where a row got shorter), returned as one string so
+the display can hand it to a single write.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+RESET = "\033[0m"
+CLEAR_TO_EOL = "\033[K"
+
+# Unchanged cells between two changed runs cheaper to resend than to skip
+# with a cursor move ("\033[row;colH" is ~8 bytes)
+MERGE_GAP = 8
+
+_SGR = re.compile(r"\033\[[0-9;]*m")
+
+Cell = Tuple[str, str]  # (SGR codes in effect, character)
+
+
+def goto(row: int, col: int = 1) -> str:
+    """ANSI escape to position cursor"""
+    return f"\033[{row};{col}H"
+
+
+class FrameBuffer:
+    """
+    Last frame written to the terminal, by row
+    
+    Usage:
+        frame = FrameBuffer(base_style="\\033[32m")
+        out = frame.render({5: "12:00:01", 7: "AGENT STATUS:"}, width=80)
+        sys.stdout.write(out)
+    
+    Rows not passed to render() are left alone. Anything drawn on screen
+    by other means must be forgotten (or the whole buffer invalidated) so
+    the next render repaints it.
+    """
+    
+    def __init__(self, base_style: str = ""):
+        # Attributes in effect at the start of each row (and restored after)
+        self.base_style = base_style
+        self._lines: Dict[int, str] = {}
+        self._cells: Dict[int, List[Cell]] = {}
+    
+    def invalidate(self):
+        """Screen was cleared or redrawn - repaint everything next time"""
+        self._lines.clear()
+        self._cells.clear()
+    
+    def forget(self, rows: Iterable[int]):
+        """Rows were drawn by other means - repaint them next time"""
+        for row in rows:
+            self._lines.pop(row, None)
+            self._cells.pop(row, None)
+    
+    def render(self, rows: Dict[int, str], width: int) -> str:
+        """
+        Escape sequences turning the last frame into this one
+        
+        Args:
+            rows: Screen row -> line text (may contain SGR escapes)
+            width: Terminal columns; longer lines are cut to avoid wrapping
+        
+        Returns:
+            Output for the changed cells only ("" if nothing changed)
+        """
+        out = []
+        for row in sorted(rows):
+            line = rows[row]
+            if self._lines.get(row) == line:
+                continue
+            
+            cells = self._parse(line)[:width]
+            old = self._cells.get(row)
+            if old is None:
+                # Unknown content: draw the row and clear whatever is left
+                out.append(self._draw(row, 0, cells))
+                out.append(CLEAR_TO_EOL)
+            else:
+                out.append(self._diff(row, old, cells))
+            
+            self._lines[row] = line
+            self._cells[row] = cells
+        
+        if not out:
+            return ""
+        out.append(RESET + self.base_style)
+        return "".join(out)
+    
+    def _parse(self, line: str) -> List[Cell]:
+        """Split a line into (style, character) cells"""
+        cells = []
+        style = self.base_style
+        pos = 0
+        for match in _SGR.finditer(line):
+            cells.extend((style, char) for char in line[pos:match.start()])
+            code = match.group()
+            style = "" if code == RESET else style + code
+            pos = match.end()
+        cells.extend((style, char) for char in line[pos:])
+        return cells
+    
+    def _diff(self, row: int, old: List[Cell], new: List[Cell]) -> str:
+        """Redraw the runs of cells that differ between old and new"""
+        changed = [col for col, cell in enumerate(new) if col >= len(old) or old[col] != cell]
+        
+        out = []
+        run_start: Optional[int] = None
+        run_end = 0
+        for col in changed:
+            if run_start is not None and col - run_end > MERGE_GAP:
+                out.append(self._draw(row, run_start, new[run_start:run_end]))
+                run_start = None
+            if run_start is None:
+                run_start = col
+            run_end = col + 1
+        if run_start is not None:
+            out.append(self._draw(row, run_start, new[run_start:run_end]))
+        
+        if len(old) > len(new):
+            out.append(goto(row, len(new) + 1) + CLEAR_TO_EOL)
+        return "".join(out)
+    
+    def _draw(self, row: int, col: int, cells: List[Cell]) -> str:
+        out = [goto(row, col + 1)]
+        style = None
+        for cell_style, char in cells:
+            if cell_style != style:
+                out.append(RESET + cell_style)
+                style = cell_style
+            out.append(char)
+        return "".join(out)
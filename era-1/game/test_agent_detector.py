@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Agent detector regression tests
+
+Run with: python -m pytest test_agent_detector.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'critic' / 'tools'))
+
+from engine.agent_detector import IDENTITY, MENTION, AgentDetector
+
+
+AGENTS = ['critic', 'era-1', 'gov', 'nexus']
+
+# Someone talking to or about an agent, not the agent itself
+MENTION_ONLY = [
+    '@GOV please check GOV.md',
+    'see ERA-1.md and @ERA-1',
+    'cc @GOV',
+]
+
+
+def test_identity_markers_detected():
+    detector = AgentDetector(AGENTS)
+    assert detector.detect('Read GOV.md for identity', min_weight=IDENTITY).agent == 'gov'
+    assert detector.detect('@ERA-1: done for today', min_weight=IDENTITY).agent == 'era-1'
+    assert detector.detect('Loading nexus/context.md', min_weight=IDENTITY).agent == 'nexus'
+
+
+def test_mentions_do_not_add_up_to_identity():
+    detector = AgentDetector(AGENTS)
+    for text in MENTION_ONLY:
+        assert detector.detect(text, min_weight=IDENTITY) is None, text
+
+
+def test_mentions_count_by_default():
+    detector = AgentDetector(AGENTS)
+    match = detector.detect('@GOV please check GOV.md', min_weight=MENTION)
+    assert match.agent == 'gov'
+    assert match.score == 2
+
+
+def test_identity_beats_mentions_of_others():
+    detector = AgentDetector(AGENTS)
+    match = detector.detect('I am NEXUS. @GOV please review GOV.md', min_weight=IDENTITY)
+    assert match.agent == 'nexus'
+
+
+def test_session_query_ignores_mentions():
+    from session_query_v2 import SessionQueryV2
+    query = SessionQueryV2(str(Path(__file__).parent))
+    for text in MENTION_ONLY:
+        assert query.match_agent(text) is None, text
+    assert query.match_agent('Read GOV.md for identity') == 'GOV'
+
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Agent registry regression tests
+
+Run with: python -m pytest test_agent_registry.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from engine.agent_registry import AgentRegistry
+
+
+def make_registry(tmp_path):
+    (tmp_path / '_sessions').mkdir()
+    return AgentRegistry(tmp_path, tmp_path / '_sessions')
+
+
+def touch_later(path):
+    # Coarse filesystem timestamps could hide a change made within the same tick
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_new_workspace_directory(tmp_path):
+    registry = make_registry(tmp_path)
+    (tmp_path / 'gov').mkdir()
+    (tmp_path / 'gov' / '_state.md').write_text('state')
+    touch_later(tmp_path)
+    assert registry.refresh()
+    assert registry.workspace_agents == ['gov']
+
+
+def test_state_file_created_in_existing_directory(tmp_path):
+    registry = make_registry(tmp_path)
+    (tmp_path / 'newagent').mkdir()
+    assert not registry.refresh()
+    
+    (tmp_path / 'newagent' / '_state.md').write_text('state')
+    touch_later(tmp_path / 'newagent')
+    assert registry.refresh()
+    assert registry.workspace_agents == ['newagent']
+    
+    (tmp_path / 'newagent' / '_state.md').unlink()
+    touch_later(tmp_path / 'newagent')
+    assert registry.refresh()
+    assert registry.workspace_agents == []
+
+
+def test_hidden_and_underscore_directories_ignored(tmp_path):
+    registry = make_registry(tmp_path)
+    for name in ('.git', '_archive'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / '_state.md').write_text('state')
+    touch_later(tmp_path)
+    assert not registry.refresh()
+    assert registry.workspace_agents == []
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+GOV permission allowlist tests
+
+Run with: python -m pytest test_approved_agents.py
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'gov' / 'tools'))
+
+import approved_agents
+from mcp_permission_server import GovPermissionHandler
+
+
+@pytest.fixture
+def allowlist(tmp_path, monkeypatch):
+    path = tmp_path / 'approved_agents.txt'
+    path.write_text('# comment\nera-1\nGOV  # trailing comment\n\n')
+    monkeypatch.setattr(approved_agents, 'APPROVED_AGENTS_FILE', path)
+    monkeypatch.setattr(approved_agents, '_cache', (None, []))
+    return path
+
+
+def test_project_allowlist():
+    assert approved_agents.read_approved_agents() == ['era-1', 'nexus', 'gov', 'critic']
+
+
+def test_allowlist_parsing_and_reload(allowlist):
+    assert approved_agents.approved_agents() == ['era-1', 'gov']
+    
+    allowlist.write_text('era-1\ngov\nscout\n')
+    stat = os.stat(allowlist)
+    os.utime(allowlist, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert approved_agents.approved_agents() == ['era-1', 'gov', 'scout']
+
+
+def test_missing_allowlist_approves_nobody(allowlist):
+    allowlist.unlink()
+    assert approved_agents.approved_agents() == []
+
+
+def behaviour(check, **params):
+    handler = object.__new__(GovPermissionHandler)
+    handler.queue_for_review = lambda reason: None
+    return getattr(handler, check)(params)['behavior']
+
+
+def test_permissions_follow_allowlist_not_workspaces(allowlist):
+    # Approved whether or not the workspace (or its _state.md) exists right now
+    assert behaviour('check_write_permission', file_path='/gov/notes.md') == 'allow'
+    assert behaviour('check_bash_permission', command='mkdir -p era-1/new') == 'allow'
+    assert behaviour('check_bash_permission', command='git add gov/notes.md') == 'allow'
+    
+    # Anything else with a _state.md is still not approved
+    assert behaviour('check_write_permission', file_path='/rogue/_state.md') == 'deny'
+    assert behaviour('check_bash_permission', command='mkdir rogue/x') == 'deny'
+    assert behaviour('check_bash_permission', command='git add nexus/notes.md') == 'deny'
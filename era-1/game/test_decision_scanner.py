@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Decision scanner regression tests
+
+Run with: python -m pytest test_decision_scanner.py
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from engine.decision_scanner import scan_state_decision
+from engine.models import AgentState
+
+
+def decision_of(content):
+    result = scan_state_decision(content)
+    return result[0] if result else None
+
+
+def test_no_decision():
+    assert decision_of('Just some output, no state here') is None
+    assert decision_of('```\nnext_state: sleeping\n```') is None
+
+
+def test_block_first_anchor_wins():
+    content = ('```\nnext_state: inbox\nthread: first\n\n'
+               'next_state: idle\nthread: second\n```')
+    decision = decision_of(content)
+    assert decision.next_state == AgentState.INBOX
+    assert decision.thread == 'first'
+
+
+def test_later_block_when_first_block_is_invalid():
+    content = ('```\nnext_state: sleeping\n```\n'
+               'Some prose\n'
+               '```\nnext_state: distill\nthread: notes\n```')
+    decision = decision_of(content)
+    assert decision.next_state == AgentState.DISTILL
+    assert decision.thread == 'notes'
+
+
+def test_block_beats_earlier_prose():
+    content = 'I might go next_state: idle later\n```\nnext_state: inbox\n```'
+    assert decision_of(content).next_state == AgentState.INBOX
+
+
+def test_unclosed_fence_falls_back_to_first_anchor():
+    content = 'next_state: idle\nthread: prose\n```\nnext_state: inbox\nthread: open'
+    decision = decision_of(content)
+    assert decision.next_state == AgentState.IDLE
+    assert decision.thread == 'prose'
+    
+    assert decision_of('```\nnext_state: inbox\n').next_state == AgentState.INBOX
+
+
+def test_blank_line_ends_fields():
+    content = '```\nnext_state: idle\nmax_tokens: 50000\n\nthread: elsewhere\n```'
+    decision = decision_of(content)
+    assert decision.next_state == AgentState.IDLE
+    assert decision.max_tokens == 50000
+    assert decision.thread is None
+
+
+def test_fields_from_unrelated_code_ignored():
+    content = ('```python\nparser.add(thread="0")  # next_state handling\n```\n\n'
+               '```\nnext_state: deep_work\nthread: engine-perf\n'
+               'last_read_commit: 4f35643\n```')
+    decision = decision_of(content)
+    assert decision.next_state == AgentState.DEEP_WORK
+    assert decision.thread == 'engine-perf'
+    assert decision.last_read_commit == '4f35643'
+
+
+def test_hyphenated_states():
+    assert decision_of('```\nnext_state: deep-work\n```').next_state == AgentState.DEEP_WORK
+    assert decision_of('```\nnext_state: direct-io\n```').next_state == AgentState.DIRECT_IO
+    assert decision_of('```\nnext_state: Deep_Work\n```').next_state == AgentState.DEEP_WORK
+
+
+def test_span_covers_fields():
+    content = 'Done.\n```\nnext_state: idle\nthread: t\n```'
+    decision, (start, end) = scan_state_decision(content)
+    assert content[start:end] == 'next_state: idle\nthread: t'
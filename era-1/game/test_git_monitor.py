@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+GitMonitor commit index tests
+
+Run with: python -m pytest test_git_monitor.py
+"""
+
+import subprocess
+
+import pytest
+
+from conftest import commit, git
+from engine.git_monitor import GitMonitor
+
+
+@pytest.fixture
+def monitor(project):
+    monitor = GitMonitor(project)
+    yield monitor
+    monitor.close()
+
+
+def test_failed_log_is_not_rerun_per_query(project, monitor, monkeypatch):
+    read = commit(project, '@GOV: read')
+    commit(project, '@ALL: hello')
+    run_git = monitor._git
+    logs = []
+
+    def failing_log(*args, **kwargs):
+        if args[0] == 'log':
+            logs.append(args)
+            raise subprocess.CalledProcessError(128, ['git', *args])
+        return run_git(*args, **kwargs)
+
+    monkeypatch.setattr(monitor, '_git', failing_log)
+    for _ in range(3):
+        assert monitor.count_unread_messages('gov', read) == 0
+    assert not monitor.refresh()
+    assert len(logs) == 1
+
+    # Retried once the back-off has passed, and recovered when git works again
+    monitor.LOG_RETRY_SECONDS = 0
+    assert not monitor.refresh()
+    assert len(logs) == 2
+    monkeypatch.setattr(monitor, '_git', run_git)
+    assert monitor.count_unread_messages('gov', read) == 1
+
+
+def linear_unread(project, agent_upper, last_read):
+    """Reference count: walk the commits after last_read"""
+    subjects = git(project, 'log', '--format=%s', f'{last_read}..HEAD').splitlines()
+    return sum(1 for s in subjects
+               if not s.startswith(f'@{agent_upper}') and (f'@{agent_upper}' in s or '@ALL' in s))
+
+
+def test_unread_counts(project, monitor):
+    read = commit(project, '@GOV: caught up')
+    commit(project, '@NEXUS: @GOV please review')
+    commit(project, '@GOV: replying to @NEXUS')  # own commit, never unread
+    commit(project, '@CRITIC: note for @ALL')
+    commit(project, '@ERA-1: unrelated')
+
+    assert monitor.count_unread_messages('gov', read) == 2 == linear_unread(project, 'GOV', read)
+    assert monitor.count_unread_messages('gov', read[:7]) == 2
+    assert monitor.count_unread_messages('era-1', read) == 1
+    assert monitor.count_unread_messages('gov', '0000000') == 0
+    assert monitor.count_unread_messages('gov', None) == 0
+
+    # New commits are picked up incrementally on refresh
+    commit(project, '@ERA-1: @GOV one more')
+    assert monitor.refresh()
+    assert monitor.count_unread_messages('gov', read) == 3 == linear_unread(project, 'GOV', read)
+
+
+def test_unread_counts_after_non_fast_forward(project, monitor):
+    read = commit(project, '@GOV: caught up')
+    commit(project, '@NEXUS: @GOV first')
+    commit(project, '@NEXUS: @GOV second')
+    assert monitor.count_unread_messages('gov', read) == 2
+    generation = monitor.index.generation
+
+    git(project, 'reset', '-q', '--hard', 'HEAD~2')
+    commit(project, '@ALL: rewritten')
+    assert monitor.refresh()
+    assert monitor.index.generation > generation
+    assert monitor.count_unread_messages('gov', read) == 1 == linear_unread(project, 'GOV', read)
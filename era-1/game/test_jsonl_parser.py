@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+JSONL parser regression tests
+
+Run with: python -m pytest test_jsonl_parser.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from engine.jsonl_parser import JSONLParser
+
+
+def agent_of(content):
+    return JSONLParser()._extract_agent_name({'content': content})
+
+
+def test_agent_name_kinds():
+    assert agent_of('Use @GOV.md agent rules') == 'gov'
+    assert agent_of('Please apply the rules for agent @ERA_1.md') == 'era-1'
+    assert agent_of('@NEXUS: routing done') == 'nexus'
+    assert agent_of('nothing to see here') is None
+
+
+def test_agent_name_priority():
+    # The system prompt form wins even inside a bootstrap-shaped sentence
+    assert agent_of('apply rules @GOV.md agent x for agent @NEXUS.md') == 'gov'
+    assert agent_of('@CRITIC: noted\nUse @GOV.md agent rules') == 'gov'
+    assert agent_of('@CRITIC: noted\napply all for agent @NEXUS.md') == 'nexus'
+
+
+def record(role, text):
+    entry = {
+        'type': role,
+        'timestamp': '2026-10-18T10:00:00Z',
+        'message': {'role': role, 'content': [{'type': 'text', 'text': text}]},
+    }
+    return json.dumps(entry) + '\n'
+
+
+DECISION = '```\nnext_state: idle\nthread: window-test\n```'
+
+
+def test_decision_followed_by_other_output_is_stale(tmp_path):
+    session = tmp_path / 'session.jsonl'
+    session.write_text(record('assistant', DECISION) + record('user', 'x' * 3000))
+    assert JSONLParser().snapshot(session).decision is None
+
+
+def test_decision_record_straddling_window_counts(tmp_path):
+    session = tmp_path / 'session.jsonl'
+    session.write_text(record('assistant', 'y' * 1000 + '\n' + DECISION)
+                       + record('user', 'x' * 1500))
+    decision = JSONLParser().snapshot(session).decision
+    assert decision is not None
+    assert decision.thread == 'window-test'
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Parsed-session cache tests: incremental appends and rebuilds
+
+Run with: python -m pytest test_session_cache.py
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'critic' / 'tools'))
+
+import session_cache
+from session_cache import SessionColumns, cache_path_for, load_session
+
+PARSE_FROM = session_cache._parse_from
+
+
+def line(text, tokens=0, entry_type='assistant'):
+    message = {'role': entry_type, 'content': [{'type': 'text', 'text': text}]}
+    if tokens:
+        message['usage'] = {'input_tokens': tokens, 'output_tokens': 1}
+    return json.dumps({'type': entry_type, 'timestamp': '2025-06-01T00:00:00Z', 'message': message}) + '\n'
+
+
+@pytest.fixture
+def parses(monkeypatch):
+    """Offsets each parse started from"""
+    starts = []
+
+    def recording(source, offset, lines, columns):
+        starts.append(offset)
+        return PARSE_FROM(source, offset, lines, columns)
+
+    monkeypatch.setattr(session_cache, '_parse_from', recording)
+    return starts
+
+
+def uncached(source):
+    """Rows from a fresh full parse (not recorded)"""
+    columns = SessionColumns(source)
+    PARSE_FROM(source, 0, 0, columns)
+    return columns.rows()
+
+
+def test_unchanged_file_loads_from_cache(tmp_path, parses):
+    source = tmp_path / 's.jsonl'
+    source.write_text(line('one', 10) + 'not json\n' + line('two', 20, 'user'))
+    cache_dir = tmp_path / 'cache'
+
+    first = load_session(source, cache_dir)
+    assert list(first.line) == [1, 3]
+    assert list(first.input_tokens) == [10, 20]
+    assert cache_path_for(source, cache_dir).exists()
+
+    second = load_session(source, cache_dir)
+    assert parses == [0]
+    assert second.rows() == first.rows() == uncached(source)
+
+
+def test_appends_parse_only_new_lines(tmp_path, parses):
+    source = tmp_path / 's.jsonl'
+    source.write_text(line('one', 10))
+    cache_dir = tmp_path / 'cache'
+    load_session(source, cache_dir)
+    size = source.stat().st_size
+
+    # A partial line is left for the next load
+    partial = line('two', 20)
+    with open(source, 'a') as f:
+        f.write(partial[:15])
+    assert len(load_session(source, cache_dir)) == 1
+
+    with open(source, 'a') as f:
+        f.write(partial[15:] + line('three', 30))
+    columns = load_session(source, cache_dir)
+    assert parses == [0, size, size]
+    assert list(columns.input_tokens) == [10, 20, 30]
+    assert list(columns.line) == [1, 2, 3]
+    assert columns.rows() == uncached(source)
+
+
+def test_rewritten_file_is_rebuilt(tmp_path, parses):
+    source = tmp_path / 's.jsonl'
+    source.write_text(line('one', 10) + line('two', 20))
+    cache_dir = tmp_path / 'cache'
+    load_session(source, cache_dir)
+
+    # Truncated in place
+    source.write_text(line('new', 5))
+    assert load_session(source, cache_dir).rows() == uncached(source)
+
+    # Replaced by a longer file (new inode)
+    replacement = tmp_path / 'replacement.jsonl'
+    replacement.write_text(line('a', 1) + line('b', 2) + line('c', 3))
+    os.replace(replacement, source)
+    columns = load_session(source, cache_dir)
+    assert list(columns.input_tokens) == [1, 2, 3]
+    assert parses == [0, 0, 0]
+
+
+def test_corrupt_cache_is_rebuilt(tmp_path, parses):
+    source = tmp_path / 's.jsonl'
+    source.write_text(line('one', 10))
+    cache_dir = tmp_path / 'cache'
+    load_session(source, cache_dir)
+
+    cache_path_for(source, cache_dir).write_bytes(b'garbage')
+    assert load_session(source, cache_dir).rows() == uncached(source)
+    assert load_session(source, cache_dir).rows() == uncached(source)
+    assert parses == [0, 0]
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+SessionIndex must answer queries exactly as the session_query_v2 file scan
+
+Run with: python -m pytest test_session_index.py
+"""
+
+import itertools
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'critic' / 'tools'))
+
+from session_index import fts5_available
+from session_query_v2 import SessionQueryV2
+
+pytestmark = pytest.mark.skipif(not fts5_available(), reason='SQLite without FTS5 trigram')
+
+
+def entry(entry_type, text, user_type=None):
+    line = {'type': entry_type, 'timestamp': '2025-06-01T00:00:00Z',
+            'message': {'role': entry_type, 'content': text}}
+    if user_type:
+        line['userType'] = user_type
+    return json.dumps(line)
+
+
+# The first identity match differs depending on which entry types are scanned
+SESSIONS = {
+    'a-session.jsonl': [
+        entry('assistant', 'I am ERA-1, picking up the TUI work'),
+        entry('user', 'Read CRITIC.md for identity', 'external'),
+        entry('assistant', 'The build failed with an error'),
+        entry('user', 'nope, try again instead', 'external'),
+        json.dumps({'type': 'summary', 'summary': 'I am GOV'}),
+        'not json',
+        entry('user', 'actually use the engine', 'external'),
+    ],
+    'b-session.jsonl': [
+        entry('user', 'hello there', 'external'),
+        entry('assistant', '@GOV: reviewed the error'),
+        entry('user', "no, don't do that", 'external'),
+        entry('assistant', 'I am NEXUS now'),
+    ],
+}
+
+FILTERS = {
+    'pattern': [None, 'error', 'try|again'],
+    'entry_type': [None, 'user', 'assistant'],
+    'user_type': [None, 'external'],
+    'agent': [None, 'era-1', 'CRITIC', 'GOV'],
+    'interventions_only': [False, True],
+}
+
+
+@pytest.fixture
+def session_dir(tmp_path):
+    sessions = tmp_path / 'sessions'
+    sessions.mkdir()
+    for name, lines in SESSIONS.items():
+        (sessions / name).write_text('\n'.join(lines) + '\n')
+    return sessions
+
+
+def results(query, **filters):
+    return [(highlight, [(e['_file'], e.get('type'), e['_agent'], e['_content']) for e in context])
+            for context, highlight in query.stream_entries_with_context(**filters)]
+
+
+def test_index_matches_scan_under_filters(session_dir, tmp_path):
+    indexed = SessionQueryV2(str(session_dir), index_path=str(tmp_path / 'index.db'))
+    assert indexed.index
+
+    for values in itertools.product(*FILTERS.values()):
+        filters = dict(zip(FILTERS, values))
+        # Agent attribution is cached per file, so scan with a fresh query each time
+        expected = results(SessionQueryV2(str(session_dir)), **filters)
+        assert results(indexed, **filters) == expected, filters
+
+
+def test_user_filter_attributes_first_user_identity(session_dir, tmp_path):
+    indexed = SessionQueryV2(str(session_dir), index_path=str(tmp_path / 'index.db'))
+    found = results(indexed, entry_type='user', interventions_only=True)
+    assert {context[0][2] for _, context in found if context[0][0] == 'a-session.jsonl'} == {'CRITIC'}
+    assert results(indexed, entry_type='assistant', agent='ERA-1')
+
+
+def test_context_windows_match_scan(session_dir, tmp_path):
+    indexed = SessionQueryV2(str(session_dir), index_path=str(tmp_path / 'index.db'))
+    for filters in ({'pattern': 'error'}, {'entry_type': 'user', 'interventions_only': True}):
+        expected = results(SessionQueryV2(str(session_dir)), context_before=2, context_after=1, **filters)
+        assert results(indexed, context_before=2, context_after=1, **filters) == expected
+
+
+def test_missing_session_dir_is_empty(session_dir, tmp_path):
+    indexed = SessionQueryV2(str(tmp_path / 'missing'), index_path=str(tmp_path / 'index.db'))
+    assert results(indexed, pattern='foo') == []
+
+    indexed = SessionQueryV2(str(session_dir), index_path=str(tmp_path / 'index.db'))
+    assert results(indexed, pattern='error')
+    shutil.rmtree(session_dir)
+    assert results(indexed, pattern='error') == []
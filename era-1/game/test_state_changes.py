@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Per-agent state diffs and the snapshots ThreadedStateEngine publishes from them
+
+Run with: python -m pytest test_state_changes.py
+"""
+
+from dataclasses import replace
+from datetime import datetime
+
+from engine.models import AgentGroundState, AgentState
+from engine.state_changes import StateObserver, diff_agent_state, diff_agent_states
+from engine.threaded_engine import ThreadedStateEngine
+
+
+class Recorder(StateObserver):
+    def __init__(self):
+        self.changes = []
+
+    def on_agent_changed(self, change):
+        self.changes.append(change)
+
+
+def test_volatile_fields_are_not_changes():
+    old = AgentGroundState(context_tokens=10, last_updated=datetime(2026, 1, 1))
+    assert diff_agent_state('gov', old, replace(old, last_updated=datetime(2026, 1, 2))) is None
+
+    change = diff_agent_state('gov', old, replace(old, context_tokens=20, last_updated=datetime(2026, 1, 2)))
+    assert change.fields == {'context_tokens': (10, 20)}
+
+
+def test_added_and_removed_agents():
+    state = AgentGroundState(state=AgentState.IDLE)
+    changes = diff_agent_states({'gov': state}, {'nexus': state})
+    assert [(c.agent, c.old, c.new) for c in changes] == [('gov', state, None), ('nexus', None, state)]
+
+
+def test_unchanged_polls_keep_the_snapshot(project):
+    engine = ThreadedStateEngine(project, project / '_sessions', event_driven=False)
+    recorder = Recorder()
+    engine.subscribe(recorder)
+
+    engine.force_poll()
+    first = engine.snapshot()
+    assert first.version == 1
+    assert set(first.agents) == {'critic', 'era-1', 'gov', 'nexus'}
+    recorder.changes.clear()
+
+    # Each poll refreshes last_updated, which alone must not publish anything
+    engine.force_poll()
+    engine.force_poll()
+    assert engine.snapshot() is first
+    assert recorder.changes == []
+
+
+def test_removed_agents_leave_the_snapshot(project, monkeypatch):
+    engine = ThreadedStateEngine(project, project / '_sessions', event_driven=False)
+    engine.force_poll()
+    first = engine.snapshot()
+
+    states = dict(engine.engine.get_agent_states())
+    del states['nexus']
+    monkeypatch.setattr(engine.engine, 'get_agent_states', lambda: states)
+    recorder = Recorder()
+    engine.subscribe(recorder)
+    engine.force_poll()
+
+    snapshot = engine.snapshot()
+    assert snapshot.version == first.version + 1
+    assert 'nexus' not in snapshot.agents
+    assert all(snapshot.agents[name] is first.agents[name] for name in snapshot.agents)
+    assert [(c.agent, c.new) for c in recorder.changes] == [('nexus', None)]
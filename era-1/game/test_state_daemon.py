@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+State engine daemon, wire protocol and forced poll tests
+
+Run with: python -m pytest test_state_daemon.py
+"""
+
+import threading
+from datetime import datetime
+
+import pytest
+
+from engine.models import AgentGroundState, AgentState
+from engine.state_protocol import (FrameDecoder, ProtocolError, StateClient, decode_state,
+                                   encode_frame, encode_state)
+from engine.threaded_engine import StateEngineDaemon, ThreadedStateEngine
+
+
+# Framing
+
+def test_frames_split_across_reads():
+    data = encode_frame({'op': 'ping'}) + encode_frame({'op': 'snapshot', 'n': [1, 2]})
+    decoder = FrameDecoder()
+    messages = []
+    for i in range(len(data)):
+        messages += decoder.feed(data[i:i + 1])
+    assert messages == [{'op': 'ping'}, {'op': 'snapshot', 'n': [1, 2]}]
+
+
+def test_oversized_frame_rejected():
+    with pytest.raises(ProtocolError):
+        FrameDecoder().feed(b'\xff\xff\xff\xff')
+
+
+def test_undecodable_frame_rejected():
+    with pytest.raises(ProtocolError):
+        FrameDecoder().feed(b'\x00\x00\x00\x03{{{')
+
+
+def test_state_round_trip():
+    state = AgentGroundState(state=AgentState.DEEP_WORK, thread='engine-perf',
+                             context_tokens=1234, last_updated=datetime(2026, 1, 2, 3, 4, 5))
+    assert decode_state(encode_state(state)) == state
+
+
+# Daemon
+
+@pytest.fixture
+def daemon(project):
+    daemon = StateEngineDaemon(project, project / '_sessions',
+                               socket_path=project / 'engine.sock')
+    daemon.start()
+    yield daemon
+    daemon.stop()
+
+
+def test_daemon_requests(daemon):
+    with StateClient(daemon.socket_path) as client:
+        version, agents = client.snapshot()
+        assert version >= 1
+        assert sorted(agents) == ['critic', 'era-1', 'gov', 'nexus']
+        assert agents['gov'].session_id == 'gov-s1'
+        
+        client.poll()
+        assert client.request('ping')['op'] == 'pong'
+        with pytest.raises(ProtocolError, match='Unknown op'):
+            client.request('bogus')
+
+
+def test_daemon_serves_after_failed_startup_poll(project):
+    daemon = StateEngineDaemon(project, project / '_sessions',
+                               socket_path=project / 'engine.sock')
+    poll_agents = daemon.engine.engine.poll_agents
+    calls = []
+    
+    def fail_once(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError('boom')
+        return poll_agents(*args, **kwargs)
+    
+    daemon.engine.engine.poll_agents = fail_once
+    daemon.start()
+    try:
+        with StateClient(daemon.socket_path) as client:
+            assert 'Initial poll error: boom' in client.status()['errors']
+            client.poll()
+            _, agents = client.snapshot()
+        assert sorted(agents) == ['critic', 'era-1', 'gov', 'nexus']
+    finally:
+        daemon.stop()
+
+
+def test_daemon_removes_socket_on_stop(daemon):
+    daemon.stop()
+    assert not daemon.socket_path.exists()
+
+
+# Forced polls
+
+class CycleRecorder:
+    """Wraps StateEngine.poll_agents to record threads and overlapping cycles"""
+    
+    def __init__(self, engine):
+        self.poll_agents = engine.poll_agents
+        self.threads = set()
+        self.active = 0
+        self.overlapped = False
+        self.lock = threading.Lock()
+        engine.poll_agents = self
+    
+    def __call__(self, *args, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.overlapped |= self.active > 1
+            self.threads.add(threading.current_thread())
+        try:
+            return self.poll_agents(*args, **kwargs)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+@pytest.mark.parametrize('event_driven', [True, False])
+def test_forced_polls_run_on_engine_thread(project, event_driven):
+    engine = ThreadedStateEngine(project, project / '_sessions', event_driven=event_driven)
+    recorder = CycleRecorder(engine.engine)
+    engine.start()
+    try:
+        callers = [threading.Thread(target=engine.force_poll) for _ in range(4)]
+        for caller in callers:
+            caller.start()
+        for caller in callers:
+            caller.join(timeout=30)
+        assert not any(caller.is_alive() for caller in callers)
+    finally:
+        engine.stop()
+    
+    assert recorder.threads == {engine.thread}
+    assert not recorder.overlapped
+    assert sorted(engine.get_all_agents()) == ['critic', 'era-1', 'gov', 'nexus']
+
+
+def test_forced_poll_errors_reach_caller(project):
+    engine = ThreadedStateEngine(project, project / '_sessions')
+    engine.start()
+    try:
+        def fail(*args, **kwargs):
+            raise RuntimeError('boom')
+        engine.engine.poll_agents = fail
+        with pytest.raises(RuntimeError, match='boom'):
+            engine.force_poll()
+    finally:
+        engine.stop()
+
+
+def test_forced_poll_without_engine_thread(project):
+    engine = ThreadedStateEngine(project, project / '_sessions')
+    engine.force_poll()
+    assert engine.version == 1
+    assert sorted(engine.get_all_agents()) == ['critic', 'era-1', 'gov', 'nexus']
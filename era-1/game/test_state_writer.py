@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+StateWriter no-op skip tests
+
+Run with: python -m pytest test_state_writer.py
+"""
+
+from dataclasses import replace
+from datetime import datetime
+
+from engine.models import AgentGroundState, AgentState
+from engine.state_writer import StateWriter
+
+
+STATE = AgentGroundState(state=AgentState.DEEP_WORK, thread='tests', context_tokens=1000,
+                         last_updated=datetime(2026, 1, 1, 12, 0, 0))
+
+
+def write(writer, state, agent='gov'):
+    assert writer.write_agent_state(agent, state)
+    return writer.get_write_stats()
+
+
+def test_volatile_only_change_is_skipped(tmp_path):
+    writer = StateWriter(tmp_path)
+    assert write(writer, STATE) == {'performed': 1, 'skipped': 0}
+    before = (tmp_path / 'gov' / '_state.md').read_text()
+
+    assert write(writer, replace(STATE, last_updated=datetime(2026, 1, 1, 12, 0, 5))) == {'performed': 1, 'skipped': 1}
+    assert (tmp_path / 'gov' / '_state.md').read_text() == before
+
+
+def test_real_change_is_written(tmp_path):
+    writer = StateWriter(tmp_path)
+    write(writer, STATE)
+    assert write(writer, replace(STATE, context_tokens=2000)) == {'performed': 2, 'skipped': 0}
+    assert writer.read_agent_state('gov').context_tokens == 2000
+
+
+def test_agents_are_tracked_separately(tmp_path):
+    writer = StateWriter(tmp_path)
+    write(writer, STATE, 'gov')
+    assert write(writer, STATE, 'nexus') == {'performed': 2, 'skipped': 0}
+
+
+def test_refreshed_after_min_interval(tmp_path):
+    writer = StateWriter(tmp_path, min_refresh_interval=0)
+    write(writer, STATE)
+    assert write(writer, STATE) == {'performed': 2, 'skipped': 0}
+
+
+def test_external_edit_is_overwritten(tmp_path):
+    writer = StateWriter(tmp_path)
+    write(writer, STATE)
+    assert not writer.changed_externally('gov')
+
+    state_file = tmp_path / 'gov' / '_state.md'
+    state_file.write_text('edited by hand\n')
+    assert writer.changed_externally('gov')
+    assert write(writer, STATE) == {'performed': 2, 'skipped': 0}
+    assert state_file.read_text() != 'edited by hand\n'
+
+    # Deleted files are rewritten too
+    state_file.unlink()
+    assert write(writer, STATE) == {'performed': 3, 'skipped': 0}
+    assert state_file.exists()
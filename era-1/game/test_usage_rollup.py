@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Usage rollup tests: incremental refreshes must add up to a full ingest
+
+Run with: python -m pytest test_usage_rollup.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'critic' / 'tools'))
+
+from usage_rollup import PERIODS, UsageRollup
+
+
+def assistant(timestamp, text, cache_read=0, cache_write=0, cost=0.0):
+    entry = {'type': 'assistant', 'message': {
+        'role': 'assistant', 'content': [{'type': 'text', 'text': text}],
+        'usage': {'input_tokens': 10, 'output_tokens': 5, 'cache_read_input_tokens': cache_read,
+                  'cache_creation_input_tokens': cache_write}}, 'costUSD': cost}
+    if timestamp:
+        entry['timestamp'] = timestamp
+    return json.dumps(entry) + '\n'
+
+
+def user(timestamp, text):
+    return json.dumps({'type': 'user', 'userType': 'external', 'timestamp': timestamp,
+                       'message': {'role': 'user', 'content': text}}) + '\n'
+
+
+# Chunks appended between refreshes; hours and an untimestamped row straddle them
+GOV_CHUNKS = [
+    [user('2025-06-01T09:00:00Z', 'start'),
+     assistant('2025-06-01T09:05:00Z', '@GOV: on it', 1000, 200, 0.01)],
+    [assistant('2025-06-01T09:40:00Z', 'more', 5000, 100, 0.02),
+     user('2025-06-01T09:50:00Z', '/clear')],
+    [assistant(None, 'no timestamp', 300, 0, 0.005),
+     assistant('2025-06-01T10:10:00Z', 'next_state: logout', 100, 50, 0.01)],
+    [assistant('2025-06-02T08:00:00Z', 'next day', 2000, 0, 0.03)],
+]
+
+NEXUS_SESSION = [user('2025-06-01T09:30:00Z', 'Read NEXUS.md for identity'),
+                 assistant('2025-06-01T09:31:00Z', 'routing', 700, 70, 0.004)]
+
+
+def reports(rollup):
+    return {(by, split): rollup.query(by=by, split_agents=split) for by in PERIODS for split in (False, True)}
+
+
+@pytest.fixture
+def sessions(tmp_path):
+    sessions = tmp_path / 'sessions'
+    sessions.mkdir()
+    (sessions / 'nexus.jsonl').write_text(''.join(NEXUS_SESSION))
+    return sessions
+
+
+def rollup_for(tmp_path, sessions, name):
+    return UsageRollup(tmp_path / f'{name}.db', sessions, cache_dir=tmp_path / f'{name}-cache')
+
+
+def test_incremental_refreshes_match_full_ingest(tmp_path, sessions):
+    incremental = rollup_for(tmp_path, sessions, 'incremental')
+    assert incremental.refresh() == len(NEXUS_SESSION)
+    gov = sessions / 'gov.jsonl'
+    for chunk in GOV_CHUNKS:
+        with open(gov, 'a') as f:
+            f.write(''.join(chunk))
+        assert incremental.refresh() == len(chunk)
+    assert incremental.refresh() == 0
+
+    full = rollup_for(tmp_path, sessions, 'full')
+    full.refresh()
+    assert reports(incremental) == reports(full)
+
+    totals = {row['agent']: row for row in full.query(by='total', split_agents=True)}
+    assert totals['GOV']['operations'] == 5
+    assert totals['GOV']['clears'] == 1
+    assert totals['GOV']['logouts'] == 1
+    assert totals['GOV']['max_context'] == 5100
+    assert totals['NEXUS']['operations'] == 1
+
+    # The untimestamped row counts towards the 09 hour it followed
+    hours = {row['period']: row for row in full.query(by='hour', agent='gov')}
+    assert hours['2025-06-01T09']['operations'] == 3
+    assert hours['2025-06-01T10']['operations'] == 1
+
+
+def test_rewritten_file_is_reingested(tmp_path, sessions):
+    rollup = rollup_for(tmp_path, sessions, 'rollup')
+    gov = sessions / 'gov.jsonl'
+    gov.write_text(''.join(sum(GOV_CHUNKS, [])))
+    rollup.refresh()
+
+    gov.write_text(''.join(GOV_CHUNKS[0]))
+    assert rollup.refresh() == len(GOV_CHUNKS[0])
+    full = rollup_for(tmp_path, sessions, 'full')
+    full.refresh()
+    assert reports(rollup) == reports(full)
+
+
+def test_removed_files_keep_their_history(tmp_path, sessions):
+    rollup = rollup_for(tmp_path, sessions, 'rollup')
+    rollup.refresh()
+    before = reports(rollup)
+
+    (sessions / 'nexus.jsonl').unlink()
+    assert rollup.refresh() == 0
+    assert reports(rollup) == before
@@ -17,8 +17,10 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from engine.threaded_engine import ThreadedStateEngine
+from engine.state_protocol import RemoteStateEngine, daemon_available
 from engine.pidfile import PidFile
 from ui.widgets import AgentList, AgentDetails, CommandPalette
+from ui.state_bridge import AgentsChanged, ContextThreshold, QueuedStateObserver
 from ui.theme import PHOSPHOR_CSS
 
 
@@ -43,6 +45,7 @@ class FoundationTerminal(App):
         self.project_root = Path(__file__).parent.parent.parent.parent
         self.sessions_dir = self.project_root / "_sessions"
         self.engine = None
+        self.state_observer = None
         
         # Configuration options
         self.debug_mode = False
@@ -69,13 +72,24 @@ class FoundationTerminal(App):
         """Initialize the application after mounting"""
         # Start the state engine if enabled
         if self.use_engine:
-            self.engine = ThreadedStateEngine(
-                self.project_root,
-                self.sessions_dir
-            )
-            self.engine.start()
-            # Force initial poll to populate state
-            self.engine.force_poll()
+            if daemon_available():
+                # Share the running engine daemon (start() loads its snapshot)
+                self.engine = RemoteStateEngine()
+                self.engine.start()
+            else:
+                self.engine = ThreadedStateEngine(
+                    self.project_root,
+                    self.sessions_dir
+                )
+                self.engine.start()
+                # Force initial poll to populate state
+                self.engine.force_poll()
+        
+        # From here on the engine pushes changes instead of the UI re-reading
+        # (subscribed before the initial load so no change falls in between)
+        if self.engine:
+            self.state_observer = QueuedStateObserver(self)
+            self.engine.subscribe(self.state_observer)
         
         # Load initial agent data directly (reactive might not fire on mount)
         agents = self.get_agent_data()
@@ -90,6 +104,8 @@ class FoundationTerminal(App):
     def on_unmount(self) -> None:
         """Clean up when app closes"""
         if self.engine:
+            if self.state_observer:
+                self.engine.unsubscribe(self.state_observer)
             self.engine.stop()
             
     def get_agent_data(self) -> dict:
@@ -143,6 +159,26 @@ class FoundationTerminal(App):
                     agents[agent_list.selected_agent]
                 )
     
+    def on_agents_changed(self, message: AgentsChanged) -> None:
+        """Apply pushed engine changes to the affected rows only"""
+        if not self.state_observer:
+            return
+        changes = self.state_observer.drain()
+        if not changes:
+            return
+        
+        agent_list = self.query_one("#agent-list", AgentList)
+        agent_list.apply_changes(changes)
+        
+        selected = agent_list.selected_agent
+        if selected in changes and changes[selected].new:
+            details = self.query_one("#agent-details", AgentDetails)
+            details.update_agent(selected, changes[selected].new)
+    
+    def on_context_threshold(self, message: ContextThreshold) -> None:
+        """Warn when an agent's context fills up"""
+        self.notify(f"@{message.agent} context at {message.percent:.0f}%", severity="warning")
+    
     def action_refresh(self) -> None:
         """Manual refresh action"""
         if self.engine:
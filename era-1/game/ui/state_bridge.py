@@ -0,0 +1,72 @@
+"""
+Foundation Terminal - Engine to UI bridge
+
+Engine observers are called on the engine thread, but widgets may only be
+touched from Textual's loop. QueuedStateObserver queues the changes and
+posts one AgentsChanged message per batch; the app drains the queue when
+it handles the message, getting one net change per agent.
+"""
+
+import queue
+import threading
+from typing import Dict
+
+from textual.message import Message
+
+from engine.state_changes import AgentStateChange, StateObserver, diff_agent_state
+
+
+class AgentsChanged(Message):
+    """Agent changes are waiting in the observer's queue"""
+
+
+class ContextThreshold(Message):
+    """An agent's context usage crossed a warning threshold"""
+    
+    def __init__(self, agent: str, percent: float):
+        super().__init__()
+        self.agent = agent
+        self.percent = percent
+
+
+class QueuedStateObserver(StateObserver):
+    """Thread-safe hand-off of engine changes to the app's message loop"""
+    
+    def __init__(self, app):
+        self.app = app
+        self._queue: "queue.SimpleQueue[AgentStateChange]" = queue.SimpleQueue()
+        self._posted = threading.Event()
+    
+    def on_agent_changed(self, change: AgentStateChange):
+        self._queue.put(change)
+        # One message per batch; drain() re-arms it
+        if not self._posted.is_set():
+            self._posted.set()
+            self.app.post_message(AgentsChanged())
+    
+    def on_context_threshold(self, agent_name: str, percent: float):
+        self.app.post_message(ContextThreshold(agent_name, percent))
+    
+    def drain(self) -> Dict[str, AgentStateChange]:
+        """Queued changes merged per agent (call from the app loop)"""
+        # Re-arm first so changes queued from here on post a new message
+        self._posted.clear()
+        
+        # Earliest old and latest new state per agent, diffed once
+        spans: Dict[str, list] = {}
+        while True:
+            try:
+                change = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if change.agent in spans:
+                spans[change.agent][1] = change.new
+            else:
+                spans[change.agent] = [change.old, change.new]
+        
+        merged = {}
+        for agent, (old, new) in spans.items():
+            change = diff_agent_state(agent, old, new)
+            if change:  # None if it changed and changed back
+                merged[agent] = change
+        return merged
@@ -8,19 +8,36 @@ from textual.containers import Vertical, Horizontal, ScrollableContainer
 from textual.reactive import reactive
 from textual import events
 from textual.widgets import DataTable
+from textual.widgets.data_table import CellDoesNotExist
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 
 
 class AgentList(Static):
-    """Agent list with live status indicators"""
+    """
+    Agent list with live status indicators
+    
+    Rows are keyed by agent name and a shadow copy of every rendered cell is
+    kept, so updates only touch cells whose text changed. Updates arriving
+    in the same tick are batched into one pass over the table; the table is
+    never cleared, so selection and scroll position survive.
+    """
     
     selected_agent = reactive(None)
     
+    # Column keys, in the order _row_cells returns them
+    COLUMNS = ("agent", "state")
+    
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.agents_data = {}
         
+        # Cells as last sent to the table, per agent
+        self._rendered: Dict[str, Tuple[str, ...]] = {}
+        # Rows to apply on the next flush (None = remove)
+        self._pending: Dict[str, Optional[Tuple[str, ...]]] = {}
+        self._flush_scheduled = False
+        
     def compose(self) -> ComposeResult:
         """Create the agent list layout"""
         yield Static("═ AGENTS ═", classes="title")
@@ -29,37 +46,90 @@ class AgentList(Static):
     def on_mount(self) -> None:
         """Initialize the data table"""
         table = self.query_one("#agent-table", DataTable)
-        table.add_column("agent", key="agent")
-        table.add_column("state", key="state")
+        for column in self.COLUMNS:
+            table.add_column(column, key=column)
         table.cursor_type = "row"
         
     def update_agents(self, agents: Dict) -> None:
-        """Update the agent list with new data"""
-        self.agents_data = agents
-        table = self.query_one("#agent-table", DataTable)
-        
-        # Clear existing rows
-        table.clear()
+        """Show exactly these agents"""
+        self.agents_data = dict(agents)
         
-        # Add agent rows
+        for name in self._rendered.keys() | self._pending.keys():
+            if name not in agents:
+                self._pending[name] = None
         for name, state_data in agents.items():
-            state = state_data.state if state_data else "offline"
-            context_pct = state_data.context_percent if state_data else 0
-            
-            # Color code based on state and context
-            if state in ["inbox", "deep_work"]:
-                style = "active"
-            elif state == "idle":
-                style = "idle"
-            elif context_pct > 80:
-                style = "alert"
+            self._pending[name] = self._row_cells(name, state_data)
+        
+        self._schedule_flush()
+    
+    def apply_changes(self, changes: Dict) -> None:
+        """Apply engine changes (AgentStateChange per agent)"""
+        for name, change in changes.items():
+            if change.new is None:
+                self.agents_data.pop(name, None)
+                self._pending[name] = None
             else:
-                style = "offline"
-                
-            # Format: "@NAME [state]"
-            display = f"@{name:<8} [{state:>10}]"
-            table.add_row(display, "", key=name)
-            
+                self.agents_data[name] = change.new
+                self._pending[name] = self._row_cells(name, change.new)
+        
+        self._schedule_flush()
+    
+    def _schedule_flush(self) -> None:
+        # Everything queued before the next message loop pass goes in one flush
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.call_later(self._flush)
+    
+    def _flush(self) -> None:
+        """Apply pending rows to the table, touching only changed cells"""
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        table = self.query_one("#agent-table", DataTable)
+        
+        # Adding/removing rows can move the cursor off its agent
+        cursor_agent = self._cursor_agent(table)
+        scroll = (table.scroll_x, table.scroll_y)
+        rows_changed = False
+        
+        for name, cells in pending.items():
+            rendered = self._rendered.get(name)
+            if cells is None:
+                if rendered is not None:
+                    table.remove_row(name)
+                    del self._rendered[name]
+                    rows_changed = True
+            elif rendered is None:
+                table.add_row(*cells, key=name)
+                self._rendered[name] = cells
+                rows_changed = True
+            elif cells != rendered:
+                for column, old, new in zip(self.COLUMNS, rendered, cells):
+                    if old != new:
+                        table.update_cell(name, column, new)
+                self._rendered[name] = cells
+        
+        if rows_changed and cursor_agent in self._rendered:
+            table.move_cursor(row=table.get_row_index(cursor_agent))
+            table.scroll_to(*scroll, animate=False)
+    
+    @staticmethod
+    def _cursor_agent(table: DataTable) -> Optional[str]:
+        """Agent under the table cursor"""
+        if not table.row_count:
+            return None
+        try:
+            return table.coordinate_to_cell_key(table.cursor_coordinate).row_key.value
+        except CellDoesNotExist:
+            return None
+    
+    @staticmethod
+    def _row_cells(name: str, state_data) -> Tuple[str, ...]:
+        """Format: "@NAME" "[state]" """
+        state = state_data.state if state_data else "offline"
+        # Engine states are AgentState enums, mock data uses plain strings
+        state = getattr(state, "value", state)
+        return f"@{name:<8}", f"[{state:>10}]"
+    
     def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
         """Handle agent selection"""
         if event.row_key:
@@ -13,6 +13,7 @@ import json
 sys.path.insert(0, str(Path(__file__).parent))
 
 from engine.jsonl_parser import JSONLParser
+from engine.state_protocol import ProtocolError, StateClient
 
 
 def get_git_state(agent: str) -> tuple[str, str]:
@@ -80,6 +81,16 @@ def check_jsonl_session(sessions_dir: Path, agent: str) -> dict:
     }
 
 
+def get_engine_states() -> dict:
+    """In-memory agent states from the engine daemon, {} if it isn't running"""
+    try:
+        with StateClient() as client:
+            _, states = client.snapshot()
+            return states
+    except (OSError, ProtocolError):
+        return {}
+
+
 def main():
     """Validate state consistency across git, files, and sessions"""
     project_root = Path(__file__).parent.parent.parent
@@ -91,6 +102,9 @@ def main():
     print()
     
     agents = ["critic", "era-1", "gov", "nexus"]
+    engine_states = get_engine_states()
+    if not engine_states:
+        print("Engine daemon: not running")
     
     for agent in agents:
         print(f"\n{agent.upper()}")
@@ -108,6 +122,16 @@ def main():
             print(f" (commit: {file_data['commit'][:7]})", end="")
         print()
         
+        engine_state = engine_states.get(agent)
+        if engine_state:
+            print(f"  Engine state: {engine_state.state.value}", end="")
+            if engine_state.context_percent is not None:
+                print(f" (context: {engine_state.context_percent:.1f}%)", end="")
+            print()
+            # _state.md is written behind the engine, so this can lag briefly
+            if file_data.get('state') and file_data['state'] != engine_state.state.value:
+                print(f"  ⚠️  MISMATCH: Engine state != File state")
+        
         # Check consistency
         if git_commit != file_data.get('commit', ''):
             print(f"  ⚠️  MISMATCH: Git commit != File commit")
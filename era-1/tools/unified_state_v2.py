@@ -10,6 +10,12 @@ import re
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, Any, Optional
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'game'))
+from engine.agent_registry import AgentRegistry
+from engine.models import AgentGroundState
+from engine.state_protocol import ProtocolError, StateClient
 
 def parse_state_file(agent_name: str) -> Dict[str, Any]:
     """Parse agent's _state.md file"""
@@ -136,8 +142,17 @@ def get_unread_count(agent_name: str, last_read_hash: str) -> int:
         pass
     return 0
 
-def get_agent_state(agent_name: str) -> Dict[str, Any]:
-    """Get comprehensive state for a single agent"""
+def get_live_states() -> Dict[str, AgentGroundState]:
+    """Agent states from the running engine daemon, or {} if none is running"""
+    try:
+        with StateClient() as client:
+            _, states = client.snapshot()
+            return states
+    except (OSError, ProtocolError):
+        return {}
+
+def get_agent_state(agent_name: str, live: Optional[AgentGroundState] = None) -> Dict[str, Any]:
+    """Get comprehensive state for a single agent (live = engine daemon's view)"""
     # Start with parsed state file
     state = parse_state_file(agent_name)
     
@@ -166,8 +181,17 @@ def get_agent_state(agent_name: str) -> Dict[str, Any]:
             "age": format_age(state.get("last_read_commit_timestamp", ""))
         }
     
+    # Engine's in-memory state is newer than the write-behind _state.md
+    if live:
+        agent_state["state_machine"] = live.state.value
+        agent_state["thread"] = live.thread or "none"
+        agent_state["session_id"] = live.session_id or "unknown"
+    
     # Context window from session file
-    if state.get("session_id") and state["session_id"] != "unknown":
+    if live and live.context_tokens is not None:
+        agent_state["context_tokens"] = live.context_tokens
+        agent_state["context_percent"] = round(live.context_percent or 0)
+    elif state.get("session_id") and state["session_id"] != "unknown":
         context_info = get_context_from_session(state["session_id"])
         agent_state["context_tokens"] = context_info["tokens"]
         agent_state["context_percent"] = context_info["percent"]
@@ -176,7 +200,9 @@ def get_agent_state(agent_name: str) -> Dict[str, Any]:
         agent_state["context_percent"] = 0
     
     # Unread messages
-    if state.get("last_read_commit_hash"):
+    if live:
+        agent_state["unread_messages"] = live.unread_message_count
+    elif state.get("last_read_commit_hash"):
         agent_state["unread_messages"] = get_unread_count(agent_name, state["last_read_commit_hash"])
     else:
         agent_state["unread_messages"] = 0
@@ -192,15 +218,19 @@ def get_agent_state(agent_name: str) -> Dict[str, Any]:
 
 def get_system_state() -> Dict[str, Any]:
     """Get complete system state"""
-    agents = ["nexus", "gov", "critic", "era-1", "admin"]
+    # Discovered agent workspaces, plus the human operator's
+    registry = AgentRegistry(Path.cwd(), Path("_sessions"))
+    agents = registry.all_agents() + ["admin"]
+    live_states = get_live_states()
     state = {
         "timestamp": datetime.now().isoformat(),
+        "source": "engine daemon" if live_states else "state files",
         "agents": {}
     }
     
     for agent in agents:
         if Path(agent).exists():  # Only include agents with directories
-            state["agents"][agent] = get_agent_state(agent)
+            state["agents"][agent] = get_agent_state(agent, live_states.get(agent))
     
     # System metrics
     active_agents = sum(1 for a in state["agents"].values() if a["active"])
@@ -219,7 +249,7 @@ def get_system_state() -> Dict[str, Any]:
 def format_state_report(state: Dict[str, Any]) -> str:
     """Format state for terminal display"""
     lines = [
-        f"System State Report - {state['timestamp']}",
+        f"System State Report - {state['timestamp']} ({state.get('source', 'state files')})",
         "=" * 70,
         ""
     ]
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Agents whose workspaces the GOV permission servers auto-approve
+
+The allowlist is gov/approved_agents.txt (one agent per line, # comments),
+shared by every permission server, so adding an agent is a one-line change
+GOV reviews. Finding a _state.md somewhere is never enough on its own.
+"""
+
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+APPROVED_AGENTS_FILE = Path(__file__).resolve().parent.parent / 'approved_agents.txt'
+
+_lock = threading.Lock()
+_cache: Tuple[Optional[int], List[str]] = (None, [])
+
+
+def read_approved_agents(path: Path = APPROVED_AGENTS_FILE) -> List[str]:
+    """Parse an allowlist file (missing file = nobody approved)"""
+    try:
+        text = path.read_text()
+    except OSError as e:
+        logging.warning(f"No approved agents list ({e}) - nothing auto-approved")
+        return []
+    agents = []
+    for line in text.splitlines():
+        name = line.split('#', 1)[0].strip().lower()
+        if name:
+            agents.append(name)
+    return agents
+
+
+def approved_agents() -> List[str]:
+    """Current allowlist (re-read only when the file changes)"""
+    global _cache
+    try:
+        mtime = os.stat(APPROVED_AGENTS_FILE).st_mtime_ns
+    except OSError:
+        mtime = None
+    with _lock:
+        if mtime is None or mtime != _cache[0]:
+            _cache = (mtime, read_approved_agents(APPROVED_AGENTS_FILE))
+        return list(_cache[1])
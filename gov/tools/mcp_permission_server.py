@@ -15,6 +15,8 @@ from http.server import HTTPServer, BaseHTTPRequestHandler
 from typing import Dict, Any, Tuple
 import re
 
+from approved_agents import approved_agents
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -79,7 +81,7 @@ class GovPermissionHandler(BaseHTTPRequestHandler):
             agent_dir = agent_match.group(1)
             
             # Check if it's a known agent directory
-            known_agents = ['era-1', 'nexus', 'gov', 'critic', 'admin']
+            known_agents = approved_agents() + ['admin']
             if agent_dir in known_agents:
                 return self.allow(f"Write to {agent_dir} workspace approved")
         
@@ -118,7 +120,7 @@ class GovPermissionHandler(BaseHTTPRequestHandler):
             if path_match:
                 path = path_match.group(1)
                 # Check if it's an agent directory
-                for agent in ['era-1', 'nexus', 'gov', 'critic']:
+                for agent in approved_agents():
                     if path.startswith(f'{agent}/') or path == agent:
                         return self.allow(f"Git add on {agent} workspace approved")
         
@@ -131,7 +133,7 @@ class GovPermissionHandler(BaseHTTPRequestHandler):
             path_match = re.search(r'mkdir\s+(?:-p\s+)?(\S+)', command)
             if path_match:
                 path = path_match.group(1)
-                for agent in ['era-1', 'nexus', 'gov', 'critic']:
+                for agent in approved_agents():
                     if path.startswith(f'{agent}/'):
                         return self.allow(f"Directory creation in {agent} approved")
         
@@ -23,6 +23,8 @@ import re
 from datetime import datetime
 from queue import Queue
 
+from approved_agents import approved_agents
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -180,7 +182,7 @@ class GovPermissionHandler(BaseHTTPRequestHandler):
             parts = file_path.split('/')
             if parts:
                 agent_dir = parts[0]
-                known_agents = ['era-1', 'nexus', 'gov', 'critic', 'admin']
+                known_agents = approved_agents() + ['admin']
                 
                 if agent_dir in known_agents:
                     # Check for special files
@@ -216,7 +218,7 @@ class GovPermissionHandler(BaseHTTPRequestHandler):
             
             if command.strip().startswith('git add'):
                 # Check what's being added
-                for agent in ['era-1', 'nexus', 'gov', 'critic']:
+                for agent in approved_agents():
                     if f' {agent}/' in command or command.endswith(f' {agent}'):
                         return {'behavior': 'allow', 'updatedInput': {}}
         
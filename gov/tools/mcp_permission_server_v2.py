@@ -22,6 +22,8 @@ import re
 from datetime import datetime
 from queue import Queue
 
+from approved_agents import approved_agents
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -129,7 +131,7 @@ class GovPermissionHandler(BaseHTTPRequestHandler):
             agent_match = re.match(r'^/?([^/]+)/', file_path)
             if agent_match:
                 agent_dir = agent_match.group(1)
-                known_agents = ['era-1', 'nexus', 'gov', 'critic', 'admin']
+                known_agents = approved_agents() + ['admin']
                 if agent_dir in known_agents:
                     # But still check for special files
                     filename = file_path.split('/')[-1]
@@ -160,7 +162,7 @@ class GovPermissionHandler(BaseHTTPRequestHandler):
                 path_match = re.search(r'git add\s+([^\s]+)', command)
                 if path_match:
                     path = path_match.group(1)
-                    for agent in ['era-1', 'nexus', 'gov', 'critic']:
+                    for agent in approved_agents():
                         if path.startswith(f'{agent}/') or path == agent:
                             return self.allow(f"Git add on {agent} workspace approved")
         